@@ -0,0 +1,198 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import atexit
+import asyncio
+import functools
+import threading
+import aws.boto3_journal as journal
+import aws.boto3_throttle as throttle
+import aws.boto3_trace as trace
+
+try:
+    import aiobotocore.session
+    from aiobotocore.config import AioConfig
+except ImportError:
+    aiobotocore = None
+
+_LOCK = threading.Lock()
+_LOOP = None
+_SESSIONS = {}
+_CLIENTS = {}
+
+# Connections shared by all in-flight requests of one client
+_POOL_CONNECTIONS = 100
+
+
+def available():
+    """
+    True if the optional aiobotocore package is installed
+    """
+    return aiobotocore is not None
+
+
+def loop():
+    """
+    Get the event loop every async request runs on, started on first use in a daemon thread
+    https://docs.python.org/3/library/asyncio-eventloop.html
+    """
+    global _LOOP
+    with _LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name='boto3-async', daemon=True).start()
+            atexit.register(close)
+        return _LOOP
+
+
+def run(coroutine):
+    """
+    Run 'coroutine' on the event loop and wait for its result from the calling thread
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, loop()).result()
+
+
+def gather(calls):
+    """
+    Await every one of 'calls' (functions returning an awaitable) at once on the event loop, at most
+    _POOL_CONNECTIONS in flight, while the calling thread waits once for them all. Hundreds of requests
+    so take one thread and one connection pool instead of one thread each.
+    https://docs.python.org/3/library/asyncio-task.html#asyncio.gather
+    :return: each result, or the exception its call raised, in order
+    """
+    async def bounded(semaphore, call):
+        async with semaphore:
+            return await call()
+
+    async def everything():
+        semaphore = asyncio.Semaphore(_POOL_CONNECTIONS)
+        return await asyncio.gather(*(bounded(semaphore, call) for call in calls), return_exceptions=True)
+    return run(everything())
+
+
+def session(profile=None):
+    """
+    Get the shared aiobotocore session for a credentials profile, so service models are loaded once
+    and handlers registered on its events reach every client made after
+    https://aiobotocore.readthedocs.io/en/latest/tutorial.html
+    """
+    with _LOCK:
+        if profile not in _SESSIONS:
+            _SESSIONS[profile] = aiobotocore.session.AioSession(profile=profile)
+        return _SESSIONS[profile]
+
+
+def client(service, region=None, profile=None):
+    """
+    Get the shared async client for (service, region, profile) behind a synchronous facade.
+    All clients share one event loop, and each keeps one pool of connections for all its requests.
+    https://aiobotocore.readthedocs.io/en/latest/tutorial.html
+    """
+    key = (service, region, profile)
+    with _LOCK:
+        if key in _CLIENTS:
+            return _CLIENTS[key]
+
+    async def create():
+        context = session(profile).create_client(
+            service, region_name=region, config=AioConfig(max_pool_connections=_POOL_CONNECTIONS,
+                                                          retries=throttle.RETRIES))
+        return context, await context.__aenter__()
+
+    context, aio_client = run(create())
+    trace.install(aio_client.meta.events)
+    journal.install(aio_client.meta.events)
+    throttle.install(aio_client.meta.events, asynchronous=True)
+    with _LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = Client(context, aio_client)
+            return _CLIENTS[key]
+    run(context.__aexit__(None, None, None))
+    return _CLIENTS[key]
+
+
+def close():
+    """
+    Close every async client and its connections
+    """
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for each in clients:
+        run(each.context.__aexit__(None, None, None))
+
+
+class Client:
+    """
+    ASYNC CLIENT
+    Callable from any thread like a botocore client: each operation, paginator and waiter
+    is awaited on the shared event loop while the calling thread waits for its result.
+    many and wait_many await a whole batch of requests at once (see boto3_pool.many).
+    """
+    def __init__(self, context, aio_client):
+        self.context = context
+        self.aio_client = aio_client
+        self.meta = aio_client.meta
+
+    def __getattr__(self, operation):
+        method = getattr(self.aio_client, operation)
+        if operation not in self.meta.method_to_api_mapping:
+            return method
+
+        def call(**params):
+            return run(method(**params))
+        return call
+
+    def can_paginate(self, operation):
+        return self.aio_client.can_paginate(operation)
+
+    def get_paginator(self, operation):
+        return Paginator(self.aio_client.get_paginator(operation))
+
+    def get_waiter(self, name):
+        return Waiter(self.aio_client.get_waiter(name))
+
+    def many(self, operation, params_list):
+        """
+        Make one 'operation' request per params in 'params_list', all at once (see gather)
+        """
+        method = getattr(self.aio_client, operation)
+        return gather([functools.partial(method, **params) for params in params_list])
+
+    def wait_many(self, name, params_list):
+        """
+        Run waiter 'name' once per params in 'params_list', all at once (see gather)
+        """
+        waiter = self.aio_client.get_waiter(name)
+        return gather([functools.partial(waiter.wait, **params) for params in params_list])
+
+
+class Paginator:
+    """
+    ASYNC PAGINATOR
+    """
+    def __init__(self, aio_paginator):
+        self.aio_paginator = aio_paginator
+
+    def paginate(self, **params):
+        """
+        Yield each page as it arrives, fetching the next one on the event loop
+        """
+        pages = self.aio_paginator.paginate(**params).__aiter__()
+        while True:
+            try:
+                yield run(pages.__anext__())
+            except StopAsyncIteration:
+                return
+
+
+class Waiter:
+    """
+    ASYNC WAITER
+    """
+    def __init__(self, aio_waiter):
+        self.aio_waiter = aio_waiter
+
+    def wait(self, **params):
+        return run(self.aio_waiter.wait(**params))
@@ -0,0 +1,207 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import time
+import threading
+
+_LOCK = threading.Lock()
+_ENTRIES = {}
+_WATCHED = set()
+_GENERATIONS = {}
+
+# Largest paginated inventory (in records) kept in memory
+_LIMIT = 10000
+
+# Describe operations whose results each EC2 mutation can change
+_EC2_INSTANCES = ('DescribeInstances', 'DescribeNetworkInterfaces', 'DescribeAddresses')
+_EC2_SECURITY_GROUPS = ('DescribeSecurityGroups', 'DescribeSecurityGroupReferences')
+_EC2_LAUNCH_TEMPLATES = ('DescribeLaunchTemplates', 'DescribeLaunchTemplateVersions')
+_EC2_ROUTE_TABLES = ('DescribeRouteTables',)
+_EC2_NETWORK_ACLS = ('DescribeNetworkAcls',)
+_EC2_ADDRESSES = ('DescribeAddresses', 'DescribeNetworkInterfaces')
+_EC2_INTERNET_GATEWAYS = ('DescribeInternetGateways',)
+_MUTATIONS = {
+    'CreateSecurityGroup': _EC2_SECURITY_GROUPS,
+    'DeleteSecurityGroup': _EC2_SECURITY_GROUPS,
+    'AuthorizeSecurityGroupIngress': _EC2_SECURITY_GROUPS,
+    'AuthorizeSecurityGroupEgress': _EC2_SECURITY_GROUPS,
+    'RevokeSecurityGroupIngress': _EC2_SECURITY_GROUPS,
+    'RevokeSecurityGroupEgress': _EC2_SECURITY_GROUPS,
+    'CreateLaunchTemplate': _EC2_LAUNCH_TEMPLATES,
+    'DeleteLaunchTemplate': _EC2_LAUNCH_TEMPLATES,
+    'CreateLaunchTemplateVersion': _EC2_LAUNCH_TEMPLATES,
+    'DeleteLaunchTemplateVersions': _EC2_LAUNCH_TEMPLATES,
+    'RunInstances': _EC2_INSTANCES,
+    'TerminateInstances': _EC2_INSTANCES,
+    'RebootInstances': _EC2_INSTANCES,
+    'StartInstances': _EC2_INSTANCES,
+    'StopInstances': _EC2_INSTANCES,
+    'CreateVolume': ('DescribeVolumes',),
+    'DeleteVolume': ('DescribeVolumes',),
+    'CreateVpc': ('DescribeVpcs', 'DescribeSecurityGroups', 'DescribeNetworkAcls', 'DescribeRouteTables'),
+    'DeleteVpc': ('DescribeVpcs', 'DescribeSecurityGroups', 'DescribeNetworkAcls', 'DescribeRouteTables'),
+    'AssociateVpcCidrBlock': ('DescribeVpcs',),
+    'CreateVpcEndpoint': ('DescribeVpcEndpoints', 'DescribeNetworkInterfaces'),
+    'DeleteVpcEndpoints': ('DescribeVpcEndpoints', 'DescribeNetworkInterfaces'),
+    'CreateVpcPeeringConnection': ('DescribeVpcPeeringConnections',),
+    'DeleteVpcPeeringConnection': ('DescribeVpcPeeringConnections',),
+    'CreateNetworkInterface': ('DescribeNetworkInterfaces',),
+    'DeleteNetworkInterface': ('DescribeNetworkInterfaces',),
+    'CreateSubnet': ('DescribeSubnets',),
+    'DeleteSubnet': ('DescribeSubnets',),
+    'ModifySubnetAttribute': ('DescribeSubnets',),
+    'CreateNatGateway': ('DescribeNatGateways', 'DescribeNetworkInterfaces'),
+    'DeleteNatGateway': ('DescribeNatGateways', 'DescribeNetworkInterfaces'),
+    'CreateRouteTable': _EC2_ROUTE_TABLES,
+    'DeleteRouteTable': _EC2_ROUTE_TABLES,
+    'CreateRoute': _EC2_ROUTE_TABLES,
+    'DeleteRoute': _EC2_ROUTE_TABLES,
+    'AssociateRouteTable': _EC2_ROUTE_TABLES,
+    'DisassociateRouteTable': _EC2_ROUTE_TABLES,
+    'CreateNetworkAcl': _EC2_NETWORK_ACLS,
+    'DeleteNetworkAcl': _EC2_NETWORK_ACLS,
+    'CreateNetworkAclEntry': _EC2_NETWORK_ACLS,
+    'DeleteNetworkAclEntry': _EC2_NETWORK_ACLS,
+    'ReplaceNetworkAclAssociation': _EC2_NETWORK_ACLS,
+    'AllocateAddress': _EC2_ADDRESSES,
+    'AssociateAddress': _EC2_ADDRESSES,
+    'DisassociateAddress': _EC2_ADDRESSES,
+    'ReleaseAddress': _EC2_ADDRESSES,
+    'CreateInternetGateway': _EC2_INTERNET_GATEWAYS,
+    'DeleteInternetGateway': _EC2_INTERNET_GATEWAYS,
+    'AttachInternetGateway': _EC2_INTERNET_GATEWAYS,
+    'DetachInternetGateway': _EC2_INTERNET_GATEWAYS,
+    'AddTags': ('DescribeTags',),
+    'RemoveTags': ('DescribeTags',),
+    'CreateTags': None,
+    'DeleteTags': None,
+}
+
+
+def api(operation):
+    """
+    Api name of a client method name, e.g. describe_subnets is DescribeSubnets
+    """
+    return ''.join(word[:1].upper() + word[1:] for word in operation.split('_'))
+
+
+def key(service, operation, **params):
+    """
+    Cache key of one describe call: (api, filters and other params, region) for this client
+    """
+    return api(operation), repr(sorted(params.items())), service.meta.region_name, id(service)
+
+
+def get(entry):
+    """
+    Cached value for key 'entry' if it has not expired, else None
+    """
+    with _LOCK:
+        if entry in _ENTRIES and _ENTRIES[entry][0] > time.monotonic():
+            return _ENTRIES[entry][1]
+        _ENTRIES.pop(entry, None)
+    return None
+
+
+def generation(operation):
+    """
+    Count of invalidations of 'operation' so far; a describe started before one must not be cached
+    """
+    with _LOCK:
+        return _generation(api(operation))
+
+
+def _generation(name):
+    """
+    Invalidations of api 'name' plus full invalidations, caller holds _LOCK
+    """
+    return _GENERATIONS.get(name, 0) + _GENERATIONS.get(None, 0)
+
+
+def _bump(names):
+    """
+    Record an invalidation of api 'names' (None for all), caller holds _LOCK
+    """
+    for name in ((None,) if names is None else names):
+        _GENERATIONS[name] = _GENERATIONS.get(name, 0) + 1
+
+
+def put(service, entry, value, ttl, since=None):
+    """
+    Cache 'value' under key 'entry' for 'ttl' seconds, unless invalidated since generation 'since'
+    """
+    if ttl and value is not None:
+        watch(service)
+        with _LOCK:
+            if since is None or since == _generation(entry[0]):
+                _ENTRIES[entry] = (time.monotonic() + ttl, value)
+    return value
+
+
+def fetch(service, operation, ttl=0, **params):
+    """
+    Call service.operation(**params) unless the same call was answered less than 'ttl' seconds ago
+    """
+    entry = key(service, operation, **params)
+    cached = get(entry) if ttl else None
+    if cached is not None:
+        return cached
+    since = generation(operation)
+    return put(service, entry, getattr(service, operation)(**params), ttl, since)
+
+
+def remember(service, entry, records, ttl):
+    """
+    Yield each of 'records' and, once all are read, cache them under key 'entry' for 'ttl' seconds.
+    Inventories larger than _LIMIT records are streamed without being cached.
+    """
+    kept = [] if ttl else None
+    since = generation(entry[0])
+    for record in records:
+        if kept is not None:
+            kept.append(record)
+            if len(kept) > _LIMIT:
+                kept = None
+        yield record
+    if kept is not None:
+        put(service, entry, kept, ttl, since)
+
+
+def invalidate(service=None, operations=None):
+    """
+    Forget cached describes of 'operations' (method or api names) made by 'service'.
+    No operations means every cached describe, no service means every client.
+    """
+    names = None if operations is None else set(api(operation) for operation in operations)
+    with _LOCK:
+        _bump(names)
+        for entry in list(_ENTRIES):
+            if (service is None or entry[3] == id(service)) and (names is None or entry[0] in names):
+                del _ENTRIES[entry]
+
+
+def watch(service):
+    """
+    Invalidate precisely whenever 'service' makes a call known to change cached describes
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/events.html
+    """
+    with _LOCK:
+        if id(service) in _WATCHED:
+            return
+        _WATCHED.add(id(service))
+
+    def mutated(model, **kwargs):
+        if model.name in _MUTATIONS:
+            invalidate(service, _MUTATIONS[model.name])
+
+    service.meta.events.register('after-call', mutated, unique_id='boto3-cache-%d' % id(service))
+
+
+def clear():
+    """
+    Drop every cached describe
+    """
+    with _LOCK:
+        _bump(None)
+        _ENTRIES.clear()
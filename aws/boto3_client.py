@@ -2,19 +2,25 @@
 # Copyright 2019 noelmcloughlin
 #############################################
 
-import boto3
 import time
 import base64
-from botocore.exceptions import ClientError
+import hashlib
+from botocore.exceptions import ClientError, WaiterError
 import sys
 import random
 
 try:
     sys.path.append('./aws')
     import aws.boto3_solutions as solutions
+    import aws.boto3_cache as cache
+    import aws.boto3_pool as pool
+    import aws.boto3_wait as wait
 except ImportError:
     sys.path.append('../aws')
     import aws.boto3_solutions as solutions
+    import aws.boto3_cache as cache
+    import aws.boto3_pool as pool
+    import aws.boto3_wait as wait
 
 
 class Compute(solutions.SecureCloudService):
@@ -27,29 +33,72 @@ class Compute(solutions.SecureCloudService):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#instance
         """
         super().__init__(solution)
-        self.client = boto3.client('ec2')
-        self.compute = boto3.resource('ec2')
 
     @staticmethod
-    def create_tag(self, resource):
+    def tag_specs(self, resource_type):
         """
-        Adds or overwrite tag
+        Tag at create time so no extra create_tags call is needed
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.create_tags
         """
-        try:
-            print('Create tag %s = %s for %s %s' % (self.name, self.tag, resource,  ('(dry)' if self.dry else '')))
-            self.client.create_tags(Resources=(resource,), Tags=[{'Key': self.name, 'Value': self.tag}],
-                                    DryRun=self.dry)
-        except ClientError as err:
-            solutions.Solution.handle(err)
-        except Exception as err:
-            Compute.fatal(err)
+        return [{'ResourceType': resource_type, 'Tags': [{'Key': self.name, 'Value': self.tag}]}]
+
+    @staticmethod
+    def client_token(self, resource_type, zone=None, ordinal=0):
+        """
+        Idempotency token of the 'ordinal' create of 'resource_type' in 'zone' in this solution's VPC.
+        Equal inputs always give the same token, so retried, resumed or parallel duplicates of one create
+        are deduplicated by EC2, while the next VPC (after a clean) gets new tokens.
+        https://docs.aws.amazon.com/AWSEC2/latest/APIReference/Run_Instance_Idempotency.html
+        """
+        key = (self.region, self.name, self.tag, self.vpc_id, resource_type, zone, ordinal)
+        return hashlib.sha256(':'.join(str(part) for part in key).encode()).hexdigest()[:63]
+
+
+def paginate(service, operation, key, page_size=None, ttl=0, **params):
+    """
+    Yield the 'key' records of every page of a paginated describe/list operation.
+    Pages are fetched lazily so only one page is held in memory at a time, unless
+    the inventory was read in full less than 'ttl' seconds ago and is still cached.
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/paginators.html
+    """
+    try:
+        entry = cache.key(service, operation, PageSize=page_size, **params)
+        cached = cache.get(entry) if ttl else None
+        if cached is not None:
+            for record in cached:
+                yield record
+            return
+        config = {'PageSize': page_size} if page_size else {}
+        pages = service.get_paginator(operation).paginate(PaginationConfig=config, **params)
+        for record in cache.remember(service, entry, (record for page in pages for record in page.get(key, ())), ttl):
+            yield record
+    except ClientError as err:
+        solutions.Solution.handle(err)
+    except Exception as err:
+        solutions.Solution.fatal(err)
+
+
+def responses(results, handler=solutions.Solution):
+    """
+    Hand each exception among 'results' (see boto3_pool.many) to 'handler' as a single call would:
+    a ClientError to handler.handle, anything else to handler.fatal
+    :return: results, with None in place of each exception
+    """
+    found = []
+    for result in results:
+        if isinstance(result, ClientError):
+            handler.handle(result)
+        elif isinstance(result, BaseException):
+            handler.fatal(result)
+        found.append(None if isinstance(result, BaseException) else result)
+    return found
 
 
 # ***************************************** #
 # ************** SECURITY ***************** #
 # ***************************************** #
 
+
 class SecurityGroup(Compute):
     """
     SECURITY GROUPS
@@ -66,8 +115,8 @@ class SecurityGroup(Compute):
                 description = self.tag
             print('Create security group %s' % ('(dry)' if self.dry else ''))
             self.response = self.client.create_security_group(Description=description, GroupName=self.name,
-                                                              VpcId=self.vpc_id, DryRun=self.dry)
-            self.create_tag(self, self.response['GroupId'])
+                                                              VpcId=self.vpc_id, DryRun=self.dry,
+                                                              TagSpecifications=self.tag_specs(self, 'security-group'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -95,13 +144,13 @@ class SecurityGroup(Compute):
         """
         try:
             if name and value:
-                return self.client.describe_security_groups(Filters=[{'Name': name, 'Values': (value,)},
-                                                                     {'Name': 'vpc-id', 'Values': (self.vpc_id,)}],
-                                                            DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_security_groups', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)},
+                                            {'Name': 'vpc-id', 'Values': (self.vpc_id,)}],
+                                   DryRun=self.dry)
             else:
-                return self.client.describe_security_groups(Filters=[{'Name': 'tag:' + self.name,
-                                                                      'Values': [self.tag]}],
-                                                            DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_security_groups', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': [self.tag]}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -182,6 +231,48 @@ class SecurityGroup(Compute):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def authorize(self, rules):
+        """
+        Adds every rule of a SecurityGroupRules set with one ingress and one egress call.
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.authorize_security_group_ingress
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.authorize_security_group_egress
+        """
+        try:
+            if rules.ingress:
+                print('Authorize sg ingress %s %s' % (self.sg_id, ('(dry)' if self.dry else '')))
+                self.client.authorize_security_group_ingress(IpPermissions=rules.ingress, GroupId=self.sg_id,
+                                                             DryRun=self.dry)
+            if rules.egress:
+                print('Authorize sg egress %s %s' % (self.sg_id, ('(dry)' if self.dry else '')))
+                self.client.authorize_security_group_egress(IpPermissions=rules.egress, GroupId=self.sg_id,
+                                                            DryRun=self.dry)
+        except ClientError as err:
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+
+    @staticmethod
+    def revoke(self, rules):
+        """
+        Removes every rule of a SecurityGroupRules set with one ingress and one egress call.
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.revoke_security_group_ingress
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.revoke_security_group_egress
+        """
+        try:
+            if rules.ingress:
+                print('Revoke sg ingress from %s %s' % (self.sg_id, ('(dry)' if self.dry else '')))
+                self.client.revoke_security_group_ingress(IpPermissions=rules.ingress, GroupId=self.sg_id,
+                                                          DryRun=self.dry)
+            if rules.egress:
+                print('Revoke sg egress %s %s' % (self.sg_id, ('(dry)' if self.dry else '')))
+                self.client.revoke_security_group_egress(IpPermissions=rules.egress, GroupId=self.sg_id,
+                                                         DryRun=self.dry)
+        except ClientError as err:
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+
     @staticmethod
     def revoke_egress(self, f_port, t_port, proto, ip4=None, ip6=None):
         """
@@ -235,6 +326,85 @@ class SecurityGroup(Compute):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream Security Groups page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeSecurityGroups
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}, {'Name': 'vpc-id', 'Values': (self.vpc_id,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_security_groups', 'SecurityGroups', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
+
+class SecurityGroupRules:
+    """
+    SECURITY GROUP RULE SET
+    Collects ip permissions so each direction is applied with one api call
+    """
+
+    def __init__(self):
+        """
+        Initialize empty ingress and egress permission lists
+        """
+        self.ingress = []
+        self.egress = []
+
+    def add(self, f_port, t_port, proto, ip4=None, ip6=None, egress=False):
+        """
+        Add one permission for a port range and its ip4/ip6 cidr ranges
+        """
+        permission = {'FromPort': f_port, 'ToPort': t_port, 'IpProtocol': proto}
+        if ip4:
+            permission['IpRanges'] = ip4
+        if ip6:
+            permission['Ipv6Ranges'] = ip6
+        (self.egress if egress else self.ingress).append(permission)
+        return self
+
+    def load(self, group):
+        """
+        Add the cidr based port permissions of a described security group
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_security_groups
+        """
+        for key, egress in (('IpPermissions', False), ('IpPermissionsEgress', True)):
+            for perm in group.get(key, ()):
+                if 'FromPort' in perm:
+                    ip4 = [{'CidrIp': c['CidrIp']} for c in perm.get('IpRanges', ()) if 'CidrIp' in c]
+                    ip6 = [{'CidrIpv6': c['CidrIpv6']} for c in perm.get('Ipv6Ranges', ()) if 'CidrIpv6' in c]
+                    if ip4 or ip6:
+                        self.add(perm['FromPort'], perm['ToPort'], perm['IpProtocol'], ip4, ip6, egress)
+        return self
+
+    def permissions(self):
+        """
+        Every (egress, from port, to port, protocol, cidr key, cidr) granted by this rule set
+        """
+        granted = set()
+        for egress, perms in ((False, self.ingress), (True, self.egress)):
+            for perm in perms:
+                for ranges, key in (('IpRanges', 'CidrIp'), ('Ipv6Ranges', 'CidrIpv6')):
+                    for item in perm.get(ranges, ()):
+                        granted.add((egress, perm['FromPort'], perm['ToPort'], perm['IpProtocol'].lower(), key,
+                                     item[key]))
+        return granted
+
+    def missing(self, existing):
+        """
+        Rules of this set not yet granted by the 'existing' rule set
+        """
+        rules = SecurityGroupRules()
+        for egress, f_port, t_port, proto, key, cidr in sorted(self.permissions() - existing.permissions()):
+            if key == 'CidrIp':
+                rules.add(f_port, t_port, proto, ip4=[{key: cidr}], egress=egress)
+            else:
+                rules.add(f_port, t_port, proto, ip6=[{key: cidr}], egress=egress)
+        return rules
+
+
 # ***************************************** #
 # ***************** VPC ******************* #
 # ***************************************** #
@@ -266,10 +436,12 @@ class LaunchTemplate(Compute):
 
         try:
             print('Create launch_template %s' % ('(dry)' if self.dry else ''))
-            self.response = self.client.create_launch_template(LaunchTemplateName=self.name, ClientToken=self.token,
+            self.response = self.client.create_launch_template(LaunchTemplateName=self.name,
+                                                               ClientToken=self.client_token(self, 'launch-template'),
                                                                VersionDescription=self.tag, DryRun=self.dry,
-                                                               LaunchTemplateData=self.template_data)
-            self.create_tag(self, self.response['LaunchTemplate']['LaunchTemplateId'])
+                                                               LaunchTemplateData=self.template_data,
+                                                               TagSpecifications=self.tag_specs(self,
+                                                                                                'launch-template'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -346,22 +518,32 @@ class LaunchTemplate(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_launch_templates
         """
         try:
-            return self.client.describe_launch_templates(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                         DryRun=self.dry)
+            return cache.fetch(self.client, 'describe_launch_templates', self.cache_ttl,
+                               Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream EC2 launch_templates page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeLaunchTemplates
+        """
+        return paginate(self.client, 'describe_launch_templates', 'LaunchTemplates', self.page_size, self.cache_ttl,
+                        Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
+
 
 class Instance(Compute):
     """
     INSTANCE
     """
 
-    def __init__(self, solution=None, template_id=None, subnet_id=None, zone=None):
+    def __init__(self, solution=None, template_id=None, subnet_id=None, zone=None, ordinal=0):
         """
         Initialize and Create Instance from Launch Template
+        'ordinal' tells apart successive launches in one zone (see Compute.client_token)
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.ServiceResource.create_instances
         """
         super().__init__(solution)
@@ -373,8 +555,9 @@ class Instance(Compute):
                                                           SubnetId=self.subnet_id, SecurityGroupIds=self.sg_ids,
                                                           MaxCount=self.max_count, MinCount=self.min_count,
                                                           Placement={'AvailabilityZone': self.zone},
-                                                          ClientToken=self.token)
-            self.create_tag(self, self.response[0].id)
+                                                          TagSpecifications=self.tag_specs(self, 'instance'),
+                                                          ClientToken=self.client_token(self, 'instance', self.zone,
+                                                                                        ordinal))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -397,6 +580,63 @@ class Instance(Compute):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def wait_running(self, instance_ids):
+        """
+        Wait on many ec2 instances with one waiter until all are running
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Waiter.InstanceRunning
+        :return: True once all are running
+        """
+        try:
+            print('Wait until %d instances are running ...' % len(instance_ids))
+            attempts = max(1, self.wait_deadline // 5)
+            self.client.get_waiter('instance_running').wait(InstanceIds=instance_ids,
+                                                            WaiterConfig={'Delay': 5, 'MaxAttempts': attempts})
+            return True
+        except WaiterError as err:
+            print('Failed waiting for instances (%s)' % err)
+        except ClientError as err:
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+        return False
+
+    @staticmethod
+    def terminate(self, instance_ids):
+        """
+        Terminate many ec2 instances in one call then wait on the whole set with one waiter
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.terminate_instances
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Waiter.InstanceTerminated
+        """
+        states = dict((instance_id, None) for instance_id in instance_ids)
+
+        def progress(parsed, **kwargs):
+            for reservation in parsed.get('Reservations', ()):
+                for instance in reservation['Instances']:
+                    if instance['InstanceId'] in states and states[instance['InstanceId']] != instance['State']['Name']:
+                        states[instance['InstanceId']] = instance['State']['Name']
+                        print('Instance %s %s' % (instance['InstanceId'], instance['State']['Name']))
+
+        event = 'after-call.ec2.DescribeInstances'
+        unique_id = 'terminate-%d' % id(states)
+        try:
+            print('Delete instances %s %s' % (' '.join(instance_ids), ('(dry)' if self.dry else '')))
+            response = self.client.terminate_instances(InstanceIds=instance_ids, DryRun=self.dry)
+            self.client.meta.events.register(event, progress, unique_id=unique_id)
+            attempts = max(1, self.wait_deadline // 5)
+            self.client.get_waiter('instance_terminated').wait(InstanceIds=instance_ids,
+                                                               WaiterConfig={'Delay': 5, 'MaxAttempts': attempts})
+            print('Terminated %d instances' % len(instance_ids))
+            return response
+        except WaiterError as err:
+            print('Failed waiting for termination (%s)' % err)
+        except ClientError as err:
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+        finally:
+            self.client.meta.events.unregister(event, unique_id=unique_id)
+
     @staticmethod
     def reboot(self):
         """
@@ -417,22 +657,46 @@ class Instance(Compute):
             Compute.fatal(err)
 
     @staticmethod
-    def list(self):
+    def list(self, name=None, value=None):
         """
         Get EC2 instances by searching for stuff
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_instances
         """
         states = ('pending', 'running', 'shutting-down', 'stopping', 'stopped')
         try:
-            self.response = self.client.describe_instances(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)},
-                                                                    {'Name': 'instance-state-name', 'Values': states}],
-                                                           DryRun=self.dry)
+            if name and value:
+                self.response = cache.fetch(self.client, 'describe_instances', self.cache_ttl,
+                                            Filters=[{'Name': name, 'Values': (value,)},
+                                                     {'Name': 'instance-state-name', 'Values': states}],
+                                            DryRun=self.dry)
+            else:
+                self.response = cache.fetch(self.client, 'describe_instances', self.cache_ttl,
+                                            Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)},
+                                                     {'Name': 'instance-state-name', 'Values': states}],
+                                            DryRun=self.dry)
             return self.response
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream EC2 instances page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeInstances
+        """
+        states = ('pending', 'running', 'shutting-down', 'stopping', 'stopped')
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}, {'Name': 'instance-state-name', 'Values': states}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)},
+                       {'Name': 'instance-state-name', 'Values': states}]
+        for reservation in paginate(self.client, 'describe_instances', 'Reservations', self.page_size, self.cache_ttl,
+                                    Filters=filters, DryRun=self.dry):
+            for instance in reservation['Instances']:
+                yield instance
+
 
 class Volume(Compute):
     """
@@ -451,7 +715,6 @@ class Volume(Compute):
             self.response = self.client.create_volume(AvailabilityZone=zone, TagSpecifications=tag_specifications,
                                                       Size=size, Encrypted=encrypted, VolumeType=volume_type,
                                                       DryRun=self.dry)
-            self.create_tag(self, self.response['VolumeId'])
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -478,13 +741,22 @@ class Volume(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_volumes
         """
         try:
-            return self.client.describe_volumes(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                DryRun=self.dry)
+            return cache.fetch(self.client, 'describe_volumes', self.cache_ttl,
+                               Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream Volumes page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeVolumes
+        """
+        return paginate(self.client, 'describe_volumes', 'Volumes', self.page_size, self.cache_ttl,
+                        Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
+
 
 class Vpc(Compute):
     """
@@ -500,8 +772,8 @@ class Vpc(Compute):
             print('%s %s' % ('Create VPC', self.name) if not self.dry else '(dry)')
             self.response = self.client.create_vpc(CidrBlock=self.cidr4_vpc[0], DryRun=self.dry,
                                                    InstanceTenancy=self.tenancy,
-                                                   AmazonProvidedIpv6CidrBlock=self.auto_ip6)
-            self.create_tag(self, self.response['Vpc']['VpcId'])
+                                                   AmazonProvidedIpv6CidrBlock=self.auto_ip6,
+                                                   TagSpecifications=self.tag_specs(self, 'vpc'))
         except ClientError as err:
             solutions.Solution.handle(err, 'vpc')
         except Exception as err:
@@ -514,6 +786,9 @@ class Vpc(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.delete_vpc
         """
         try:
+            if not self.dry and not wait.until(lambda: NetworkInterface.drained(self, self.vpc_id), self.wait_deadline):
+                print('Timed out waiting for network interfaces in %s, not deleting it' % self.vpc_id)
+                return None
             print('Delete %s %s' % (self.vpc_id, ('(dry)' if self.dry else '')))
             return self.client.delete_vpc(VpcId=self.vpc_id, DryRun=self.dry)
         except ClientError as err:
@@ -542,13 +817,22 @@ class Vpc(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_vpcs
         """
         try:
-            return self.client.describe_vpcs(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                             DryRun=self.dry)
+            return cache.fetch(self.client, 'describe_vpcs', self.cache_ttl,
+                               Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
-    
+
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream VPC(s) page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeVpcs
+        """
+        return paginate(self.client, 'describe_vpcs', 'Vpcs', self.page_size, self.cache_ttl,
+                        Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
+
 
 class VpcEndpoint(Compute):
     """
@@ -567,8 +851,10 @@ class VpcEndpoint(Compute):
             self.response = self.client.create_vpc_endpoint(VpcEndpointType=endpoint_type, VpcId=self.vpc_id,
                                                             ServiceName=self.name, RouteTableIds=self.rtt_ids,
                                                             SubnetIds=self.subnet_ids, SecurityGroupIds=self.sg_ids,
-                                                            ClientToken=self.token, DryRun=self.dry)
-            self.create_tag(self, self.response['VpcEndpoint']['VpcEndpointId'])
+                                                            ClientToken=self.client_token(self, 'vpc-endpoint',
+                                                                                          ordinal=self.service),
+                                                            DryRun=self.dry,
+                                                            TagSpecifications=self.tag_specs(self, 'vpc-endpoint'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -596,16 +882,30 @@ class VpcEndpoint(Compute):
         """
         try:
             if name and value:
-                return self.client.describe_vpc_endpoints(Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_vpc_endpoints', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
             else:
-                return self.client.describe_vpc_endpoints(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                          DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_vpc_endpoints', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
-    
-    
+
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream VPC endpoints page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeVpcEndpoints
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_vpc_endpoints', 'VpcEndpoints', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
+
 class VpcPeeringConnection(Compute):
     """
     VPC PEERING CONNECTION
@@ -620,8 +920,9 @@ class VpcPeeringConnection(Compute):
         try:
             print('Create vpc_peering_connection  %s' % ('(dry)' if self.dry else ''))
             self.response = self.client.create_vpc_peering_connection(VpcId=self.vpc_id, PeerVpcId=self.peer_vpc_id,
-                                                                      PeerRegion=self.peer_region, DryRun=self.dry)
-            self.create_tag(self, self.response['VpcPeeringConnection']['VpcPeeringConnectionId'])
+                                                                      PeerRegion=self.peer_region, DryRun=self.dry,
+                                                                      TagSpecifications=self.tag_specs(
+                                                                          self, 'vpc-peering-connection'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -649,14 +950,23 @@ class VpcPeeringConnection(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_vpc_peering_connections
         """
         try:
-            return self.client.describe_vpc_peering_connections(Filters=[{'Name': 'tag:' + self.name,
-                                                                          'Values': (self.tag,)}], DryRun=self.dry)
+            return cache.fetch(self.client, 'describe_vpc_peering_connections', self.cache_ttl,
+                               Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
-    
-    
+
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream VPC peering_connections page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeVpcPeeringConnections
+        """
+        return paginate(self.client, 'describe_vpc_peering_connections', 'VpcPeeringConnections', self.page_size,
+                        self.cache_ttl, Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
+
+
 class NetworkInterface(Compute):
     """
     NETWORK INTERFACE
@@ -672,8 +982,9 @@ class NetworkInterface(Compute):
             print('Create network_interface for %s %s' % (private_ip, ('(dry)' if self.dry else '')))
             self.response = self.client.create_network_interface(Description=self.tag, Groups=self.sg_ids,
                                                                  SubnetId=self.subnet_id, PrivateIpAddress=private_ip,
-                                                                 PrivateIpAddresses=self.private_ips, DryRun=self.dry)
-            self.create_tag(self, self.response['NetworkInterface']['NetworkInterfaceId'])
+                                                                 PrivateIpAddresses=self.private_ips, DryRun=self.dry,
+                                                                 TagSpecifications=self.tag_specs(self,
+                                                                                                  'network-interface'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -686,7 +997,11 @@ class NetworkInterface(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.delete_network_interface
         """
         try:
-            print('Delete %s %s' % (id, ('(dry)' if self.dry else '')))
+            if not self.dry and not wait.until(lambda: NetworkInterface.available(self, interface_id),
+                                               self.wait_deadline):
+                print('Timed out waiting for network interface %s to be available, not deleting it' % interface_id)
+                return None
+            print('Delete %s %s' % (interface_id, ('(dry)' if self.dry else '')))
             return self.client.delete_network_interface(NetworkInterfaceId=interface_id, DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
@@ -694,19 +1009,68 @@ class NetworkInterface(Compute):
             Compute.fatal(err)
 
     @staticmethod
-    def list(self):
+    def available(self, interface_id):
+        """
+        Ready check: network interface is detached (or already gone)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_network_interfaces
+        """
+        try:
+            response = self.client.describe_network_interfaces(NetworkInterfaceIds=(interface_id,))
+            return all(item['Status'] == 'available' for item in response['NetworkInterfaces'])
+        except ClientError as err:
+            if 'NotFound' in str(err):
+                return True
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+
+    @staticmethod
+    def drained(self, vpc_id, public_only=False):
+        """
+        Ready check: no network interfaces (or none with a public ip) left in vpc_id
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_network_interfaces
+        """
+        try:
+            response = self.client.describe_network_interfaces(Filters=[{'Name': 'vpc-id', 'Values': (vpc_id,)}])
+            if public_only:
+                return not [item for item in response['NetworkInterfaces'] if 'Association' in item]
+            return not response['NetworkInterfaces']
+        except ClientError as err:
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+
+    @staticmethod
+    def list(self, name=None, value=None):
         """
         Get Network interfaces by tag name/value or maybe by array of ids.
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_network_interfaces
         """
         try:
-            return self.client.describe_network_interfaces(Filters=[{'Name': self.name, 'Values': (self.tag,)}],
-                                                           DryRun=self.dry)
+            if name and value:
+                return cache.fetch(self.client, 'describe_network_interfaces', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
+            else:
+                return cache.fetch(self.client, 'describe_network_interfaces', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream Network interfaces page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeNetworkInterfaces
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_network_interfaces', 'NetworkInterfaces', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
 
 class Subnet(Compute):
     """
@@ -722,8 +1086,7 @@ class Subnet(Compute):
         try:
             print('Create subnet for %s %s' % (cidr_block, ('(dry)' if self.dry else '')))
             self.response = self.client.create_subnet(AvailabilityZone=zone, CidrBlock=cidr_block, VpcId=self.vpc_id,
-                                                      DryRun=self.dry)
-            self.create_tag(self, self.response['Subnet']['SubnetId'])
+                                                      DryRun=self.dry, TagSpecifications=self.tag_specs(self, 'subnet'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -766,16 +1129,29 @@ class Subnet(Compute):
         """
         try:
             if name and value:
-                return self.client.describe_subnets(Filters=[{'Name': name, 'Values': (value,)}],
-                                                    DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_subnets', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
             else:
-                return self.client.describe_subnets(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                    DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_subnets', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
-    
+
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream subnets page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeSubnets
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_subnets', 'Subnets', self.page_size, self.cache_ttl, Filters=filters,
+                        DryRun=self.dry)
+
 
 class NatGateway(Compute):
     """
@@ -790,9 +1166,11 @@ class NatGateway(Compute):
         super().__init__(solution)
         try:
             print('Create nat gateway for subnet %s %s' % (self.subnet_id, ('(dry)' if self.dry else '')))
-            self.response = self.client.create_nat_gateway(ClientToken=self.token, AllocationId=self.eip_id,
-                                                           SubnetId=self.subnet_id, DryRun=self.dry)
-            self.create_tag(self, self.response['NatGateway']['NatGatewayId'])
+            self.response = self.client.create_nat_gateway(ClientToken=self.client_token(self, 'natgateway',
+                                                                                         ordinal=self.subnet_id),
+                                                           AllocationId=self.eip_id,
+                                                           SubnetId=self.subnet_id, DryRun=self.dry,
+                                                           TagSpecifications=self.tag_specs(self, 'natgateway'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -813,19 +1191,40 @@ class NatGateway(Compute):
             Compute.fatal(err)
 
     @staticmethod
-    def list(self):
+    def list(self, name=None, value=None):
         """
         Get nat gateways by searching for vpc
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_nat_gateways
         """
         try:
-            if not self.dry:
-                return self.client.describe_nat_gateways(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}])
+            if self.dry:
+                return None
+            elif name and value:
+                return cache.fetch(self.client, 'describe_nat_gateways', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}])
+            else:
+                return cache.fetch(self.client, 'describe_nat_gateways', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}])
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream nat gateways page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeNatGateways
+        """
+        if self.dry:
+            return iter(())
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_nat_gateways', 'NatGateways', self.page_size, self.cache_ttl,
+                        Filters=filters)
+
 
 class RouteTable(Compute):
     """
@@ -840,8 +1239,8 @@ class RouteTable(Compute):
         super().__init__(solution)
         try:
             print('Create route table for %s %s' % (self.vpc_id, ('(dry)' if self.dry else '')))
-            self.response = self.client.create_route_table(VpcId=self.vpc_id, DryRun=self.dry)
-            self.create_tag(self, self.response['RouteTable']['RouteTableId'])
+            self.response = self.client.create_route_table(VpcId=self.vpc_id, DryRun=self.dry,
+                                                           TagSpecifications=self.tag_specs(self, 'route-table'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -930,15 +1329,29 @@ class RouteTable(Compute):
         """
         try:
             if name and value:
-                return self.client.describe_route_tables(Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_route_tables', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
             else:
-                return self.client.describe_route_tables(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                         DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_route_tables', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream route tables page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeRouteTables
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_route_tables', 'RouteTables', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
 
 class NetworkAcl(Compute):
     """
@@ -953,8 +1366,8 @@ class NetworkAcl(Compute):
         super().__init__(solution)
         try:
             print('Create network acl for %s %s' % (self.vpc_id, ('(dry)' if self.dry else '')))
-            self.response = self.client.create_network_acl(VpcId=self.vpc_id, DryRun=self.dry)
-            self.create_tag(self, self.response['NetworkAcl']['NetworkAclId'])
+            self.response = self.client.create_network_acl(VpcId=self.vpc_id, DryRun=self.dry,
+                                                           TagSpecifications=self.tag_specs(self, 'network-acl'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -1028,19 +1441,36 @@ class NetworkAcl(Compute):
             Compute.fatal(err)
 
     @staticmethod
-    def list(self):
+    def list(self, name=None, value=None):
         """
         Get network acls by searching for stuff
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_network_acls
         """
         try:
-            return self.client.describe_network_acls(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                     DryRun=self.dry)
+            if name and value:
+                return cache.fetch(self.client, 'describe_network_acls', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
+            else:
+                return cache.fetch(self.client, 'describe_network_acls', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream network acls page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeNetworkAcls
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_network_acls', 'NetworkAcls', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
 
 class ElasticIp(Compute):
     """
@@ -1054,8 +1484,8 @@ class ElasticIp(Compute):
         """
         super().__init__(solution)
         try:
-            self.response = self.client.allocate_address(Domain=domain, DryRun=self.dry)
-            self.create_tag(self, self.response['AllocationId'])
+            self.response = self.client.allocate_address(Domain=domain, DryRun=self.dry,
+                                                         TagSpecifications=self.tag_specs(self, 'elastic-ip'))
             print('Created elastic ip %s for %s %s' % (self.response['AllocationId'], domain,
                                                        ('(dry)' if self.dry else '')))
         except ClientError as err:
@@ -1112,14 +1542,23 @@ class ElasticIp(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_addresses
         """
         try:
-            return self.client.describe_addresses(Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}],
-                                                  DryRun=self.dry)
+            return cache.fetch(self.client, 'describe_addresses', self.cache_ttl,
+                               Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
-    
-    
+
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream Elastic IPs (describe_addresses is not paginated so this walks the single response)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_addresses
+        """
+        inventory = ElasticIp.list(self)
+        return iter(inventory['Addresses'] if inventory and 'Addresses' in inventory else ())
+
+
 class InternetGateway(Compute):
     """
     INTERNET GATEWAY
@@ -1133,8 +1572,9 @@ class InternetGateway(Compute):
         super().__init__(solution)
         try:
             print('Create internet gateway %s' % ('(dry)' if self.dry else ''))
-            self.response = self.client.create_internet_gateway(DryRun=self.dry)
-            self.create_tag(self, self.response['InternetGateway']['InternetGatewayId'])
+            self.response = self.client.create_internet_gateway(DryRun=self.dry,
+                                                                TagSpecifications=self.tag_specs(self,
+                                                                                                 'internet-gateway'))
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
@@ -1147,6 +1587,9 @@ class InternetGateway(Compute):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.delete_internet_gateway
         """
         try:
+            if not self.dry and not wait.until(lambda: InternetGateway.detached(self, igw_id), self.wait_deadline):
+                print('Timed out waiting for internet gateway %s to detach, not deleting it' % igw_id)
+                return None
             print('Delete internet gateway %s %s' % (igw_id, ('(dry)' if self.dry else '')))
             return self.client.delete_internet_gateway(InternetGatewayId=igw_id, DryRun=self.dry)
         except ClientError as err:
@@ -1162,16 +1605,29 @@ class InternetGateway(Compute):
         """
         try:
             if name and value:
-                return self.client.describe_internet_gateways(Filters=[{'Name': name, 'Values': (value,)}],
-                                                              DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_internet_gateways', self.cache_ttl,
+                                   Filters=[{'Name': name, 'Values': (value,)}], DryRun=self.dry)
             else:
-                return self.client.describe_internet_gateways(Filters=[{'Name': 'tag:' + self.name,
-                                                                        'Values': (self.tag,)}], DryRun=self.dry)
+                return cache.fetch(self.client, 'describe_internet_gateways', self.cache_ttl,
+                                   Filters=[{'Name': 'tag:' + self.name, 'Values': (self.tag,)}], DryRun=self.dry)
         except ClientError as err:
             solutions.Solution.handle(err)
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None, value=None):
+        """
+        Stream internet gateways page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Paginator.DescribeInternetGateways
+        """
+        if name and value:
+            filters = [{'Name': name, 'Values': (value,)}]
+        else:
+            filters = [{'Name': 'tag:' + self.name, 'Values': (self.tag,)}]
+        return paginate(self.client, 'describe_internet_gateways', 'InternetGateways', self.page_size, self.cache_ttl,
+                        Filters=filters, DryRun=self.dry)
+
     @staticmethod
     def attach(self):
         """
@@ -1190,10 +1646,14 @@ class InternetGateway(Compute):
     @staticmethod
     def detach(self, igw_id, vpc_id):
         """
-        Attaches an internet gateway to a VPC
+        Detaches an internet gateway from a VPC once no public ips are mapped in it
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.detach_internet_gateway
         """
         try:
+            if not self.dry and not wait.until(lambda: NetworkInterface.drained(self, vpc_id, True),
+                                               self.wait_deadline):
+                print('Timed out waiting for network interfaces in %s, not detaching %s' % (vpc_id, igw_id))
+                return None
             print('Detach %s from %s %s' % (igw_id, vpc_id, ('(dry)' if self.dry else '')))
             return self.client.detach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id, DryRun=self.dry)
         except ClientError as err:
@@ -1201,11 +1661,29 @@ class InternetGateway(Compute):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def detached(self, igw_id):
+        """
+        Ready check: internet gateway has no attachment left (or is already gone)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_internet_gateways
+        """
+        try:
+            response = self.client.describe_internet_gateways(InternetGatewayIds=(igw_id,))
+            return all(attachment['State'] == 'detached' for item in response['InternetGateways']
+                       for attachment in item['Attachments'])
+        except ClientError as err:
+            if 'NotFound' in str(err):
+                return True
+            solutions.Solution.handle(err)
+        except Exception as err:
+            Compute.fatal(err)
+
 
 # ********************************************************* #
 # *********** ELASTIC LOAD BALANCING (ELB) **************** #
 # ********************************************************* #
 
+
 class ElasticLoadBalancing(solutions.ScalableCloudService):
     """
     ELASTIC LOAD BALANCING v2
@@ -1217,7 +1695,14 @@ class ElasticLoadBalancing(solutions.ScalableCloudService):
         Initialise data for ElasticLoadBalancing
         """
         super().__init__(solution)
-        self.elb = boto3.client('elbv2')
+
+    @staticmethod
+    def tags(self):
+        """
+        Tag at create time so no extra add_tags call is needed
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.add_tags
+        """
+        return [{'Key': self.name, 'Value': self.tag}]
 
     @staticmethod
     def create_tags(self, arn):
@@ -1259,6 +1744,31 @@ class ElasticLoadBalancing(solutions.ScalableCloudService):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def describe_tags(self, arns):
+        """
+        Get the Tags of ELB resources 'arns', as {arn: {key: value}}. One call describes at most
+        20 resources, so they are described in batches of 20, all batches at once (boto3_pool.many).
+        Tags described less than self.cache_ttl seconds ago are not described again.
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.describe_tags
+        """
+        found, missing = {}, []
+        for arn in arns:
+            tags = cache.get(cache.key(self.elb, 'describe_tags', ResourceArn=arn)) if self.cache_ttl else None
+            if tags is None:
+                missing.append(arn)
+            else:
+                found[arn] = tags
+        since = cache.generation('describe_tags')
+        batches = [{'ResourceArns': missing[i:i + 20]} for i in range(0, len(missing), 20)]
+        for response in responses(pool.many(self.elb, 'describe_tags', batches, self.workers), ElasticLoadBalancing):
+            for each in (response or {}).get('TagDescriptions', ()):
+                found[each['ResourceArn']] = cache.put(self.elb, cache.key(self.elb, 'describe_tags',
+                                                                           ResourceArn=each['ResourceArn']),
+                                                       dict((tag['Key'], tag['Value']) for tag in each['Tags']),
+                                                       self.cache_ttl, since)
+        return found
+
 
 class LoadBalancer(ElasticLoadBalancing):
     """
@@ -1274,7 +1784,7 @@ class LoadBalancer(ElasticLoadBalancing):
         super().__init__(solution)
         try:
             print('Create Elastic Load Balancer: %s' % self.name)
-            self.response = self.elb.create_load_balancer(Name=self.name, Tags=[{'Key': self.tag, 'Value': self.tag}],
+            self.response = self.elb.create_load_balancer(Name=self.name, Tags=ElasticLoadBalancing.tags(self),
                                                           IpAddressType=self.ip_version, Type=self.lb_type,
                                                           Scheme=self.scheme, SecurityGroups=self.sg_ids,
                                                           Subnets=self.subnet_ids)
@@ -1297,6 +1807,59 @@ class LoadBalancer(ElasticLoadBalancing):
         except Exception as err:
             ElasticLoadBalancing.fatal(err)
 
+    @staticmethod
+    def delete_many(self, arns):
+        """
+        Delete every Elastic Load Balancer in 'arns' at once (boto3_pool.many)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.delete_load_balancer
+        """
+        for arn in arns:
+            print('Delete Elastic Load Balancer %s' % arn)
+        responses(pool.many(self.elb, 'delete_load_balancer', [{'LoadBalancerArn': arn} for arn in arns],
+                            self.workers), ElasticLoadBalancing)
+
+    @staticmethod
+    def wait_available(self):
+        """
+        Wait until load balancer self.lb_arn is active, describing only it every self.lb_wait_delay
+        seconds for up to self.wait_deadline seconds
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Waiter.LoadBalancerAvailable
+        :return: True once active
+        """
+        try:
+            print('Wait until %s is active ...' % self.lb_arn)
+            attempts = max(1, self.wait_deadline // self.lb_wait_delay)
+            self.elb.get_waiter('load_balancer_available').wait(LoadBalancerArns=(self.lb_arn,),
+                                                                WaiterConfig={'Delay': self.lb_wait_delay,
+                                                                              'MaxAttempts': attempts})
+            print('Elastic Load Balancer %s active' % self.lb_arn)
+            return True
+        except WaiterError as err:
+            print('Failed waiting for Elastic Load Balancer (%s)' % err)
+        except ClientError as err:
+            ElasticLoadBalancing.handle(err)
+        except Exception as err:
+            ElasticLoadBalancing.fatal(err)
+        return False
+
+    @staticmethod
+    def wait_deleted(self, arns):
+        """
+        Wait until every load balancer in 'arns' is deleted, all at once (boto3_pool.wait_many), each
+        describing only itself every self.lb_wait_delay seconds for up to self.wait_deadline seconds
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Waiter.LoadBalancersDeleted
+        :return: True once all are gone
+        """
+        config = {'Delay': self.lb_wait_delay, 'MaxAttempts': max(1, self.wait_deadline // self.lb_wait_delay)}
+        results = pool.wait_many(self.elb, 'load_balancers_deleted', [{'LoadBalancerArns': (arn,),
+                                                                        'WaiterConfig': config} for arn in arns],
+                                 self.workers)
+        for arn, result in zip(arns, results):
+            if isinstance(result, WaiterError):
+                print('Failed waiting for Elastic Load Balancer %s deletion (%s)' % (arn, result))
+        responses([result for result in results if not isinstance(result, WaiterError)], ElasticLoadBalancing)
+        return not any(results)
+
     @staticmethod
     def set_security_groups(self):
         """
@@ -1317,15 +1880,33 @@ class LoadBalancer(ElasticLoadBalancing):
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.describe_load_balancers
         """
         try:
-            try:
+            if self.lb_arn:
                 return self.elb.describe_load_balancers(LoadBalancerArns=(self.lb_arn,))
-            except AttributeError:
-                return self.elb.describe_load_balancers(Names=(self.name,))
+            return self.elb.describe_load_balancers(Names=(self.name,))
         except ClientError as err:
             ElasticLoadBalancing.handle(err)
         except Exception as err:
             ElasticLoadBalancing.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream Elastic Load Balancers page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Paginator.DescribeLoadBalancers
+        """
+        if self.lb_arn:
+            return paginate(self.elb, 'describe_load_balancers', 'LoadBalancers', self.page_size,
+                            LoadBalancerArns=(self.lb_arn,))
+        return paginate(self.elb, 'describe_load_balancers', 'LoadBalancers', self.page_size, Names=(self.name,))
+
+    @staticmethod
+    def iter_all(self):
+        """
+        Stream every Elastic Load Balancer in the region page by page, whatever its name
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Paginator.DescribeLoadBalancers
+        """
+        return paginate(self.elb, 'describe_load_balancers', 'LoadBalancers', self.page_size)
+
 
 class LoadBalancerTargetGroup(ElasticLoadBalancing):
     """
@@ -1341,7 +1922,7 @@ class LoadBalancerTargetGroup(ElasticLoadBalancing):
         try:
             print('Create Target Group for %s' % self.name)
             self.response = self.elb.create_target_group(Name=self.name, Protocol=proto, Port=port,
-                                                         VpcId=self.vpc_id)
+                                                         VpcId=self.vpc_id, Tags=ElasticLoadBalancing.tags(self))
         except ClientError as err:
             ElasticLoadBalancing.handle(err)
         except Exception as err:
@@ -1361,6 +1942,32 @@ class LoadBalancerTargetGroup(ElasticLoadBalancing):
         except Exception as err:
             ElasticLoadBalancing.fatal(err)
 
+    @staticmethod
+    def delete_many(self, arns):
+        """
+        Delete every ELB Target Group in 'arns' at once (boto3_pool.many)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.delete_target_group
+        """
+        for arn in arns:
+            print('Delete Target Group %s' % arn)
+        responses(pool.many(self.elb, 'delete_target_group', [{'TargetGroupArn': arn} for arn in arns],
+                            self.workers), ElasticLoadBalancing)
+
+    @staticmethod
+    def register(self, instance_ids):
+        """
+        Register every instance as a target of self.lb_target_group_arn with one call
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.register_targets
+        """
+        try:
+            print('Register %d targets with %s' % (len(instance_ids), self.lb_target_group_arn))
+            self.elb.register_targets(TargetGroupArn=self.lb_target_group_arn,
+                                      Targets=[{'Id': instance_id} for instance_id in instance_ids])
+        except ClientError as err:
+            ElasticLoadBalancing.handle(err)
+        except Exception as err:
+            ElasticLoadBalancing.fatal(err)
+
     @staticmethod
     def list(self, name=None):
         """
@@ -1377,6 +1984,24 @@ class LoadBalancerTargetGroup(ElasticLoadBalancing):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self, name=None):
+        """
+        Stream ELB Target Groups page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Paginator.DescribeTargetGroups
+        """
+        if name:
+            return paginate(self.elb, 'describe_target_groups', 'TargetGroups', self.page_size, Names=(name,))
+        return paginate(self.elb, 'describe_target_groups', 'TargetGroups', self.page_size, LoadBalancerArn=self.lb_arn)
+
+    @staticmethod
+    def iter_all(self):
+        """
+        Stream every ELB Target Group in the region page by page, attached or not
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Paginator.DescribeTargetGroups
+        """
+        return paginate(self.elb, 'describe_target_groups', 'TargetGroups', self.page_size)
+
 
 class LoadBalancerListener(ElasticLoadBalancing):
     """
@@ -1393,7 +2018,8 @@ class LoadBalancerListener(ElasticLoadBalancing):
             print('Create Listener for %s' % self.name)
             self.response = self.elb.create_listener(LoadBalancerArn=self.lb_arn, Protocol=proto, Port=port,
                                                      DefaultActions=[{'Type': action,
-                                                                      'TargetGroupArn': self.lb_target_group_arn}])
+                                                                      'TargetGroupArn': self.lb_target_group_arn}],
+                                                     Tags=ElasticLoadBalancing.tags(self))
         except ClientError as err:
             ElasticLoadBalancing.handle(err)
         except Exception as err:
@@ -1413,6 +2039,17 @@ class LoadBalancerListener(ElasticLoadBalancing):
         except Exception as err:
             ElasticLoadBalancing.fatal(err)
 
+    @staticmethod
+    def delete_many(self, arns):
+        """
+        Delete every ELB Listener in 'arns' at once (boto3_pool.many)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.delete_listener
+        """
+        for arn in arns:
+            print('Delete Listener %s' % arn)
+        responses(pool.many(self.elb, 'delete_listener', [{'ListenerArn': arn} for arn in arns], self.workers),
+                  ElasticLoadBalancing)
+
     @staticmethod
     def list(self):
         """
@@ -1426,6 +2063,27 @@ class LoadBalancerListener(ElasticLoadBalancing):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream ELB Listeners page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Paginator.DescribeListeners
+        """
+        return paginate(self.elb, 'describe_listeners', 'Listeners', self.page_size, LoadBalancerArn=self.lb_arn)
+
+    @staticmethod
+    def list_many(self, lb_arns):
+        """
+        Get the Listener arns of every load balancer in 'lb_arns', as {lb_arn: [arn]}, all described
+        at once (boto3_pool.many). A load balancer has at most 50 listeners, so one page of 400 holds them.
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elbv2.html#ElasticLoadBalancingv2.Client.describe_listeners
+        """
+        found = responses(pool.many(self.elb, 'describe_listeners', [{'LoadBalancerArn': arn, 'PageSize': 400}
+                                                                     for arn in lb_arns], self.workers),
+                          ElasticLoadBalancing)
+        return dict((arn, [listener['ListenerArn'] for listener in (response or {}).get('Listeners', ())])
+                    for arn, response in zip(lb_arns, found))
+
 
 # ********************************************************* #
 # ********* SIMPLE NOTIFICATION SERVICE CLIENT ************ #
@@ -1442,7 +2100,6 @@ class SimpleNotificationService(solutions.SecureCloudService):
         Initialise data for Simple Notifications
         """
         super().__init__(solution)
-        self.sns = boto3.client('sns')
 
 
 class SimpleNotificationServiceTopic(SimpleNotificationService):
@@ -1490,6 +2147,14 @@ class SimpleNotificationServiceTopic(SimpleNotificationService):
         except Exception as err:
             Compute.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream (requester) SNS topics page by page. SNS pages are a fixed 100 topics.
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/sns.html#SNS.Paginator.ListTopics
+        """
+        return paginate(self.sns, 'list_topics', 'Topics')
+
 
 # ********************************************************* #
 # ***************** AUTO-SCALING CLIENT ******************* #
@@ -1505,7 +2170,6 @@ class AutoScaling(solutions.ScalableCloudService):
         Initialise data for AutoScaling
         """
         super().__init__(solution)
-        self.autoscale = boto3.client('autoscaling')
 
 
 class LaunchConfiguration(AutoScaling):
@@ -1562,6 +2226,17 @@ class LaunchConfiguration(AutoScaling):
         except Exception as err:
             AutoScaling.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream AutoScaling launch configurations page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribeLaunchConfigurations
+        """
+        if self.name:
+            return paginate(self.autoscale, 'describe_launch_configurations', 'LaunchConfigurations', self.page_size,
+                            LaunchConfigurationNames=(self.name,))
+        return paginate(self.autoscale, 'describe_launch_configurations', 'LaunchConfigurations', self.page_size)
+
 
 class AutoScalingGroup(LaunchConfiguration):
     """
@@ -1594,16 +2269,52 @@ class AutoScalingGroup(LaunchConfiguration):
     @staticmethod
     def delete(self, force_delete=True):
         """
-        Delete AutoScaling group
+        Delete AutoScaling group self.asg_name, with its scaling policies and notifications
         https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Client.delete_auto_scaling_group
+        :return: True if deletion started
         """
         try:
-            print('Delete AutoScaling group %s' % self.name)
-            self.autoscale.delete_auto_scaling_group(AutoScalingGroupName=self.name, ForceDelete=force_delete)
+            print('Delete AutoScaling group %s' % self.asg_name)
+            self.autoscale.delete_auto_scaling_group(AutoScalingGroupName=self.asg_name, ForceDelete=force_delete)
+            return True
         except ClientError as err:
             AutoScaling.handle(err)
         except Exception as err:
             AutoScaling.fatal(err)
+        return False
+
+    @staticmethod
+    def delete_many(self, names, force_delete=True):
+        """
+        Delete every AutoScaling group in 'names' at once (boto3_pool.many), see delete
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Client.delete_auto_scaling_group
+        :return: names of the groups whose deletion started
+        """
+        for name in names:
+            print('Delete AutoScaling group %s' % name)
+        results = responses(pool.many(self.autoscale, 'delete_auto_scaling_group',
+                                      [{'AutoScalingGroupName': name, 'ForceDelete': force_delete} for name in names],
+                                      self.workers), AutoScaling)
+        return [name for name, result in zip(names, results) if result is not None]
+
+    @staticmethod
+    def existing(self, names):
+        """
+        Names of the AutoScaling groups in 'names' which still exist, described 50 at a time, all at once
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Client.describe_auto_scaling_groups
+        """
+        names = sorted(names)
+        batches = [names[i:i + 50] for i in range(0, len(names), 50)]
+        results = responses(pool.many(self.autoscale, 'describe_auto_scaling_groups',
+                                      [{'AutoScalingGroupNames': batch, 'MaxRecords': 50} for batch in batches],
+                                      self.workers), AutoScaling)
+        found = set()
+        for batch, response in zip(batches, results):
+            if response is None:
+                found.update(batch)
+            else:
+                found.update(group['AutoScalingGroupName'] for group in response['AutoScalingGroups'])
+        return found
 
     @staticmethod
     def list(self):
@@ -1622,6 +2333,29 @@ class AutoScalingGroup(LaunchConfiguration):
         except Exception as err:
             AutoScaling.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream AutoScaling groups page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribeAutoScalingGroups
+        """
+        if self.name:
+            return paginate(self.autoscale, 'describe_auto_scaling_groups', 'AutoScalingGroups', self.page_size,
+                            AutoScalingGroupNames=(self.name,))
+        return paginate(self.autoscale, 'describe_auto_scaling_groups', 'AutoScalingGroups', self.page_size)
+
+    @staticmethod
+    def iter_tagged(self):
+        """
+        Stream the names of AutoScaling groups tagged self.name = self.tag, whatever their name
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribeTags
+        """
+        for tag in paginate(self.autoscale, 'describe_tags', 'Tags', self.page_size,
+                            Filters=[{'Name': 'key', 'Values': (self.name,)},
+                                     {'Name': 'value', 'Values': (self.tag,)}]):
+            if tag['ResourceType'] == 'auto-scaling-group':
+                yield tag['ResourceId']
+
     @staticmethod
     def list_instances(self, auto_scaling_instance_ids=None):
         """
@@ -1732,6 +2466,15 @@ class AutoScalingGroupTags(AutoScaling):
         except Exception as err:
             AutoScaling.fatal(err)
 
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream AutoScaling group tags page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribeTags
+        """
+        return paginate(self.autoscale, 'describe_tags', 'Tags', self.page_size,
+                        Filters=[{'Name': 'key', 'Values': (self.tag,)}])
+
 
 class AutoScalingPolicy(AutoScaling):
     """
@@ -1787,6 +2530,21 @@ class AutoScalingPolicy(AutoScaling):
         except Exception as err:
             AutoScaling.fatal(err)
 
+    @staticmethod
+    def iter_list(self, asg_name=None, pol_names=None, pol_types=None):
+        """
+        Stream AutoScaling policies page by page
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribePolicies
+        """
+        params = {}
+        if asg_name:
+            params['AutoScalingGroupName'] = asg_name
+        if pol_names:
+            params['PolicyNames'] = pol_names
+        if pol_types:
+            params['PolicyTypes'] = pol_types
+        return paginate(self.autoscale, 'describe_policies', 'ScalingPolicies', self.page_size, **params)
+
 
 class AutoScalingNotification(AutoScaling):
     """
@@ -1835,3 +2593,12 @@ class AutoScalingNotification(AutoScaling):
             AutoScaling.handle(err)
         except Exception as err:
             AutoScaling.fatal(err)
+
+    @staticmethod
+    def iter_list(self):
+        """
+        Stream AutoScaling Notifications page by page (see list)
+        https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/autoscaling.html#AutoScaling.Paginator.DescribeNotificationConfigurations
+        """
+        return paginate(self.autoscale, 'describe_notification_configurations', 'NotificationConfigurations',
+                        self.page_size, AutoScalingGroupNames=(self.name,))
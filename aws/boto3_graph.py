@@ -0,0 +1,49 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class TaskGraph:
+    """
+    DEPENDENCY GRAPH OF TASKS
+    """
+    def __init__(self, workers=8):
+        """
+        Initialise an empty graph run by a bounded pool of workers
+        """
+        self.workers = max(1, int(workers or 1))
+        self.nodes = {}
+
+    def add(self, name, func, *args, after=()):
+        """
+        Add task 'name' which calls func(*args) once every task in 'after' is done.
+        Dependencies not present in the graph are treated as already done.
+        """
+        self.nodes[name] = {'func': func, 'args': args, 'after': tuple(after)}
+        return name
+
+    def run(self):
+        """
+        Run every task as soon as its dependencies are done, so total time follows
+        the critical path of the graph instead of the sum of all tasks.
+        The first failing task is re-raised once running tasks have finished.
+        """
+        pending = dict(self.nodes)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for name, node in list(pending.items()):
+                    if all(dep in done or dep not in self.nodes for dep in node['after']):
+                        del pending[name]
+                        running[executor.submit(node['func'], *node['args'])] = name
+                if not running:
+                    raise RuntimeError('Dependency cycle between %s' % ', '.join(sorted(pending)))
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    future.result()
+                    done.add(name)
+        return done
@@ -0,0 +1,126 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import sys
+import threading
+from botocore.exceptions import ClientError
+
+try:
+    sys.path.append('./aws')
+    import aws.boto3_solutions as solutions
+    import aws.boto3_client as client
+    import aws.boto3_graph as graph
+except ImportError:
+    sys.path.append('../aws')
+    import aws.boto3_solutions as solutions
+    import aws.boto3_client as client
+    import aws.boto3_graph as graph
+
+_LIVE = ('pending', 'running', 'shutting-down', 'stopping', 'stopped')
+
+# Resource type: (describe method, records key, accepts DryRun, filters)
+_TYPES = {
+    'addresses': ('describe_addresses', 'Addresses', True, None),
+    'instances': ('describe_instances', 'Reservations', True, [{'Name': 'instance-state-name', 'Values': _LIVE}]),
+    'internet_gateways': ('describe_internet_gateways', 'InternetGateways', True, None),
+    'launch_templates': ('describe_launch_templates', 'LaunchTemplates', True, None),
+    'nat_gateways': ('describe_nat_gateways', 'NatGateways', False, None),
+    'network_acls': ('describe_network_acls', 'NetworkAcls', True, None),
+    'network_interfaces': ('describe_network_interfaces', 'NetworkInterfaces', True, None),
+    'route_tables': ('describe_route_tables', 'RouteTables', True, None),
+    'security_groups': ('describe_security_groups', 'SecurityGroups', True, None),
+    'subnets': ('describe_subnets', 'Subnets', True, None),
+    'vpc_endpoints': ('describe_vpc_endpoints', 'VpcEndpoints', True, None),
+    'vpc_peering_connections': ('describe_vpc_peering_connections', 'VpcPeeringConnections', True, None),
+    'vpcs': ('describe_vpcs', 'Vpcs', True, None),
+}
+
+
+class Inventory:
+    """
+    EC2 INVENTORY
+    """
+
+    def __init__(self, solution, types=None, filters=None):
+        """
+        Sweep each resource type once for the whole region, one type per worker, and
+        index every record by resource type, vpc id and tag key/value.
+        'filters' optionally narrows the sweep of some types: {resource type: [filter, ..]}
+        https://boto3.amazonaws.com/v1/documentation/api/latest/guide/paginators.html
+        """
+        self.solution = solution
+        self.index = {}
+        self.lock = threading.Lock()
+        sweep = graph.TaskGraph(solution.workers)
+        for resource_type in (types or _TYPES):
+            sweep.add(resource_type, Inventory.sweep, self, resource_type, (filters or {}).get(resource_type))
+        sweep.run()
+
+    @staticmethod
+    def sweep(self, resource_type, filters=None):
+        """
+        Describe every record of one resource type and add it to the index
+        """
+        records = Inventory.records(self.solution, resource_type, filters)
+        with self.lock:
+            self.index.setdefault((resource_type,), [])
+            for record in records:
+                self.index[(resource_type,)].append(record)
+                for vpc_id in Inventory.vpcs(record):
+                    self.index.setdefault((resource_type, 'vpc', vpc_id), []).append(record)
+                for tag in record.get('Tags', record.get('TagSet', ())):
+                    self.index.setdefault((resource_type, 'tag', tag['Key'], tag['Value']), []).append(record)
+
+    @staticmethod
+    def records(solution, resource_type, extra=None):
+        """
+        Describe every record of one resource type in solution.region, passing 'extra' filters too.
+        A filter with no values matches nothing so is not sent.
+        """
+        method, key, dry_run, filters = _TYPES[resource_type]
+        params = {}
+        if dry_run:
+            params['DryRun'] = solution.dry
+        elif solution.dry:
+            return []
+        if extra and not all(each['Values'] for each in extra):
+            return []
+        if filters or extra:
+            params['Filters'] = (filters or []) + (extra or [])
+
+        if not solution.client.can_paginate(method):
+            try:
+                return getattr(solution.client, method)(**params)[key]
+            except ClientError as err:
+                solutions.Solution.handle(err)
+                return []
+        records = client.paginate(solution.client, method, key, solution.page_size, solution.cache_ttl, **params)
+        if resource_type == 'instances':
+            return [instance for reservation in records for instance in reservation['Instances']]
+        return list(records)
+
+    @staticmethod
+    def vpcs(record):
+        """
+        Ids of the vpc(s) a described record belongs to
+        """
+        if 'VpcId' in record:
+            return [record['VpcId']]
+        if 'Attachments' in record:
+            return [attachment['VpcId'] for attachment in record['Attachments'] if 'VpcId' in attachment]
+        return [record[side]['VpcId'] for side in ('RequesterVpcInfo', 'AccepterVpcInfo')
+                if 'VpcId' in record.get(side, {})]
+
+    def get(self, resource_type, vpc_id=None, key=None, value=None):
+        """
+        Records of a resource type, optionally only those in vpc_id and/or tagged key=value
+        """
+        with self.lock:
+            records = self.index.get((resource_type,), [])
+            if vpc_id:
+                records = self.index.get((resource_type, 'vpc', vpc_id), [])
+            if key:
+                tagged = set(id(record) for record in self.index.get((resource_type, 'tag', key, value), []))
+                records = [record for record in records if id(record) in tagged]
+            return list(records)
@@ -0,0 +1,219 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import os
+import json
+import time
+import uuid
+import threading
+
+_LOCK = threading.Lock()
+_FILE = None
+_LIVE = {}
+_STEPS = {}
+_RUN = {'id': None}
+
+# Operations that create resources: (resource type, path to the new id(s) in the response)
+_CREATES = {
+    'AllocateAddress': ('addresses', 'AllocationId'),
+    'CreateInternetGateway': ('internet_gateways', 'InternetGateway.InternetGatewayId'),
+    'CreateLaunchTemplate': ('launch_templates', 'LaunchTemplate.LaunchTemplateId'),
+    'CreateListener': ('listeners', 'Listeners.ListenerArn'),
+    'CreateLoadBalancer': ('load_balancers', 'LoadBalancers.LoadBalancerArn'),
+    'CreateNatGateway': ('nat_gateways', 'NatGateway.NatGatewayId'),
+    'CreateNetworkAcl': ('network_acls', 'NetworkAcl.NetworkAclId'),
+    'CreateRouteTable': ('route_tables', 'RouteTable.RouteTableId'),
+    'CreateSecurityGroup': ('security_groups', 'GroupId'),
+    'CreateSubnet': ('subnets', 'Subnet.SubnetId'),
+    'CreateTargetGroup': ('target_groups', 'TargetGroups.TargetGroupArn'),
+    'CreateTopic': ('topics', 'TopicArn'),
+    'CreateVpc': ('vpcs', 'Vpc.VpcId'),
+    'CreateVpcEndpoint': ('vpc_endpoints', 'VpcEndpoint.VpcEndpointId'),
+    'CreateVpcPeeringConnection': ('vpc_peering_connections', 'VpcPeeringConnection.VpcPeeringConnectionId'),
+    'RunInstances': ('instances', 'Instances.InstanceId'),
+}
+
+# Operations that delete resources: (resource type, request parameter holding the id(s))
+_DELETES = {
+    'DeleteInternetGateway': ('internet_gateways', 'InternetGatewayId'),
+    'DeleteLaunchTemplate': ('launch_templates', 'LaunchTemplateId'),
+    'DeleteListener': ('listeners', 'ListenerArn'),
+    'DeleteLoadBalancer': ('load_balancers', 'LoadBalancerArn'),
+    'DeleteNatGateway': ('nat_gateways', 'NatGatewayId'),
+    'DeleteNetworkAcl': ('network_acls', 'NetworkAclId'),
+    'DeleteRouteTable': ('route_tables', 'RouteTableId'),
+    'DeleteSecurityGroup': ('security_groups', 'GroupId'),
+    'DeleteSubnet': ('subnets', 'SubnetId'),
+    'DeleteTargetGroup': ('target_groups', 'TargetGroupArn'),
+    'DeleteTopic': ('topics', 'TopicArn'),
+    'DeleteVpc': ('vpcs', 'VpcId'),
+    'DeleteVpcEndpoints': ('vpc_endpoints', 'VpcEndpointIds'),
+    'DeleteVpcPeeringConnection': ('vpc_peering_connections', 'VpcPeeringConnectionId'),
+    'ReleaseAddress': ('addresses', 'AllocationId'),
+    'TerminateInstances': ('instances', 'InstanceIds'),
+}
+
+
+def install(events):
+    """
+    Journal every resource created or deleted by clients using botocore event emitter 'events'
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/events.html
+    """
+    events.register('before-parameter-build', requested, unique_id='boto3-journal-requested')
+    events.register('after-call', finished, unique_id='boto3-journal-finished')
+
+
+def open_journal(path):
+    """
+    Load the journal at 'path', compacted to the resources still alive and the steps begun or done
+    by the last run, and append to it from now on
+    """
+    global _FILE
+    with _LOCK:
+        if _FILE:
+            _FILE.close()
+        _FILE = None
+        _LIVE.clear()
+        _STEPS.clear()
+        _RUN['id'] = None
+        if not path:
+            return
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            for records in _LIVE.values():
+                for record in records.values():
+                    f.write(json.dumps(record) + '\n')
+            if _RUN['id']:
+                f.write(json.dumps({'op': 'run', 'id': _RUN['id']}) + '\n')
+            for record in _STEPS.values():
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        _FILE = open(path, 'a', buffering=1)
+
+
+def apply(record):
+    """
+    Replay one journal record
+    """
+    if record['op'] == 'create':
+        _LIVE.setdefault(record['type'], {})[record['id']] = record
+    elif record['op'] == 'delete':
+        _LIVE.get(record['type'], {}).pop(record['id'], None)
+    elif record['op'] == 'run':
+        _RUN['id'] = record['id']
+        _STEPS.clear()
+    elif record['op'] in ('begin', 'done'):
+        _STEPS[record['step']] = record
+
+
+def requested(params, context, **kwargs):
+    context['journal_params'] = params
+
+
+def finished(parsed, model, context, **kwargs):
+    if 'Error' in parsed or (model.name not in _CREATES and model.name not in _DELETES):
+        return
+    if model.name in _CREATES:
+        resource_type, path = _CREATES[model.name]
+        ids = values(parsed, path.split('.'))
+        op = 'create'
+    else:
+        resource_type, key = _DELETES[model.name]
+        ids = values(context.get('journal_params', {}), [key])
+        op = 'delete'
+    for resource_id in ids:
+        write({'op': op, 'type': resource_type, 'id': resource_id, 'region': context.get('client_region'),
+               'time': time.time()})
+
+
+def values(data, path):
+    """
+    Values at 'path' (a list of keys) in 'data', flattening lists on the way
+    """
+    if isinstance(data, list):
+        return [value for item in data for value in values(item, path)]
+    if not path:
+        return [data]
+    if not isinstance(data, dict) or path[0] not in data:
+        return []
+    return values(data[path[0]], path[1:])
+
+
+def write(record, sync=False):
+    """
+    Append one record, and with 'sync' make sure it is on disk before returning
+    """
+    with _LOCK:
+        apply(record)
+        if _FILE:
+            _FILE.write(json.dumps(record) + '\n')
+            if sync:
+                _FILE.flush()
+                os.fsync(_FILE.fileno())
+
+
+def ids(resource_type, region=None):
+    """
+    Ids of the journaled resources of 'resource_type' still alive in 'region' (any if None), oldest first
+    """
+    with _LOCK:
+        return [resource_id for resource_id, record in _LIVE.get(resource_type, {}).items()
+                if region is None or record.get('region') == region]
+
+
+def new_run():
+    """
+    Start a new provisioning run, forgetting the steps done by the last one
+    """
+    write({'op': 'run', 'id': uuid.uuid4().hex, 'time': time.time()}, sync=True)
+
+
+def resumable():
+    """
+    True if the journal holds a run to resume
+    """
+    with _LOCK:
+        return bool(_RUN['id'])
+
+
+def begin(step):
+    """
+    Record that 'step' of this run is about to start, before it makes any call
+    """
+    write({'op': 'begin', 'step': step, 'time': time.time()}, sync=True)
+
+
+def done(step, state, result=None):
+    """
+    Record that 'step' of this run is complete, with the ids it set and its result
+    """
+    write({'op': 'done', 'step': step, 'state': state, 'result': result, 'time': time.time()}, sync=True)
+
+
+def completed(step):
+    """
+    The 'done' record of 'step' in this run, or None if it did not complete
+    """
+    with _LOCK:
+        record = _STEPS.get(step)
+        return record if record and record['op'] == 'done' else None
+
+
+def interrupted(step):
+    """
+    True if 'step' of this run began but did not complete
+    """
+    with _LOCK:
+        return step in _STEPS and _STEPS[step]['op'] == 'begin'
+
@@ -0,0 +1,141 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import aws.boto3_journal as journal
+import aws.boto3_throttle as throttle
+import aws.boto3_trace as trace
+
+_LOCK = threading.RLock()
+_LOCAL = threading.local()
+_SESSIONS = {}
+_CLIENTS = {}
+_BACKENDS = ('threads', 'async')
+_BACKEND = _BACKENDS[0]
+
+
+def backend(name=None):
+    """
+    Select how clients make requests: 'threads' (blocking boto3 clients) or 'async'
+    (aiobotocore clients sharing one event loop and connection pool, see boto3_async).
+    :return: the backend in use
+    """
+    global _BACKEND
+    if name:
+        if name not in _BACKENDS:
+            raise ValueError('Unknown backend %s' % name)
+        if name == 'async':
+            import aws.boto3_async as aio
+            if not aio.available():
+                raise ImportError('the async backend needs aiobotocore (pip install aiobotocore)')
+        with _LOCK:
+            _BACKEND = name
+    return _BACKEND
+
+
+def session(profile=None):
+    """
+    Get the shared boto3 Session for a credentials profile.
+    Service models are cached per session so each is loaded once per process, every call made
+    by its clients is rate limited by boto3_throttle and recorded by boto3_trace, and every
+    resource they create or delete is recorded by boto3_journal.
+    boto3 itself is imported here, on first use, so runs that never call AWS never load it.
+    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/core/session.html
+    """
+    import boto3
+    with _LOCK:
+        if profile not in _SESSIONS:
+            _SESSIONS[profile] = boto3.session.Session(profile_name=profile)
+            trace.install(_SESSIONS[profile].events)
+            journal.install(_SESSIONS[profile].events)
+            throttle.install(_SESSIONS[profile].events)
+        return _SESSIONS[profile]
+
+
+def client(service, region=None, profile=None):
+    """
+    Get the shared low-level client for (service, region, profile).
+    Clients are thread-safe so one client (and HTTPS connection pool) serves the whole process.
+    Throttled and transient errors are retried with jittered exponential backoff (boto3_throttle.RETRIES).
+    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/core/session.html#boto3.session.Session.client
+    """
+    if _BACKEND == 'async':
+        import aws.boto3_async as aio
+        return aio.client(service, region, profile)
+    key = (service, region, profile)
+    with _LOCK:
+        if key not in _CLIENTS:
+            from botocore.config import Config
+            _CLIENTS[key] = session(profile).client(service, region_name=region,
+                                                    config=Config(retries=throttle.RETRIES))
+        return _CLIENTS[key]
+
+
+def many(service_client, operation, params_list, workers=8):
+    """
+    Make one 'operation' request of 'service_client' per params in 'params_list', all at once.
+    With the async backend they are awaited together on the event loop from this thread
+    (boto3_async.gather); otherwise each runs on one of up to 'workers' threads.
+    :return: each response, or the exception its request raised, in order
+    """
+    if hasattr(service_client, 'many'):
+        return service_client.many(operation, params_list)
+    method = getattr(service_client, operation)
+    return _threaded([functools.partial(method, **params) for params in params_list], workers)
+
+
+def wait_many(service_client, name, params_list, workers=8):
+    """
+    Run waiter 'name' of 'service_client' once per params in 'params_list', all at once (see many)
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/clients.html#waiters
+    :return: None for each wait that succeeded, or the exception it raised, in order
+    """
+    if hasattr(service_client, 'wait_many'):
+        return service_client.wait_many(name, params_list)
+    return _threaded([functools.partial(service_client.get_waiter(name).wait, **params) for params in params_list],
+                     workers)
+
+
+def _threaded(calls, workers):
+    """
+    Run every one of 'calls' on up to 'workers' threads
+    :return: each result, or the exception its call raised, in order
+    """
+    def each(call):
+        try:
+            return call()
+        except Exception as err:
+            return err
+
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers or 1), len(calls)))) as executor:
+        return list(executor.map(each, calls))
+
+
+def resource(service, region=None, profile=None):
+    """
+    Get the service resource for (service, region, profile) for the calling thread.
+    Resources are not thread-safe so each thread gets its own.
+    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/core/session.html#boto3.session.Session.resource
+    """
+    key = (service, region, profile)
+    if not hasattr(_LOCAL, 'resources'):
+        _LOCAL.resources = {}
+    if key not in _LOCAL.resources:
+        with _LOCK:
+            _LOCAL.resources[key] = session(profile).resource(service, region_name=region)
+    return _LOCAL.resources[key]
+
+
+def clear():
+    """
+    Drop all pooled sessions, clients and resources
+    """
+    with _LOCK:
+        _LOCAL.resources = {}
+        _CLIENTS.clear()
+        _SESSIONS.clear()
@@ -2,35 +2,166 @@
 #############################################
 
 import sys
-import boto3
+import copy
 import time
+import operator
 import getopt
-import string
-import random
 
 try:
     sys.path.append('./aws')
     import aws.boto3_client as client
+    import aws.boto3_graph as graph
+    import aws.boto3_inventory as inventory
+    import aws.boto3_journal as journal
+    import aws.boto3_pool as pool
+    import aws.boto3_trace as trace
+    import aws.boto3_wait as wait
 except ImportError:
     sys.path.append('../aws')
     import aws.boto3_client as client
+    import aws.boto3_graph as graph
+    import aws.boto3_inventory as inventory
+    import aws.boto3_journal as journal
+    import aws.boto3_pool as pool
+    import aws.boto3_trace as trace
+    import aws.boto3_wait as wait
+
+_USER_DATA = b'''
+#!/bin/bash
+yum update -y
+yum install -y httpd
+systemctl enable httpd && systemctl start httpd
+usermod -a -G apache ec2_user
+chown -R ec2_user:apache /var/www
+chmod 2775 /var/www
+find /var/www -type d -exec chmod 2775 {} \;
+find /var/www -type f -exec chmod 0664 {} \;
+echo "Create by AWS Boto3 SDK (hostname: $(hostname))" >> /var/www/html/index.html
+'''
 
-_DEFS = {'choices': ('start', 'clean', 'cleanstart'),
+_DEFS = {'choices': ('start', 'clean', 'cleanstart', 'reconcile'),
+         'backend': 'threads',
+         'cache_ttl': 30,
          'catalog': ('sns', 'vpc', 'elb', 'autoscaling', 'ec2', 'sec'),
+         'choice': 'help',
          'cidr4_vpc': ['10.0.0.0/24'],
          'cidr4': ['10.0.0.0/25', '10.0.0.128/25'],
          'hibernate': True,
          'ami_id': 'ami-0fad7378adf284ce0',
          'ami_type': 't2.micro',
          'ip6': False,
+         'journal': None,
          'key_pair': 'ec2_user',
          'max_count': 2,
          'name': 'boto3-client-sdk',
+         'page_size': 100,
          'region': 'eu-west-1',
+         'resume': False,
          'peer_region': 'eu-west-2',
+         'profile': None,
+         'scope': 'vpc-sec-sns-ec2-two',
          'tag': 'boto3-client-sdk',
          'tenancy': 'default',
-         'zones': ('eu-west-1a', 'eu-west-1b')}
+         'trace': None,
+         'wait_deadline': 300,
+         'workers': 8,
+         'zones': ('eu-west-1a', 'eu-west-1b'),
+
+         # Fixed settings, not exposed on the command line
+         'any_ip4': '0.0.0.0/0',
+         'any_ip6': '::/0',
+         'auto_ip6': True,
+         'cidr6_vpc': [],
+         'cidr6': [],
+         'debug': False,
+         'dry': False,
+         'ebs_optimized': False,
+         'est_warmup': 90,
+         'force_delete': True,
+         'hc_type': 'EC2',
+         'ip4': True,
+         'ip_version': 'ipv4',
+         'lb_choices': ['forward', 'forward', 'forward', 'forward', 'forward', 'forward'],
+         'lb_target_group_type': 'instance',
+         'lb_type': 'application',
+         'lb_wait_delay': 5,
+         'metric': 'ASGAverageCPUUtilization',
+         'metric_value': 50,
+         'min_count': 1,
+         'monitor': False,
+         'notice_types': ['autoscaling:EC2_INSTANCE_LAUNCH',
+                          'autoscaling:EC2_INSTANCE_LAUNCH_ERROR',
+                          'autoscaling:EC2_INSTANCE_TERMINATE',
+                          'autoscaling:EC2_INSTANCE_TERMINATE_ERROR'],
+         'policy_type': 'TargetTrackingScaling',
+         'ports': [80],
+         'protocols': ['HTTP'],
+         'public_ip': True,
+         'resource': 'auto-scaling-group',
+         'scheme': 'internet-facing',
+         'user_data': _USER_DATA}
+
+# Ids of created or discovered resources, passed on from each solution object to the next
+_STATE = {'acl_id': None, 'acl_ids': [],
+          'asg_name': None,
+          'eip_id': None, 'eip_ids': [],
+          'igw_id': None, 'igw_ids': [],
+          'instance_id': None, 'instance_ids': [],
+          'lb_arn': None, 'lb_arns': [],
+          'lb_listener_arn': None, 'lb_listener_arns': [],
+          'lb_target_group_arn': None, 'lb_target_group_arns': [],
+          'nat_gw_id': None, 'nat_gw_ids': [],
+          'private_ip': None, 'private_ips': [],
+          'rtt_id': None, 'rtt_ids': [],
+          'sg_id': None, 'sg_ids': [],
+          'subnet_id': None, 'subnet_ids': [],
+          'template_id': None, 'template_ids': [],
+          'topic_arn': None,
+          'vpc_id': None, 'vpc_ids': [],
+          'zone': None}
+
+# Journal steps whose creates take no idempotency token (zone steps end with the zone number)
+_UNSAFE_STEPS = ('vpc', 'security_group', 'internet_gateway', 'route_table', 'network', 'elastic_ips')
+
+
+class SolutionConfig:
+    """
+    SOLUTION CONFIGURATION
+    Built once from _DEFS and argv, then shared by reference by every solution object.
+    """
+    __slots__ = ('ami_id', 'ami_type', 'any_ip4', 'any_ip6', 'auto_ip6', 'backend', 'cache_ttl', 'catalog', 'choice',
+                 'choices', 'cidr4', 'cidr4_vpc', 'cidr6', 'cidr6_vpc', 'debug', 'desired_capacity', 'dry',
+                 'ebs_optimized', 'est_warmup', 'force_delete', 'hc_type', 'hibernate', 'ip4', 'ip6', 'ip_version',
+                 'journal', 'key_pair', 'lb_choices', 'lb_target_group_type', 'lb_type', 'lb_wait_delay',
+                 'max_count', 'metric', 'metric_value', 'min_count', 'monitor', 'name', 'network_acls', 'notice_types',
+                 'page_size', 'peer_region', 'policy_type', 'ports', 'profile', 'protocols', 'public_ip', 'region',
+                 'resource', 'resume', 'scheme', 'scope', 'tag', 'tenancy', 'trace', 'user_data', 'wait_deadline',
+                 'workers', 'zones')
+
+    def __init__(self, **settings):
+        """
+        Settings not given take their _DEFS value. The tag, network ACL names and desired
+        capacity default to the (given) name and max count.
+        """
+        for setting in self.__slots__:
+            object.__setattr__(self, setting, settings.get(setting, _DEFS.get(setting)))
+        if 'tag' not in settings:
+            object.__setattr__(self, 'tag', self.name)
+        if 'network_acls' not in settings:
+            object.__setattr__(self, 'network_acls', (self.name,))
+        if 'desired_capacity' not in settings:
+            object.__setattr__(self, 'desired_capacity', self.max_count)
+
+    def __setattr__(self, setting, value):
+        raise AttributeError('SolutionConfig is read-only, use replace(%s=...)' % setting)
+
+    def replace(self, **changes):
+        """
+        Copy of this configuration with some settings changed
+        """
+        settings = dict((setting, getattr(self, setting)) for setting in self.__slots__)
+        settings.update(changes)
+        return SolutionConfig(**settings)
 
 
 class Solution:
@@ -39,34 +170,57 @@ class Solution:
     """
     def __init__(self, solution=None):
         """
-        Initialise site for Solution
+        Initialise site for Solution.
+        Settings are shared by reference through self.config; only resource ids are copied.
         """
-        try:
-            self.choices = solution.choices
-        except AttributeError:
-            self.choices = _DEFS['choices']
-
-        try:
-            self.debug = solution.debug
-        except AttributeError:
-            self.debug = False
-
-        try:
-            self.dry = solution.dry
-        except AttributeError:
-            self.dry = False
-
-        try:
-            self.name = solution.name
-        except AttributeError:
-            self.name = _DEFS['name']
-
-        try:
-            self.scope = solution.scope
-        except AttributeError:
-            self.scope = None
+        if solution is None:
+            self.config = SolutionConfig()
+            self.__dict__.update((name, copy.copy(value)) for name, value in _STATE.items())
+            self.asg_name = self.lb_target_group_arn = self.topic_arn = self.name
+            self.peer_vpc_id, self.peer_vpc_ids = None, []
+        else:
+            self.config = solution.config
+            self.__dict__.update((name, getattr(solution, name)) for name in _STATE)
+            self.peer_vpc_id, self.peer_vpc_ids = solution.vpc_id, solution.vpc_ids
 
-        self.token = ''.join(random.SystemRandom().choice(string.ascii_uppercase + string.digits) for _ in range(63))
+    def fork(self, **attrs):
+        """
+        Shallow copy of this solution, with overrides, for use by one concurrent task.
+        Overridden settings get a private copy of the configuration.
+        """
+        forked = copy.copy(self)
+        settings = dict((name, attrs.pop(name)) for name in list(attrs) if name in SolutionConfig.__slots__)
+        if settings:
+            forked.config = forked.config.replace(**settings)
+        for name, value in attrs.items():
+            setattr(forked, name, value)
+        return forked
+
+    def step(self, name, create, *args):
+        """
+        Run create(self, *args) as one step of the provisioning journal: the step is recorded
+        before any call is made and again, with the ids it set, once it is done. With --resume a
+        step done by the last run is replayed from the journal instead, and a step that was cut
+        short is run again with the same idempotency tokens (see client.Compute.client_token).
+        Steps whose creates take no idempotency token (_UNSAFE_STEPS) would duplicate resources if
+        run again, so resume stops at them when cut short and reconcile must adopt what they made.
+        :return: what create returned
+        """
+        if self.resume:
+            record = journal.completed(name)
+            if record:
+                print('Resume %s' % name)
+                self.__dict__.update(copy.deepcopy(record['state']))
+                return record['result']
+            if name.rstrip('0123456789') in _UNSAFE_STEPS and journal.interrupted(name):
+                Solution.fatal(name, 'Cannot resume: running this step again could duplicate resources '
+                                     '(use -a reconcile to adopt them) -')
+        before = dict((key, copy.copy(getattr(self, key))) for key in _STATE)
+        journal.begin(name)
+        result = create(self, *args)
+        journal.done(name, dict((key, getattr(self, key)) for key in _STATE if getattr(self, key) != before[key]),
+                     result if isinstance(result, str) else None)
+        return result
 
     @staticmethod
     def console(message=None):
@@ -109,439 +263,63 @@ class CloudSolution(Solution):
     """
     VPC
     """
-    def __init__(self, solution=None):
-        """
-        Initialise the VPC
-        :return: object
-        """
-        super().__init__(solution)
-        try:
-            self.vpc_id = solution.vpc_id
-        except AttributeError:
-            self.vpc_id = None
-
-        try:
-            self.vpc_ids = solution.vpc_ids
-        except AttributeError:
-            self.vpc_ids = []
-
-        try:
-            self.cidr4_vpc = solution.cidr4_vpc
-        except AttributeError:
-            self.cidr4_vpc = _DEFS['cidr4_vpc']
-
-        try:
-            self.cidr4 = solution.cidr4
-        except AttributeError:
-            self.cidr4 = _DEFS['cidr4']
-
-        try:
-            self.cidr6_vpc = solution.cidr6_vpc
-        except AttributeError:
-            self.cidr6_vpc = []
-
-        try:
-            self.cidr6 = solution.cidr6
-        except AttributeError:
-            self.cidr6 = []
-
-        try:
-            self.eip_id = solution.eip_id
-        except AttributeError:
-            self.eip_id = None
-
-        try:
-            self.eip_ids = solution.eip_ids
-        except AttributeError:
-            self.eip_ids = []
-
-        try:
-            self.igw_id = solution.igw_id
-        except AttributeError:
-            self.igw_id = None
-
-        try:
-            self.igw_ids = solution.igw_ids
-        except AttributeError:
-            self.igw_ids = []
-
-        try:
-            self.ip4 = solution.ip4
-        except AttributeError:
-            self.ip4 = True
-
-        try:
-            self.ip6 = solution.ip6
-        except AttributeError:
-            self.ip6 = _DEFS['ip6']
-
-        try:
-            self.ami_id = solution.ami_id
-        except AttributeError:
-            self.ami_id = _DEFS['ami_id']
-
-        try:
-            self.ami_type = solution.ami_type
-        except AttributeError:
-            self.ami_type = _DEFS['ami_type']
-
-        try:
-            self.instance_id = solution.instance_id
-        except AttributeError:
-            self.instance_id = None
-
-        try:
-            self.instance_ids = solution.instance_ids
-        except AttributeError:
-            self.instance_ids = []
-
-        try:
-            self.name = solution.name
-        except AttributeError:
-            self.name = _DEFS['name']
-
-        try:
-            self.nat_gw_id = solution.nat_gw_id
-        except AttributeError:
-            self.nat_gw_id = None
-
-        try:
-            self.nat_gw_ids = solution.nat_gw_ids
-        except AttributeError:
-            self.nat_gw_ids = []
-
-        try:
-            self.network_acls = solution.network_acls
-        except AttributeError:
-            self.network_acls = (self.name,)
-
-        try:
-            self.peer_vpc_id = solution.vpc_id
-        except AttributeError:
-            self.peer_vpc_id = None
-
-        try:
-            self.peer_vpc_ids = solution.vpc_ids
-        except AttributeError:
-            self.peer_vpc_ids = []
-
-        try:
-            self.peer_region = solution.peer_region
-        except AttributeError:
-            self.peer_region = _DEFS['peer_region']
-
-        try:
-            self.private_ip = solution.private_ip
-        except AttributeError:
-            self.private_ip = None
-
-        try:
-            self.private_ips = solution.private_ips
-        except AttributeError:
-            self.private_ips = []
-
-        try:
-            self.region = solution.region
-        except AttributeError:
-            self.region = _DEFS['region']
-
-        try:
-            self.rtt_id = solution.rtt_id
-        except AttributeError:
-            self.rtt_id = None
-
-        try:
-            self.rtt_ids = solution.rtt_ids
-        except AttributeError:
-            self.rtt_ids = []
-
-        try:
-            self.tag = solution.name
-        except AttributeError:
-            self.tag = self.name
-
-        try:
-            self.tenancy = solution.tenancy
-        except AttributeError:
-            self.tenancy = _DEFS['tenancy']
-
-        try:
-            self.topic_arn = solution.topic_arn
-        except AttributeError:
-            self.topic_arn = self.name
-
-        try:
-            self.zone = solution.zone
-        except AttributeError:
-            self.zone = None
-
-        try:
-            self.zones = solution.zones
-        except AttributeError:
-            self.zones = _DEFS['zones']
-
-        try:
-            self.user_data = solution.user_data
-        except AttributeError:
-            self.user_data = b'''
-#!/bin/bash
-yum update -y
-yum install -y httpd
-systemctl enable httpd && systemctl start httpd
-usermod -a -G apache ec2_user
-chown -R ec2_user:apache /var/www
-chmod 2775 /var/www
-find /var/www -type d -exec chmod 2775 {} \;
-find /var/www -type f -exec chmod 0664 {} \;
-echo "Create by AWS Boto3 SDK (hostname: $(hostname))" >> /var/www/html/index.html
-'''
 
 
 class CloudService(CloudSolution):
     """
     A CLOUD SERVICE
     """
-    def __init__(self, solution=None):
+    @property
+    def client(self):
         """
-        Initialise cloud service parameters
+        EC2 client, created on first use so runs that never touch EC2 never load its model
         """
-        super().__init__(solution)
-        try:
-            self.acl_id = solution.acl_id
-        except AttributeError:
-            self.acl_id = None
-
-        try:
-            self.acl_ids = solution.acl_ids
-        except AttributeError:
-            self.acl_ids = []
-
-        try:
-            self.any_ip4 = solution.any_ip4
-        except AttributeError:
-            self.any_ip4 = '0.0.0.0/0'
-
-        try:
-            self.any_ip6 = solution.any_ip4
-        except AttributeError:
-            self.any_ip6 = '::/0'
-
-        try:
-            self.auto_ip6 = solution.auto_ip6
-        except AttributeError:
-            self.auto_ip6 = True
-
-        try:
-            self.ebs_optimized = solution.ebs_optimized
-        except AttributeError:
-            self.ebs_optimized = False
-
-        try:
-            self.hibernate = solution.hibernate
-        except AttributeError:
-            self.hibernate = _DEFS['hibernate']
-
-        try:
-            self.key_pair = solution.key_pair
-        except AttributeError:
-            self.key_pair = _DEFS['key_pair']
-
-        try:
-            self.min_count = solution.min_count
-        except AttributeError:
-            self.min_count = 1
-
-        try:
-            self.max_count = solution.max_count
-        except AttributeError:
-            self.max_count = _DEFS['max_count']
-
-        try:
-            self.monitor = solution.monitor
-        except AttributeError:
-            self.monitor = False
-
-        try:
-            self.ports = solution.ports
-        except AttributeError:
-            self.ports = [80]
-
-        try:
-            self.protocols = solution.protocols
-        except AttributeError:
-            self.protocols = ['HTTP']
+        return pool.client('ec2', self.region, self.profile)
 
-        try:
-            self.public_ip = solution.public_ip
-        except AttributeError:
-            self.public_ip = True
-
-        try:
-            self.subnet_id = solution.subnet_id
-        except AttributeError:
-            self.subnet_id = None
+    @property
+    def compute(self):
+        """
+        EC2 resource for the calling thread, created on first use
+        """
+        return pool.resource('ec2', self.region, self.profile)
 
-        try:
-            self.subnet_ids = solution.subnet_ids
-        except AttributeError:
-            self.subnet_ids = []
+    @property
+    def autoscale(self):
+        """
+        AutoScaling client, created on first use
+        """
+        return pool.client('autoscaling', self.region, self.profile)
 
-        try:
-            self.template_id = solution.template_id
-        except AttributeError:
-            self.template_id = None
+    @property
+    def elb(self):
+        """
+        ELBv2 client, created on first use
+        """
+        return pool.client('elbv2', self.region, self.profile)
 
-        try:
-            self.template_ids = solution.template_ids
-        except AttributeError:
-            self.template_ids = []
+    @property
+    def sns(self):
+        """
+        SNS client, created on first use
+        """
+        return pool.client('sns', self.region, self.profile)
 
 
 class SecureCloudService(CloudService):
     """
     SECURITY
     """
-    def __init__(self, solution=None):
-        """
-        Create a Secure Cloud Service
-        """
-        super().__init__(solution)
-        try:
-            self.sg_id = solution.sg_id
-        except AttributeError:
-            self.sg_id = None
-
-        try:
-            self.sg_ids = solution.sg_ids
-        except AttributeError:
-            self.sg_ids = []
-
-        self.client = boto3.client('ec2')
-        self.compute = boto3.resource('ec2')
 
 
 class ScalableCloudService(SecureCloudService):
     """
     SCALABILITY
     """
-    def __init__(self, solution=None):
-        """
-        Create Service Availability Infrastructure
-        :param solution:
-        """
-        super().__init__(solution)
-
-        # ELBv2
-        try:
-            self.lb_arn = solution.lb_arn
-        except AttributeError:
-            self.lb_arn = None
-
-        try:
-            self.lb_arns = solution.lb_arns
-        except AttributeError:
-            self.lb_arns = []
-
-        try:
-            self.lb_choices = solution.lb_choices
-        except AttributeError:
-            self.lb_choices = ['forward', 'forward', 'forward', 'forward', 'forward', 'forward']
-
-        try:
-            self.lb_listener_arn = solution.lb_listener_arn
-        except AttributeError:
-            self.lb_listener_arn = None
-
-        try:
-            self.lb_listener_arns = solution.lb_listener_arns
-        except AttributeError:
-            self.lb_listener_arns = []
-
-        try:
-            self.ip_version = solution.ip_version
-        except AttributeError:
-            self.ip_version = 'ipv4'
-
-        try:
-            self.lb_target_group_arn = solution.lb_target_group_arn
-        except AttributeError:
-            self.lb_target_group_arn = self.name
-
-        try:
-            self.lb_target_group_arns = solution.lb_target_group_arns
-        except AttributeError:
-            self.lb_target_group_arns = []
-
-        try:
-            self.lb_target_group_type = solution.lb_target_group_type
-        except AttributeError:
-            self.lb_target_group_type = 'instance'
-
-        try:
-            self.lb_type = solution.lb_type
-        except AttributeError:
-            self.lb_type = 'application'
 
-        try:
-            self.scheme = solution.scheme
-        except AttributeError:
-            self.scheme = 'internet-facing'
-
-        # ASG
-        try:
-            self.asg_name = solution.asg_name
-        except AttributeError:
-            self.asg_name = self.name
 
-        try:
-            self.desired_capacity = solution.desired_capacity
-        except AttributeError:
-            self.desired_capacity = self.max_count
-
-        try:
-            self.hc_type = solution.hc_type
-        except AttributeError:
-            self.hc_type = 'EC2'
-
-        try:
-            self.resource = solution.resource
-        except AttributeError:
-            self.resource = 'auto-scaling-group'
-
-        try:
-            self.notice_types = solution.notice_types
-        except AttributeError:
-            self.notice_types = ['autoscaling:EC2_INSTANCE_LAUNCH',
-                                 'autoscaling:EC2_INSTANCE_LAUNCH_ERROR',
-                                 'autoscaling:EC2_INSTANCE_TERMINATE',
-                                 'autoscaling:EC2_INSTANCE_TERMINATE_ERROR']
-
-        try:
-            self.policy_type = solution.policy_type
-        except AttributeError:
-            self.policy_type = 'TargetTrackingScaling'
-
-        try:
-            self.est_warmup = solution.est_warmup
-        except AttributeError:
-            self.est_warmup = 90
-
-        try:
-            self.metric = solution.metric
-        except AttributeError:
-            self.metric = 'ASGAverageCPUUtilization'
-
-        try:
-            self.metric_value = solution.metric_value
-        except AttributeError:
-            self.metric_value = 50
-
-        try:
-            self.force_delete = solution.force_delete
-        except AttributeError:
-            self.force_delete = True
-
-        self.autoscale = boto3.client('autoscaling')
+# Settings are read-only attributes of every solution object, e.g. solution.region
+for _setting in SolutionConfig.__slots__:
+    setattr(Solution, _setting, property(operator.attrgetter('config.' + _setting)))
 
 ######################
 # AWS CLOUD SOLUTION
@@ -559,16 +337,14 @@ class AwsSolution(SecureCloudService):
         :return: object
         """
         super().__init__()
-        self.catalog = _DEFS['catalog']
-        self.choices = _DEFS['choices']
-        self.scope = 'vpc-sec-sns-ec2-two'
-        self.name = _DEFS['name']
-
+        settings = {}
         opts = None
         try:
-            opts, args = getopt.getopt(argv, "a:c:dhi:k:m:n:r:s:t:v:w:6",
-                                       ["choice=", "cidr4=", "debug", "help", "image=", "image-type=", "keypair=",
-                                        "maxcount=", "name=", "region=", "sleep=", "tag=", "vpc4", "wanted=", "ip6"])
+            opts, args = getopt.getopt(argv, "a:b:c:dhi:j:k:l:m:n:o:p:r:s:t:v:w:6",
+                                       ["choice=", "backend=", "cidr4=", "debug", "help", "image=", "image-type=",
+                                        "workers=", "keypair=", "journal=", "maxcount=", "name=", "profile=",
+                                        "region=", "resume", "sleep=", "tag=", "trace=", "vpc4", "wanted=",
+                                        "ip6"])
             if not opts:
                 self.usage()
         except getopt.GetoptError as e:
@@ -578,15 +354,18 @@ class AwsSolution(SecureCloudService):
             for opt, arg in opts:
 
                 if opt in ("-a", "--choice",):
-                    self.choice = arg.lower()
-                    if self.choice not in self.choices:
+                    settings['choice'] = arg.lower()
+                    if settings['choice'] not in _DEFS['choices']:
                         self.usage()
 
+                elif opt in ("-b", "--backend"):
+                    settings['backend'] = arg.lower()
+
                 elif opt in ("-c", "--cidr4"):
-                    self.cidr4 = arg
+                    settings['cidr4'] = arg
 
                 elif opt in ("-d", "--debug"):
-                    self.debug = True
+                    settings['debug'] = True
                     import logging
                     log = logging.getLogger('test')
                     log.warning('warn')
@@ -597,43 +376,79 @@ class AwsSolution(SecureCloudService):
                     self.usage()
 
                 elif opt in ("-i", "--image"):
-                    self.ami_id = arg
+                    settings['ami_id'] = arg
+
+                elif opt in ("-j", "--workers"):
+                    settings['workers'] = int(arg)
 
                 elif opt in ("-k", "--key-pair"):
-                    self.key_pair = arg
+                    settings['key_pair'] = arg
+
+                elif opt in ("-l", "--journal"):
+                    settings['journal'] = arg
 
                 elif opt in ("-m", "--max-count"):
-                    self.max_count = arg
+                    settings['max_count'] = arg
 
                 elif opt in ("-n", "--name"):
-                    self.name = arg
+                    settings['name'] = arg
+
+                elif opt in ("-o", "--trace"):
+                    settings['trace'] = arg
+
+                elif opt in ("-p", "--profile"):
+                    settings['profile'] = arg
 
                 elif opt in ("-r", "--region"):
-                    self.region = arg
+                    settings['region'] = arg
+
+                elif opt == "--resume":
+                    settings['resume'] = True
 
                 elif opt in ("-w", "--wanted",):
-                    self.scope = arg.lower()
-                    for service in self.scope.split('-'):
+                    settings['scope'] = arg.lower()
+                    for service in settings['scope'].split('-'):
                         if service not in _DEFS['catalog']:
                             print('Unknown service %s' % service)
                             self.usage()
 
                 elif opt in ("-s", "--sleep"):
-                    self.hibernate = True
+                    settings['hibernate'] = True
 
                 elif opt in ("-t", "--instance-type"):
-                    self.ami_type = arg
+                    settings['ami_type'] = arg
 
                 elif opt in ("-v", "--vpc4"):
-                    self.cidr4_vpc = arg
+                    settings['cidr4_vpc'] = arg
 
                 elif opt in ("-6", "--ip6"):
-                    self.ip6 = True
+                    settings['ip6'] = True
 
                 else:
                     self.usage()
         except getopt.GetoptError as e:
             Solution.fatal(e)
+        self.config = SolutionConfig(**settings)
+        self.asg_name = self.lb_target_group_arn = self.topic_arn = self.name
+
+        try:
+            pool.backend(self.backend)
+        except (ImportError, ValueError) as err:
+            Solution.fatal(err, 'Cannot use the %s backend:' % self.backend)
+        try:
+            trace.output(self.trace)
+        except OSError as err:
+            Solution.fatal(err, 'Cannot write the trace file:')
+        if self.resume and not self.journal:
+            Solution.fatal('--resume', 'Give the journal to resume from with -l, for')
+        try:
+            journal.open_journal(self.journal)
+            if self.resume and not journal.resumable():
+                print('Nothing to resume in %s' % self.journal)
+            if not (self.resume and journal.resumable()):
+                journal.new_run()
+        except OSError as err:
+            Solution.fatal(err, 'Cannot write the journal:')
 
     def usage(self):
         """
@@ -644,10 +459,11 @@ class AwsSolution(SecureCloudService):
     The currently available features are AutoScaling, ELB, VPC, and EC2 services.
 
     ACTIONS
-      -a --choice      %s | %s | %s ]        (default: help)
+      -a --choice      %s | %s | %s | %s ]    (default: help)
     [ -w --wanted      %s %s %s %s %s %s ]   (default: vpc-sec-ec2)""" % (_DEFS['choices'][0],
                                                                           _DEFS['choices'][1],
                                                                           _DEFS['choices'][2],
+                                                                          _DEFS['choices'][3],
                                                                           _DEFS['catalog'][0],
                                                                           _DEFS['catalog'][1],
                                                                           _DEFS['catalog'][2],
@@ -656,12 +472,17 @@ class AwsSolution(SecureCloudService):
                                                                           _DEFS['catalog'][5]))
         print("""
     ARGUMENTS
-        [ -c --cidr4       <value> ]    IPv4 Child Cidrs   (default: %s)""" % _DEFS['cidr4'])
+        [ -b --backend     <value> ]    threads | async    (default: %s)""" % _DEFS['backend'])
+        print("""        [ -c --cidr4       <value> ]    IPv4 Child Cidrs   (default: %s)""" % _DEFS['cidr4'])
         print("""        [ -i --image       <value> ]    Image ID           (default: %s)""" % _DEFS['ami_id'])
         print("""        [ -y --image-type  <value> ]    Instance Type      (default: %s)""" % _DEFS['ami_type'])
+        print("""        [ -j --workers     <value> ]    Parallel API calls (default: %s)""" % _DEFS['workers'])
         print("""        [ -k --keypair     <value> ]    Key Pair name      (default: %s)""" % _DEFS['key_pair'])
+        print("""        [ -l --journal     <file> ]     State journal      (default: %s)""" % _DEFS['journal'])
         print("""        [ -m --maxcount    <value> ]    Max instances      (default: %s)""" % _DEFS['max_count'])
         print("""        [ -n --name        <value> ]    Name / Tag Key     (default: %s)""" % _DEFS['name'])
+        print("""        [ -o --trace       <file> ]     JSON-lines trace   (default: %s)""" % _DEFS['trace'])
+        print("""        [ -p --profile     <value> ]    Credentials profile (default: %s)""" % _DEFS['profile'])
         print("""        [ -r --region      <value> ]    Cloud Region       (default: %s)""" % _DEFS['region'])
         print("""        [ -s --sleep       <Boolean> ]  Hibernate          (default: %s)""" % _DEFS['hibernate'])
         print("""        [ -t --tag         <value> ]    Tag value          (default: %s)""" % _DEFS['tag'])
@@ -670,7 +491,8 @@ class AwsSolution(SecureCloudService):
     FLAGS
         [ -6 --ip6 ]                    Use IpV6           (default: %s)
         [ -d --debug ]
-        [ -h --help ]\n""" % self.ip6)
+        [ -h --help ]
+        [ --resume ]                    Resume last start  (default: %s)\n""" % (self.ip6, _DEFS['resume']))
 
         sys.exit(2)
 
@@ -688,44 +510,59 @@ class Vpc(SecureCloudService):
         super().__init__(solution)
         if message:
             self.console(message)
+        self.step('vpc', Vpc.create)
 
-        self.vpc = client.Vpc(self)
-        if self.vpc.response and 'Vpc' in self.vpc.response and 'VpcId' in self.vpc.response['Vpc']:
-            self.vpc_id = self.vpc.response['Vpc']['VpcId']
+    @staticmethod
+    def create(self):
+        """
+        Create the VPC
+        """
+        resource = client.Vpc(self)
+        if resource.response and 'Vpc' in resource.response and 'VpcId' in resource.response['Vpc']:
+            self.vpc_id = resource.response['Vpc']['VpcId']
             self.vpc_ids.append(self.vpc_id)
         else:
             Solution.fatal()
 
+    @staticmethod
+    def reconcile(solution, found, message='Reconcile the Virtual Private Cloud'):
+        """
+        Adopt the (first) tagged VPC in inventory 'found', or create one if there is none
+        :return: object
+        """
+        vpcs = found.get('vpcs', key=solution.name, value=solution.tag)
+        if not vpcs:
+            return Vpc(solution, message)
+        solution.console(message)
+        print('Found VPC %s' % vpcs[0]['VpcId'])
+        return solution.fork(vpc_id=vpcs[0]['VpcId'], vpc_ids=[vpcs[0]['VpcId']])
+
     def clean(self, message=None):
         """
         Teardown VPC, Endpoints, and Peering Connection Endpoints
         """
-        self.client = boto3.client('ec2')
         if message:
             self.console(message)
 
-        inventory = self.vpc.list(self)
-        if inventory and "Vpcs" in inventory and inventory['Vpcs']:
-            for vpc in inventory['Vpcs']:
-                self.vpc_id = vpc['VpcId']
-                print('Found: %s' % self.vpc_id)
-
-                # VPC ENDPOINTS
-                inventory = client.VpcEndpoint.list(self.vpc, 'vpc-id', self.vpc.vpc_id)
-                if inventory and 'VpcEndpoints' in inventory and inventory['VpcEndpoints']:
-                    for endpoint in inventory['VpcEndpoints']:
-                        client.VpcEndpoint.delete(self.vpc, endpoint['VpcEndpointId'])
-                elif not self.vpc.dry:
-                    print('No vpc endpoints detected')
-
-                # VPC PEERING CONNECTION ENDPOINTS
-                inventory = client.VpcPeeringConnection.list(self.vpc)
-                if 'VpcPeeringConnections' in inventory and inventory['VpcPeeringConnections']:
-                    for endpoint in inventory['VpcPeeringConnections']:
-                        client.VpcPeeringConnection.delete(self.vpc, endpoint['VpcPeeringConnectionId'])
-                elif not self.vpc.dry:
-                    print('No vpc connection items detected')
-                client.Vpc.delete(self)
+        found = inventory.Inventory(self, ('vpcs', 'vpc_endpoints', 'vpc_peering_connections'))
+        for vpc in found.get('vpcs', key=self.name, value=self.tag):
+            self.vpc_id = vpc['VpcId']
+            print('Found: %s' % self.vpc_id)
+
+            # VPC ENDPOINTS
+            endpoints = found.get('vpc_endpoints', self.vpc_id)
+            for endpoint in endpoints:
+                client.VpcEndpoint.delete(self, endpoint['VpcEndpointId'])
+            if not endpoints and not self.dry:
+                print('No vpc endpoints detected')
+
+            # VPC PEERING CONNECTION ENDPOINTS
+            endpoints = found.get('vpc_peering_connections', self.vpc_id, self.name, self.tag)
+            for endpoint in endpoints:
+                client.VpcPeeringConnection.delete(self, endpoint['VpcPeeringConnectionId'])
+            if not endpoints and not self.dry:
+                print('No vpc connection items detected')
+            client.Vpc.delete(self)
 
 
 class SecurityGroup(SecureCloudService):
@@ -741,16 +578,17 @@ class SecurityGroup(SecureCloudService):
         super().__init__(solution)
         if message:
             self.console(message)
+        self.step('security_group', SecurityGroup.create)
 
+    @staticmethod
+    def create(self):
+        """
+        Create the security group of self.vpc_id and grant its rules
+        """
         resource = client.SecurityGroup(self)
         if resource.response and 'GroupId' in resource.response and resource.response['GroupId']:
             self.sg_id = resource.response['GroupId']
-            resource.auth_ingress(self, 22, 22, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
-            resource.auth_egress(self, 22, 22, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
-            resource.auth_ingress(self, 80, 80, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
-            resource.auth_egress(self, 80, 80, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
-            resource.auth_ingress(self, 443, 443, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
-            resource.auth_egress(self, 443, 443, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
+            resource.authorize(self, SecurityGroup.rules(self))
 
             inventory = client.SecurityGroup.list(self, 'vpc-id', self.vpc_id)
             if inventory and "SecurityGroups" in inventory and inventory['SecurityGroups']:
@@ -759,104 +597,84 @@ class SecurityGroup(SecureCloudService):
         else:
             Solution.fatal()
 
+    @staticmethod
+    def rules(self):
+        """
+        Ingress and egress rules every solution security group grants
+        """
+        rules = client.SecurityGroupRules()
+        for port in (22, 80, 443):
+            rules.add(port, port, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}])
+            rules.add(port, port, 'TCP', [{'CidrIp': self.any_ip4}], [{'CidrIpv6': self.any_ip6}], egress=True)
+        return rules
+
+    @staticmethod
+    def reconcile(solution, found, message=None):
+        """
+        Adopt the tagged security group of solution.vpc_id and grant only its missing rules,
+        or create it if there is none
+        :return: object
+        """
+        groups = found.get('security_groups', solution.vpc_id, solution.name, solution.tag)
+        if not groups:
+            return SecurityGroup(solution, message)
+        solution.console(message)
+        self = solution.fork(sg_id=groups[0]['GroupId'],
+                             sg_ids=[item['GroupId'] for item in found.get('security_groups', solution.vpc_id)])
+        print('Found security group %s' % self.sg_id)
+        existing = client.SecurityGroupRules().load(groups[0])
+        client.SecurityGroup.authorize(self, SecurityGroup.rules(self).missing(existing))
+        return self
+
     def clean(self, message='Teardown Security Group'):
         """
         Teardown Security Groups
         """
-        self.client = boto3.client('ec2')
         if message:
             self.console(message)
 
-        inventory = client.SecurityGroup.list(self)
-        if inventory and "SecurityGroups" in inventory and inventory['SecurityGroups']:
-            for item in inventory['SecurityGroups']:
-                self.sg_id = item['GroupId']
-
-                # INGRESS
-                for perm in item['IpPermissions']:
-                    if perm['IpRanges'] and 'FromPort' in perm:
-                        for c in perm['IpRanges']:
-                            if 'CidrIp' in c:
-                                client.SecurityGroup.revoke_ingress(self, perm['FromPort'], perm['ToPort'],
-                                                                    perm['IpProtocol'], [{'CidrIp': c['CidrIp']}])
-                    if perm['Ipv6Ranges'] and 'FromPort' in perm:
-                        for c in perm['Ipv6Ranges']:
-                            if 'CidrIpv6' in c:
-                                client.SecurityGroup.revoke_ingress(self, perm['FromPort'], perm['ToPort'],
-                                                                    perm['IpProtocol'], [{'CidrIp': ''}],
-                                                                    [{'CidrIpv6': c['CidrIpv6']}])
-                # EGRESS
-                for perm in item['IpPermissionsEgress']:
-                    if perm['IpRanges'] and 'FromPort' in perm:
-                        for c in perm['IpRanges']:
-                            if 'CidrIp' in c:
-                                client.SecurityGroup.revoke_egress(self, perm['FromPort'], perm['ToPort'],
-                                                                   perm['IpProtocol'], [{'CidrIp': c['CidrIp']}])
-                    if perm['Ipv6Ranges'] and 'FromPort' in perm:
-                        for c in perm['Ipv6Ranges']:
-                            if 'CidrIpv6' in c:
-                                client.SecurityGroup.revoke_egress(self, perm['FromPort'], perm['ToPort'],
-                                                                   perm['IpProtocol'], [{'CidrIp': ''}],
-                                                                   [{'CidrIpv6': c['CidrIpv6']}])
-
-                # REFERENCING SECURITY GROUPS
-                refs = client.SecurityGroup.list_refs(self, self.sg_id)
-                if refs and "SecurityGroupReferenceSet" in refs and refs['SecurityGroupReferenceSet']:
-                    for ref in refs['SecurityGroupReferenceSet']:
-
-                        # VPC ON OTHER SIDE OF A VPC-PEERING-CONNECTION
-                        for sgs in client.SecurityGroup.list(self, 'vpc-id', [ref[0]['ReferencingVpcId']]):
-                            for sg in sgs['SecurityGroups']:
-                                self.sg_id = sg['GroupId']
-
-                                # INGRESS
-                                for perm in sg['IpPermissions']:
-                                    if perm['IpRanges'] and 'FromPort' in perm and perm['FromPort']:
-                                        for c in perm['IpRanges']:
-                                            if 'CidrIp' in c:
-                                                client.SecurityGroup.revoke_ingress(self, perm['FromPort'],
-                                                                                    perm['ToPort'], perm['IpProtocol'],
-                                                                                    [{'CidrIp': c['CidrIp']}])
-                                    if perm['Ipv6Ranges'] and 'FromPort' in perm and perm['FromPort']:
-                                        for c in perm['Ipv6Ranges']:
-                                            if 'CidrIpv6' in c:
-                                                client.SecurityGroup.revoke_ingress(self, perm['FromPort'],
-                                                                                    perm['ToPort'], perm['IpProtocol'],
-                                                                                    [{'CidrIp': ''}],
-                                                                                    [{'CidrIpv6': c['CidrIpv6']}])
-                                # EGRESS
-                                for perm in sg['IpPermissionsEgress']:
-                                    if perm['IpRanges'] and 'FromPort' in perm and perm['FromPort']:
-                                        for c in perm['IpRanges']:
-                                            if 'CidrIp' in c:
-                                                client.SecurityGroup.revoke_egress(self, perm['FromPort'],
-                                                                                   perm['ToPort'], perm['IpProtocol'],
-                                                                                   [{'CidrIp': c['CidrIp']}])
-                                    if perm['Ipv6Ranges'] and 'FromPort' in perm and perm['FromPort']:
-                                        for c in perm['Ipv6Ranges']:
-                                            if 'CidrIpv6' in c:
-                                                client.SecurityGroup.revoke_egress(self, perm['FromPort'],
-                                                                                   perm['ToPort'], perm['IpProtocol'],
-                                                                                   [{'CidrIp': ''}],
-                                                                                   [{'CidrIpv6': c['CidrIp']}])
-
-                                # DELETE NON-DEFAULT REFERENCING SG
-                                if sg['GroupName'] != 'default':
-                                    print('Deleting referencing security group %s' % sg)
-                                    self.sg_id = sg
-                                    client.SecurityGroup.delete(self)
-
-                elif not self.dry:
-                    print('No referencing security groups detected')
-
-                # DELETE NON-DEFAULT SG
-                if item['GroupName'] != 'default':
-                    self.sg_id = item['GroupId']
-                    print('Deleting security group %s' % self.sg_id)
-                    client.SecurityGroup.delete(self)
-        elif not self.dry:
+        groups = inventory.Inventory(self, ('security_groups',)).get('security_groups', key=self.name, value=self.tag)
+        for item in groups:
+            SecurityGroup.teardown(self, item)
+        if not groups and not self.dry:
             print('No security groups detected')
 
+    @staticmethod
+    def teardown(self, item):
+        """
+        Revoke rules and references of one security group then delete it
+        """
+        self.sg_id = item['GroupId']
+
+        # INGRESS AND EGRESS
+        client.SecurityGroup.revoke(self, client.SecurityGroupRules().load(item))
+
+        # REFERENCING SECURITY GROUPS
+        refs = client.SecurityGroup.list_refs(self, self.sg_id)
+        if refs and "SecurityGroupReferenceSet" in refs and refs['SecurityGroupReferenceSet']:
+            for ref in refs['SecurityGroupReferenceSet']:
+
+                # VPC ON OTHER SIDE OF A VPC-PEERING-CONNECTION
+                for sgs in client.SecurityGroup.list(self, 'vpc-id', [ref[0]['ReferencingVpcId']]):
+                    for sg in sgs['SecurityGroups']:
+                        self.sg_id = sg['GroupId']
+                        client.SecurityGroup.revoke(self, client.SecurityGroupRules().load(sg))
+
+                        # DELETE NON-DEFAULT REFERENCING SG
+                        if sg['GroupName'] != 'default':
+                            print('Deleting referencing security group %s' % sg)
+                            self.sg_id = sg
+                            client.SecurityGroup.delete(self)
+
+        elif not self.dry:
+            print('No referencing security groups detected')
+
+        # DELETE NON-DEFAULT SG
+        if item['GroupName'] != 'default':
+            self.sg_id = item['GroupId']
+            print('Deleting security group %s' % self.sg_id)
+            client.SecurityGroup.delete(self)
+
 
 class Ec2(SecureCloudService):
     """
@@ -876,245 +694,492 @@ class Ec2(SecureCloudService):
             self.console('Error: Compute needs VPC and SecurityGroup')
             Solution.fatal()
 
-        # INTERNET GATEWAY
+        # INTERNET GATEWAY AND ROUTE TABLE
+        if self.step('internet_gateway', Ec2.create_internet_gateway):
+            self.rtt_ids = []
+            self.step('route_table', Ec2.create_route_table)
+
+        # SUBNETS, NETWORK ACLS, LAUNCH TEMPLATE VERSIONS AND INSTANCES, PER ZONE
+        # Note: cidr's must be subset of VPC cidr_block
+        # Zones are independent, so each runs its own pipeline on a copy of this solution and
+        # the ids are gathered back in zone order once every pipeline is done.
+        self.template_id = None
+        self.template_ids = []
+        pipelines = [self.fork(subnet_ids=[], acl_ids=[], template_ids=[], instance_ids=[]) for _ in self.cidr4]
+        build = graph.TaskGraph(self.workers)
+        build.add('template', Ec2.step, self, 'template', Ec2.create_template)
+        for i, pipeline in enumerate(pipelines):
+            build.add('network%d' % i, Ec2.step, pipeline, 'network%d' % i, Ec2.create_zone_network, i)
+            build.add('compute%d' % i, Ec2.step, pipeline, 'compute%d' % i, Ec2.create_zone_compute, i, self,
+                      after=('template', 'network%d' % i))
+        build.run()
+
+        self.subnet_ids = [subnet_id for pipeline in pipelines for subnet_id in pipeline.subnet_ids]
+        self.acl_ids = [acl_id for pipeline in pipelines for acl_id in pipeline.acl_ids]
+        self.template_ids += [template_id for pipeline in pipelines for template_id in pipeline.template_ids]
+        self.instance_ids = [instance_id for pipeline in pipelines for instance_id in pipeline.instance_ids]
+        if self.subnet_ids:
+            self.subnet_id = self.subnet_ids[-1]
+        if self.acl_ids:
+            self.acl_id = self.acl_ids[-1]
+        if self.template_ids:
+            self.template_id = self.template_ids[-1]
+        if self.instance_ids:
+            self.instance_id = self.instance_ids[-1]
+
+        # ELASTIC IP
+        if self.template_ids and 'eip' in self.scope and 'autoscaling' not in self.scope:
+            self.step('elastic_ips', Ec2.create_elastic_ips)
+
+    @staticmethod
+    def create_elastic_ips(self):
+        """
+        Allocate an elastic ip per instance and associate it
+        """
+        self.eip_ids = []
+        self.nat_gw_ids = []
+        for k in range(self.max_count*len(self.zones)):
+            resource = client.ElasticIp(self, 'vpc')
+            if resource.response and 'AllocationId' in resource.response:
+                self.eip_id = resource.response['AllocationId']
+                self.eip_ids.append(self.eip_id)
+                client.ElasticIp.associate(self, self.instance_ids[k], self.eip_ids[k])
+            else:
+                print('failed to create elastic IP (try "-d" param to debug')
+
+    @staticmethod
+    def create_internet_gateway(self):
+        """
+        Create an internet gateway and attach it to self.vpc_id
+        :return: gateway id or None
+        """
         resource = client.InternetGateway(self)
         if resource.response and 'InternetGateway' in resource.response:
             self.igw_id = resource.response['InternetGateway']['InternetGatewayId']
             self.igw_ids.append(self.igw_id)
             resource.attach(self)
+            return self.igw_id
+        return None
 
-            # ROUTE TABLE
-            self.rtt_ids = []
-            resource = client.RouteTable(self)
-            if resource.response and 'RouteTable' in resource.response and resource.response['RouteTable']:
-                self.rtt_id = resource.response['RouteTable']['RouteTableId']
-                self.rtt_ids.append(self.rtt_id)
-                if self.ip4:
-                    resource.create_route(self, 'ip4', self.any_ip4)
-                if self.ip6:
-                    resource.create_route(self, 'ip6', self.any_ip6)
-
-        # SUBNETS
-        # Note: cidr's must be subset of VPC cidr_block
-        self.subnet_ids = []
-        self.acl_ids = []
-        for i in range(len(self.cidr4)):
-            subnet = client.Subnet(self, self.cidr4[i], self.zones[i])
-            if subnet.response and 'Subnet' in subnet.response:
-                self.subnet_id = subnet.response['Subnet']['SubnetId']
-                self.subnet_ids.append(self.subnet_id)
-                subnet.modify_attr(self, self.subnet_id, True)
+    @staticmethod
+    def create_route_table(self):
+        """
+        Create a route table routing all traffic to self.igw_id
+        """
+        resource = client.RouteTable(self)
+        if resource.response and 'RouteTable' in resource.response and resource.response['RouteTable']:
+            self.rtt_id = resource.response['RouteTable']['RouteTableId']
+            self.rtt_ids.append(self.rtt_id)
+            if self.ip4:
+                resource.create_route(self, 'ip4', self.any_ip4)
+            if self.ip6:
+                resource.create_route(self, 'ip6', self.any_ip6)
 
-                # ROUTE TABLE ASSOCIATIONS
-                for j in range(len(self.rtt_ids)):
-                    self.rtt_id = self.rtt_ids[j]
-                    client.RouteTable.associate(self, self.subnet_id)
+    @staticmethod
+    def create_template(self):
+        """
+        Create the launch template shared by every zone
+        """
+        resource = client.LaunchTemplate(self)
+        if resource.response and 'LaunchTemplate' in resource.response:
+            self.template_id = resource.response['LaunchTemplate']['LaunchTemplateId']
+            self.template_ids.append(self.template_id)
 
-            # NETWORK ACL
-            acl = client.NetworkAcl(self)
-            if acl.response and 'NetworkAcl' in acl.response:
-                self.acl_id = acl.response['NetworkAcl']['NetworkAclId']
-                self.acl_ids.append(self.acl_id)
-                acl.create_entry(self, self.cidr4[i], 100, 'allow', 0, 0, '6', False)
-                acl.create_entry(self, self.cidr4[i], 101, 'allow', 0, 0, '6', True)
+    @staticmethod
+    def create_zone_network(self, i):
+        """
+        Create the subnet of zone i, route it, and guard it with its own network ACL
+        """
+        Ec2.create_zone_subnet(self, i)
+        Ec2.create_zone_acl(self, i)
+
+    @staticmethod
+    def create_zone_subnet(self, i):
+        """
+        Create the subnet of zone i and associate it with every route table
+        """
+        subnet = client.Subnet(self, self.cidr4[i], self.zones[i])
+        if subnet.response and 'Subnet' in subnet.response:
+            self.subnet_id = subnet.response['Subnet']['SubnetId']
+            self.subnet_ids.append(self.subnet_id)
+            subnet.modify_attr(self, self.subnet_id, True)
 
-                # NETWORK ACL ASSOCIATION
-                if acl.response['NetworkAcl']['Associations']:
-                    assoc_id = acl.response['NetworkAcl']['Associations'][i]['NetworkAclAssociationId']
-                    client.NetworkAcl.replace_association(self, assoc_id)
+            # ROUTE TABLE ASSOCIATIONS
+            for j in range(len(self.rtt_ids)):
+                self.rtt_id = self.rtt_ids[j]
+                client.RouteTable.associate(self, self.subnet_id)
 
-        # LAUNCH TEMPLATE
-        self.template_ids = []
-        self.instance_ids = []
-        resource2 = client.LaunchTemplate(self)
-        if resource2.response and 'LaunchTemplate' in resource2.response:
-            self.template_id = resource2.response['LaunchTemplate']['LaunchTemplateId']
+    @staticmethod
+    def create_zone_acl(self, i):
+        """
+        Create the network ACL of zone i
+        """
+        acl = client.NetworkAcl(self)
+        if acl.response and 'NetworkAcl' in acl.response:
+            self.acl_id = acl.response['NetworkAcl']['NetworkAclId']
+            self.acl_ids.append(self.acl_id)
+            acl.create_entry(self, self.cidr4[i], 100, 'allow', 0, 0, '6', False)
+            acl.create_entry(self, self.cidr4[i], 101, 'allow', 0, 0, '6', True)
+
+            # NETWORK ACL ASSOCIATION
+            if acl.response['NetworkAcl']['Associations']:
+                assoc_id = acl.response['NetworkAcl']['Associations'][i]['NetworkAclAssociationId']
+                client.NetworkAcl.replace_association(self, assoc_id)
+
+    @staticmethod
+    def create_zone_compute(self, j, solution):
+        """
+        Create the launch template version of zone j and, unless autoscaling owns them, its instances
+        """
+        if not solution.template_id:
+            return
+        self.template_id = solution.template_id
+        resource3 = client.LaunchTemplate.create_version(self, j, self.zones[j])
+        if resource3 and 'LaunchTemplateVersion' in resource3:
+            self.template_id = resource3['LaunchTemplateVersion']['LaunchTemplateId']
             self.template_ids.append(self.template_id)
 
-            # LAUNCH TEMPLATE VERSION PER ZONE
-            for j in range(len(self.zones)):
-                resource3 = resource2.create_version(self, j, self.zones[j])
-                if resource3 and 'LaunchTemplateVersion' in resource3:
-                    self.template_id = resource3['LaunchTemplateVersion']['LaunchTemplateId']
-                    self.template_ids.append(self.template_id)
-
-                    ################
-                    # EC2 INSTANCE
-                    ###############
-                    if 'ec2' in self.scope and 'autoscaling' not in self.scope:
-                        print('Startup EC2 Instance group %d' % j)
-                        resource4 = client.Instance(self, self.template_ids[j], self.subnet_ids[j], self.zones[j])
-                        if resource4:
-                            for k in range(self.max_count):
-                                self.instance_id = resource4.response[k].id
-                                self.instance_ids.append(self.instance_id)
-
-                                if 'eip' in self.scope:
-                                    print('Wait until running ...')
-                                    instance = self.compute.Instance(self.instance_id)
-                                    instance.wait_until_running(Filters=[{'Name': 'instance-id',
-                                                                          'Values': [self.instance_id]}],
-                                                                DryRun=self.dry)
-                                    print('created Instance %s' % self.instance_id)
-                                else:
-                                    print('initialized Instance %s' % self.instance_id)
-
-            # ELASTIC IP
-            if 'eip' in self.scope and 'autoscaling' not in self.scope:
-                self.eip_ids = []
-                self.nat_gw_ids = []
-                for k in range(self.max_count*len(self.zones)):
-                    resource = client.ElasticIp(self, 'vpc')
-                    if resource.response and 'AllocationId' in resource.response:
-                        self.eip_id = resource.response['AllocationId']
-                        self.eip_ids.append(self.eip_id)
-                        client.ElasticIp.associate(self, self.instance_ids[k], self.eip_ids[k])
-                    else:
-                        print('failed to create elastic IP (try "-d" param to debug')
+            ################
+            # EC2 INSTANCE
+            ###############
+            if 'ec2' in self.scope and 'autoscaling' not in self.scope and self.subnet_ids:
+                print('Startup EC2 Instance group %d' % j)
+                resource4 = client.Instance(self, self.template_id, self.subnet_id, self.zones[j])
+                if resource4:
+                    for k in range(self.max_count):
+                        self.instance_id = resource4.response[k].id
+                        self.instance_ids.append(self.instance_id)
+
+                        if 'eip' in self.scope:
+                            print('Wait until running ...')
+                            instance = self.compute.Instance(self.instance_id)
+                            instance.wait_until_running(Filters=[{'Name': 'instance-id',
+                                                                  'Values': [self.instance_id]}],
+                                                        DryRun=self.dry)
+                            print('created Instance %s' % self.instance_id)
+                        else:
+                            print('initialized Instance %s' % self.instance_id)
+
+    @staticmethod
+    def reconcile(solution, found, message='Reconcile the EC2 compute environment'):
+        """
+        Diff the resources of solution.vpc_id in inventory 'found' against the desired topology
+        (one routed subnet and network ACL per cidr4/zone, launch template versions per zone,
+        max_count instances per zone) and create or fix only what is missing
+        :return: object
+        """
+        if not found.get('vpcs', solution.vpc_id):
+            return Ec2(solution, message)
+        solution.console(message)
+        self = solution.fork(igw_ids=[], rtt_ids=[], subnet_ids=[], acl_ids=[], template_ids=[], instance_ids=[])
+
+        # INTERNET GATEWAY
+        gateways = found.get('internet_gateways', self.vpc_id)
+        if gateways:
+            self.igw_id = gateways[0]['InternetGatewayId']
+            self.igw_ids.append(self.igw_id)
+        else:
+            Ec2.create_internet_gateway(self)
+
+        # ROUTE TABLE AND ROUTES
+        tables = [item for item in found.get('route_tables', self.vpc_id, self.name, self.tag)
+                  if not any(association.get('Main') for association in item.get('Associations', ()))]
+        if tables:
+            self.rtt_id = tables[0]['RouteTableId']
+            self.rtt_ids.append(self.rtt_id)
+            routes = [route.get('DestinationCidrBlock', route.get('DestinationIpv6CidrBlock'))
+                      for route in tables[0].get('Routes', ())]
+            if self.ip4 and self.any_ip4 not in routes:
+                client.RouteTable.create_route(self, 'ip4', self.any_ip4)
+            if self.ip6 and self.any_ip6 not in routes:
+                client.RouteTable.create_route(self, 'ip6', self.any_ip6)
+        elif self.igw_id:
+            Ec2.create_route_table(self)
+        routed = [association.get('SubnetId') for item in tables[:1] for association in item.get('Associations', ())]
+
+        # SUBNETS AND NETWORK ACLS, PER ZONE
+        subnets = dict((item['CidrBlock'], item) for item in found.get('subnets', self.vpc_id))
+        acls = found.get('network_acls', self.vpc_id, self.name, self.tag)
+        zone_subnets = {}
+        for i, cidr in enumerate(self.cidr4):
+            if cidr in subnets:
+                self.subnet_id = subnets[cidr]['SubnetId']
+                self.subnet_ids.append(self.subnet_id)
+                if not subnets[cidr].get('MapPublicIpOnLaunch'):
+                    client.Subnet.modify_attr(self, self.subnet_id, True)
+                if self.rtt_id and self.subnet_id not in routed:
+                    client.RouteTable.associate(self, self.subnet_id)
+            else:
+                Ec2.create_zone_subnet(self, i)
+            if self.subnet_ids and self.subnet_ids[-1] not in zone_subnets.values():
+                zone_subnets[i] = self.subnet_ids[-1]
+
+            guards = [item['NetworkAclId'] for item in acls
+                      if any(entry.get('CidrBlock') == cidr for entry in item.get('Entries', ()))]
+            if guards:
+                self.acl_id = guards[0]
+                self.acl_ids.append(self.acl_id)
+            else:
+                Ec2.create_zone_acl(self, i)
+
+        # LAUNCH TEMPLATE AND ITS VERSION PER ZONE
+        templates = found.get('launch_templates', key=self.name, value=self.tag)
+        if templates:
+            self.template_id = templates[0]['LaunchTemplateId']
+            self.template_ids.append(self.template_id)
+            versions = templates[0].get('LatestVersionNumber', 1)
+        else:
+            Ec2.create_template(self)
+            versions = 1
+        for j in range(len(self.cidr4)):
+            if self.template_id and versions < j + 2:
+                client.LaunchTemplate.create_version(self, j, self.zones[j])
+
+        # EC2 INSTANCES, TOPPED UP TO MAX_COUNT PER ZONE
+        if 'ec2' in self.scope and 'autoscaling' not in self.scope and self.template_id:
+            instances = found.get('instances', self.vpc_id, self.name, self.tag)
+            for j, subnet_id in sorted(zone_subnets.items()):
+                running = [item['InstanceId'] for item in instances if item.get('SubnetId') == subnet_id]
+                self.instance_ids += running
+                missing = int(self.max_count) - len(running)
+                if missing > 0:
+                    print('Startup %d EC2 instances in zone %d' % (missing, j))
+                    launch = self.fork(max_count=missing, min_count=min(self.min_count, missing))
+                    resource = client.Instance(launch, self.template_id, subnet_id, self.zones[j],
+                                               '+'.join(sorted(running)))
+                    if resource.response:
+                        self.instance_ids += [instance.id for instance in resource.response]
+            if self.instance_ids:
+                self.instance_id = self.instance_ids[-1]
+        return self
 
     def clean(self, message='Teardown EC2 infrastructure'):
         """
         Teardown EC2 Infrastructure
+        Each resource type is described once for the region and indexed by vpc, then each
+        VPC is modelled as a dependency graph of resource types so independent deletions
+        (across and within VPCs) run concurrently on self.workers threads. VPC scoped types
+        are only described in the VPCs the journal recorded, unless it has drifted.
         """
-        self.client = boto3.client('ec2')
         if message:
             self.console(message)
 
-        inventory = client.Vpc.list(self)
-        if inventory and "Vpcs" in inventory and inventory['Vpcs']:
-            for vpc in inventory['Vpcs']:
-                self.vpc_id = vpc['VpcId']
-
-                # EC2 INSTANCES
-                self.instance_ids = []
-                inventory = client.Instance.list(self)
-                if inventory and "Reservations" in inventory and inventory['Reservations']:
-                    for i in range(len(inventory['Reservations'])):
-                        for instance in inventory['Reservations'][i]['Instances']:
-                            self.instance_id = instance['InstanceId']
-                            client.Instance.delete(self)
-                elif not self.dry:
-                    print('No ec2 instances detected')
-
-                # ELASTIC IPS
-                elastic_ips = client.ElasticIp.list(self)
-                if elastic_ips and "Addresses" in elastic_ips and elastic_ips['Addresses']:
-                    for ip in elastic_ips['Addresses']:
-                        if 'AssociationId' in ip and ip['AssociationId'] != '-':
-                            client.ElasticIp.disassociate(self, ip['AllocationId'])
-                        client.ElasticIp.release(self, ip['AllocationId'])
-                elif not self.dry:
-                    print('No elastic ips detected')
-
-                # LAUNCH TEMPLATES
-                inventory = client.LaunchTemplate.list(self)
-                if inventory and 'LaunchTemplates' in inventory and inventory['LaunchTemplates']:
-                    for i in range(len(inventory['LaunchTemplates'])):
-                        self.template_id = inventory['LaunchTemplates'][i]['LaunchTemplateId']
-
-                        # CHILD VERSIONS
-                        versions = client.LaunchTemplate.list_versions(self)
-                        if versions:
-                            for version in versions['LaunchTemplateVersions']:
-                                client.LaunchTemplate.delete_version(self, version['VersionNumber'])
-                        else:
-                            print('No launch template versions detected')
-
-                        # DELETE TEMPLATE
-                        client.LaunchTemplate.delete(self)
-
-                elif not self.dry:
-                    print('No launch templates detected')
-
-                # NETWORK INTERFACES
-                inventory = client.NetworkInterface.list(self)
-                if inventory and "NetworkInterfaces" in inventory and inventory['NetworkInterfaces']:
-                    for item in inventory['NetworkInterfaces']:
-                        client.NetworkInterface.delete(self, item['NetworkInterfaceId'])
-                    print('wait for deletion ...')
-                    while True:
-                        inventory = client.NetworkInterface.list(self)
-                        if "NetworkInterfaces" in inventory and inventory['NetworkInterfaces']:
-                            time.sleep(1)
-                        else:
-                            break
-                elif not self.dry:
-                    print('No network interfaces detected')
-
-                # INTERNET GATEWAY
-                time.sleep(10)
-                inventory = client.InternetGateway.list(self, 'attachment.vpc-id', vpc['VpcId'])
-                if inventory and "InternetGateways" in inventory and inventory['InternetGateways']:
-                    for item in inventory['InternetGateways']:
-                        time.sleep(20)
-                        client.InternetGateway.detach(self, item['InternetGatewayId'], vpc['VpcId'])
-                        time.sleep(20)
-                        client.InternetGateway.delete(self, item['InternetGatewayId'])
-                elif not self.dry:
-                    print('No internet gateways detected')
-
-                # SUBNET
-                self.subnet_ids = []
-                inventory = client.Subnet.list(self)
-                if inventory and "Subnets" in inventory and inventory['Subnets']:
-                    for item in inventory['Subnets']:
-                        self.subnet_id = item['SubnetId']
-                        self.subnet_ids.append(self.subnet_id)
-                        client.Subnet.delete(self)
-                elif not self.dry:
-                    print('No subnets detected')
-
-                # ROUTE TABLES
-                inventory = client.RouteTable.list(self, 'vpc-id', vpc['VpcId'])
-                if inventory and "RouteTables" in inventory and inventory['RouteTables']:
-                    for item in inventory['RouteTables']:
-                        if item['Associations']:
-                            if item['Associations'][0]['Main']:
-                                print('Skipping main route table')
-                            else:
-                                client.RouteTable.disassociate(self, item['Associations'][0]['RouteTableAssociationId'])
-                                client.RouteTable.delete_route(self, self.any_ip4, item['RouteTableId'])
-                                for cidr in self.cidr4:
-                                    client.RouteTable.delete_route(self, cidr, item['RouteTableId'])
-                                if self.ip6:
-                                    client.RouteTable.delete_route(self, self.any_ip6, item['RouteTableId'])
-                                    for cidr in self.cidr6:
-                                        client.RouteTable.delete_route(self, cidr, item['RouteTableId'])
-                                client.RouteTable.delete(self, item['RouteTableId'])
-                        else:
-                            client.RouteTable.delete(self, item['RouteTableId'])
-                elif not self.dry:
-                    print('No route tables detected')
-
-                # NAT GATEWAY
-                inventory = client.NatGateway.list(self)
-                if inventory and "NatGateways" in inventory and inventory['NatGateways']:
-                    for ngw in inventory['NatGateways']:
-                        client.NatGateway.delete(self, ngw['NatGatewayId'])
-                elif not self.dry:
-                    print('No nat gateways detected')
-
-                # NETWORK ACL
-                inventory = client.NetworkAcl.list(self)
-                if inventory and "NetworkAcls" in inventory and inventory['NetworkAcls']:
-                    for item in inventory['NetworkAcls']:
-                        client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 101, False)
-                        client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 101, True)
-                        client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 102, False)
-                        client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 102, True)
-                        client.NetworkAcl.delete(self, item['NetworkAclId'])
-                elif not self.dry:
-                    print('No network acls detected')
-
-                # WE NEED TO DELETE SECURITY GROUP SO VPC CAN GO
-                # MAYBE DISASSOCIATE_SG IS ALTERNATIVE WAY
-                SecurityGroup.clean(self)   # intended
-
-                print('\nTeardown VPC')
-                client.Vpc.delete(self)
+        self.inventory = inventory.Inventory(self, ('vpcs', 'instances', 'addresses', 'launch_templates',
+                                                    'nat_gateways', 'network_interfaces', 'internet_gateways',
+                                                    'subnets', 'route_tables', 'network_acls', 'security_groups'),
+                                             Ec2.journaled(self))
+        teardown = graph.TaskGraph(self.workers)
+
+        # NOT SCOPED BY VPC
+        teardown.add('instances', Ec2.clean_instances, self.fork())
+        teardown.add('eips', Ec2.clean_elastic_ips, self.fork(), after=('instances',))
+        teardown.add('templates', Ec2.clean_launch_templates, self.fork(), after=('instances',))
+
+        vpcs = self.inventory.get('vpcs', key=self.name, value=self.tag)
+        for vpc in vpcs:
+            v = vpc['VpcId'] + ':'
+            teardown.add(v + 'nat_gateways', Ec2.clean_nat_gateways, self.fork(vpc_id=vpc['VpcId']))
+            teardown.add(v + 'enis', Ec2.clean_network_interfaces, self.fork(vpc_id=vpc['VpcId']),
+                         after=('instances', v + 'nat_gateways', 'eips'))
+            teardown.add(v + 'igws', Ec2.clean_internet_gateways, self.fork(vpc_id=vpc['VpcId']),
+                         after=('instances', v + 'nat_gateways', v + 'enis', 'eips'))
+            teardown.add(v + 'subnets', Ec2.clean_subnets, self.fork(vpc_id=vpc['VpcId']),
+                         after=('instances', v + 'nat_gateways', v + 'enis'))
+            teardown.add(v + 'route_tables', Ec2.clean_route_tables, self.fork(vpc_id=vpc['VpcId']),
+                         after=(v + 'subnets', v + 'igws'))
+            teardown.add(v + 'acls', Ec2.clean_network_acls, self.fork(vpc_id=vpc['VpcId']),
+                         after=(v + 'subnets',))
+            teardown.add(v + 'sgs', Ec2.clean_security_groups, self.fork(vpc_id=vpc['VpcId']),
+                         after=('instances', v + 'enis'))
+            teardown.add(v + 'vpc', Ec2.clean_vpc, self.fork(vpc_id=vpc['VpcId']),
+                         after=(v + 'igws', v + 'subnets', v + 'route_tables', v + 'acls', v + 'sgs',
+                                'templates'))
+        if vpcs:
+            teardown.run()
         elif not self.dry:
             print('No VPCs found')
 
+    @staticmethod
+    def journaled(self):
+        """
+        Inventory filters limiting VPC scoped types to the tagged VPCs recorded in the journal,
+        or None (discover the whole region) if the journal is empty or misses a tagged VPC.
+        """
+        recorded = journal.ids('vpcs', self.region)
+        if not recorded or self.dry:
+            return None
+        tagged = [vpc['VpcId'] for vpc in inventory.Inventory.records(self, 'vpcs')
+                  if {'Key': self.name, 'Value': self.tag} in vpc.get('Tags', ())]
+        if set(tagged) - set(recorded):
+            print('Found VPCs missing from the journal %s, discovering everything' % self.journal)
+            return None
+        in_vpcs = [{'Name': 'vpc-id', 'Values': tagged}]
+        filters = dict((resource_type, in_vpcs) for resource_type in ('instances', 'nat_gateways', 'network_interfaces',
+                                                                       'subnets', 'route_tables', 'network_acls',
+                                                                       'security_groups'))
+        filters['internet_gateways'] = [{'Name': 'attachment.vpc-id', 'Values': tagged}]
+        return filters
+
+    @staticmethod
+    def clean_instances(self):
+        """
+        Terminate all tagged EC2 instances with one call and one waiter
+        """
+        instances = self.inventory.get('instances', key=self.name, value=self.tag)
+        self.instance_ids = [instance['InstanceId'] for instance in instances]
+        if self.instance_ids:
+            client.Instance.terminate(self, self.instance_ids)
+        elif not self.dry:
+            print('No ec2 instances detected')
+
+    @staticmethod
+    def clean_elastic_ips(self):
+        """
+        Disassociate and release tagged elastic ips
+        """
+        elastic_ips = self.inventory.get('addresses', key=self.name, value=self.tag)
+        for ip in elastic_ips:
+            if 'AssociationId' in ip and ip['AssociationId'] != '-':
+                client.ElasticIp.disassociate(self, ip['AllocationId'])
+            client.ElasticIp.release(self, ip['AllocationId'])
+        if not elastic_ips and not self.dry:
+            print('No elastic ips detected')
+
+    @staticmethod
+    def clean_launch_templates(self):
+        """
+        Delete tagged launch templates and their versions
+        """
+        templates = self.inventory.get('launch_templates', key=self.name, value=self.tag)
+        for template in templates:
+            self.template_id = template['LaunchTemplateId']
+
+            # CHILD VERSIONS
+            versions = client.LaunchTemplate.list_versions(self)
+            if versions:
+                for version in versions['LaunchTemplateVersions']:
+                    client.LaunchTemplate.delete_version(self, version['VersionNumber'])
+            else:
+                print('No launch template versions detected')
+
+            # DELETE TEMPLATE
+            client.LaunchTemplate.delete(self)
+
+        if not templates and not self.dry:
+            print('No launch templates detected')
+
+    @staticmethod
+    def clean_network_interfaces(self):
+        """
+        Delete network interfaces in self.vpc_id
+        """
+        interfaces = self.inventory.get('network_interfaces', self.vpc_id)
+        for item in interfaces:
+            client.NetworkInterface.delete(self, item['NetworkInterfaceId'])
+        if interfaces and not self.dry:
+            print('wait for deletion ...')
+            if not wait.until(lambda: client.NetworkInterface.drained(self, self.vpc_id), self.wait_deadline):
+                print('Timed out waiting for network interfaces in %s' % self.vpc_id)
+        elif not self.dry:
+            print('No network interfaces detected')
+
+    @staticmethod
+    def clean_internet_gateways(self):
+        """
+        Detach and delete internet gateways attached to self.vpc_id
+        """
+        gateways = self.inventory.get('internet_gateways', self.vpc_id)
+        for item in gateways:
+            client.InternetGateway.detach(self, item['InternetGatewayId'], self.vpc_id)
+            client.InternetGateway.delete(self, item['InternetGatewayId'])
+        if not gateways and not self.dry:
+            print('No internet gateways detected')
+
+    @staticmethod
+    def clean_subnets(self):
+        """
+        Delete subnets in self.vpc_id
+        """
+        self.subnet_ids = []
+        for item in self.inventory.get('subnets', self.vpc_id):
+            self.subnet_id = item['SubnetId']
+            self.subnet_ids.append(self.subnet_id)
+            client.Subnet.delete(self)
+        if not self.subnet_ids and not self.dry:
+            print('No subnets detected')
+
+    @staticmethod
+    def clean_route_tables(self):
+        """
+        Delete non-main route tables in self.vpc_id
+        """
+        route_tables = self.inventory.get('route_tables', self.vpc_id)
+        for item in route_tables:
+            if item['Associations']:
+                if item['Associations'][0]['Main']:
+                    print('Skipping main route table')
+                else:
+                    client.RouteTable.disassociate(self, item['Associations'][0]['RouteTableAssociationId'])
+                    client.RouteTable.delete_route(self, self.any_ip4, item['RouteTableId'])
+                    for cidr in self.cidr4:
+                        client.RouteTable.delete_route(self, cidr, item['RouteTableId'])
+                    if self.ip6:
+                        client.RouteTable.delete_route(self, self.any_ip6, item['RouteTableId'])
+                        for cidr in self.cidr6:
+                            client.RouteTable.delete_route(self, cidr, item['RouteTableId'])
+                    client.RouteTable.delete(self, item['RouteTableId'])
+            else:
+                client.RouteTable.delete(self, item['RouteTableId'])
+        if not route_tables and not self.dry:
+            print('No route tables detected')
+
+    @staticmethod
+    def clean_nat_gateways(self):
+        """
+        Delete nat gateways in self.vpc_id
+        """
+        gateways = self.inventory.get('nat_gateways', self.vpc_id)
+        for ngw in gateways:
+            client.NatGateway.delete(self, ngw['NatGatewayId'])
+        if not gateways and not self.dry:
+            print('No nat gateways detected')
+
+    @staticmethod
+    def clean_network_acls(self):
+        """
+        Delete non-default network acls in self.vpc_id
+        """
+        acls = self.inventory.get('network_acls', self.vpc_id)
+        for item in acls:
+            if item['IsDefault']:
+                continue
+            client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 101, False)
+            client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 101, True)
+            client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 102, False)
+            client.NetworkAcl.delete_entry(self, item['NetworkAclId'], 102, True)
+            client.NetworkAcl.delete(self, item['NetworkAclId'])
+        if not acls and not self.dry:
+            print('No network acls detected')
+
+    @staticmethod
+    def clean_security_groups(self):
+        """
+        Teardown security groups in self.vpc_id so the VPC can go
+        """
+        groups = self.inventory.get('security_groups', self.vpc_id)
+        for item in groups:
+            SecurityGroup.teardown(self, item)
+        if not groups and not self.dry:
+            print('No security groups detected')
+
+    @staticmethod
+    def clean_vpc(self):
+        """
+        Delete self.vpc_id once everything inside it is gone
+        """
+        print('Teardown VPC %s' % self.vpc_id)
+        client.Vpc.delete(self)
+
 
 class ElasticLoadBalancing(ScalableCloudService):
     """
@@ -1127,80 +1192,175 @@ class ElasticLoadBalancing(ScalableCloudService):
         :return: object
         """
         super().__init__(solution)
-        self.elb = boto3.client('elbv2')
         if message:
             self.console(message)
 
+        if self.step('load_balancer', ElasticLoadBalancing.create_load_balancer):
+
+            # TARGET GROUPS AND LISTENERS, CREATED WHILE THE LOAD BALANCER PROVISIONS
+            build = graph.TaskGraph(self.workers)
+            build.add('available', client.LoadBalancer.wait_available, self)
+            build.add('targets', ElasticLoadBalancing.create_targets, self)
+            build.run()
+            print('elb created')
+        else:
+            print('failed to created ELB instance')
+
+    @staticmethod
+    def create_load_balancer(self):
+        """
+        Create and tag the load balancer
+        :return: load balancer arn or None
+        """
         resource = client.LoadBalancer(self)
         if resource.response and 'LoadBalancers' in resource.response and resource.response['LoadBalancers']:
             self.lb_arn = resource.response['LoadBalancers'][0]['LoadBalancerArn']
             self.lb_arns.append(self.lb_arn)
+            return self.lb_arn
+        return None
 
-            # WAIT UNTIL ELB IS ACTIVE
-            print('Wait until active ...')
-            provisioning = True
-            while provisioning:
-                lbs = client.LoadBalancer.list(self)
-                if lbs and 'LoadBalancers' in lbs and lbs['LoadBalancers']:
-                    for lb in lbs['LoadBalancers']:
-                        provisioning = True
-                        if self.lb_arn == lb['LoadBalancerArn'] and lb['State']['Code'] == 'provisioning':
-                            time.sleep(1)
-                        else:
-                            provisioning = False
-            resource.create_tags(self, self.lb_arn)
-
-            # TARGET GROUPS
-            target = client.LoadBalancerTargetGroup(self, self.protocols[0], self.ports[0])
-            if target.response and 'TargetGroups' in target.response and target.response['TargetGroups']:
-                self.lb_target_group_arn = target.response['TargetGroups'][0]['TargetGroupArn']
-                self.lb_target_group_arns.append(self.lb_target_group_arn)
-                resource.create_tags(self, self.lb_target_group_arn)
-
-                # LISTENERS
-                for j in range(len(self.protocols)):
-                    listy = client.LoadBalancerListener(self, self.protocols[j], self.ports[j], self.lb_choices[j])
-                    if listy.response and 'Listeners' in listy.response and listy.response['Listeners']:
-                        self.lb_listener_arn = listy.response['Listeners'][0]['ListenerArn']
-                        self.lb_listener_arns.append(self.lb_listener_arn)
-            print('elb created')
-        else:
-            print('failed to created ELB instance')
+    @staticmethod
+    def create_targets(self):
+        """
+        Create the target group, then all its listeners and its instance targets at once.
+        Each step runs on its own copy of this solution, so each journals only the ids it set,
+        and the listener ids are gathered back once both are done.
+        """
+        if self.step('target_group', ElasticLoadBalancing.create_target_group):
+            listeners = self.fork(lb_listener_arns=[])
+            build = graph.TaskGraph(self.workers)
+            build.add('listeners', ElasticLoadBalancing.step, listeners, 'listeners',
+                      ElasticLoadBalancing.create_listeners)
+            if 'ec2' in self.scope and 'autoscaling' not in self.scope and self.instance_ids:
+                build.add('targets', ElasticLoadBalancing.step, self.fork(), 'targets',
+                          ElasticLoadBalancing.register_targets)
+            build.run()
+            self.lb_listener_arn = listeners.lb_listener_arn
+            self.lb_listener_arns += listeners.lb_listener_arns
+
+    @staticmethod
+    def create_target_group(self):
+        """
+        Create the (tagged) target group of self.lb_arn
+        :return: target group arn or None
+        """
+        target = client.LoadBalancerTargetGroup(self, self.protocols[0], self.ports[0])
+        if target.response and 'TargetGroups' in target.response and target.response['TargetGroups']:
+            self.lb_target_group_arn = target.response['TargetGroups'][0]['TargetGroupArn']
+            self.lb_target_group_arns.append(self.lb_target_group_arn)
+            return self.lb_target_group_arn
+        return None
+
+    @staticmethod
+    def create_listeners(self, ports=()):
+        """
+        Create a (tagged) listener forwarding to self.lb_target_group_arn per protocol, except on 'ports'.
+        Listeners are independent so all are created at once, one per worker.
+        """
+        created = [None] * len(self.protocols)
+        fan = graph.TaskGraph(self.workers)
+        for j in range(len(self.protocols)):
+            if self.ports[j] not in ports:
+                fan.add('listener%d' % j, ElasticLoadBalancing.create_listener, self, j, created)
+        fan.run()
+        for arn in created:
+            if arn:
+                self.lb_listener_arn = arn
+                self.lb_listener_arns.append(arn)
+
+    @staticmethod
+    def create_listener(self, j, created):
+        """
+        Create the listener of protocol j and put its arn in created[j]
+        """
+        listy = client.LoadBalancerListener(self, self.protocols[j], self.ports[j], self.lb_choices[j])
+        if listy.response and 'Listeners' in listy.response and listy.response['Listeners']:
+            created[j] = listy.response['Listeners'][0]['ListenerArn']
+
+    @staticmethod
+    def register_targets(self):
+        """
+        Register the solution's instances with the target group, once they are running
+        """
+        if client.Instance.wait_running(self, self.instance_ids):
+            client.LoadBalancerTargetGroup.register(self, self.instance_ids)
+
+    @staticmethod
+    def reconcile(solution, message='Reconcile Elastic Load Balancing environment'):
+        """
+        Adopt the named load balancer and create only its missing target group and listeners,
+        or create it all if there is none
+        :return: object
+        """
+        lbs = client.LoadBalancer.list(solution)
+        if not (lbs and 'LoadBalancers' in lbs and lbs['LoadBalancers']):
+            return ElasticLoadBalancing(solution, message)
+        solution.console(message)
+        self = solution.fork(lb_arn=lbs['LoadBalancers'][0]['LoadBalancerArn'], lb_target_group_arns=[],
+                             lb_listener_arns=[])
+        self.lb_arns = [self.lb_arn]
+        print('Found Elastic Load Balancer %s' % self.lb_arn)
+
+        targets = client.LoadBalancerTargetGroup.list(self)
+        if targets and 'TargetGroups' in targets and targets['TargetGroups']:
+            self.lb_target_group_arn = targets['TargetGroups'][0]['TargetGroupArn']
+            self.lb_target_group_arns.append(self.lb_target_group_arn)
+        elif not ElasticLoadBalancing.create_target_group(self):
+            return self
+
+        listeners = client.LoadBalancerListener.list(self)
+        ports = [listener['Port'] for listener in (listeners or {}).get('Listeners', ())]
+        self.lb_listener_arns += [listener['ListenerArn'] for listener in (listeners or {}).get('Listeners', ())]
+        ElasticLoadBalancing.create_listeners(self, ports)
+        return self
 
     def clean(self, message='Teardown Elastic Load Balancing'):
         """
-        Teardown ELBv2
+        Teardown ELBv2 in stages: find the load balancers and target groups named or tagged for this
+        solution with one tag lookup, describe the listeners of every load balancer, delete every
+        listener at once, delete the load balancers and wait on each until all are gone, then delete every
+        target group at once. Each stage is one batch of requests (boto3_pool.many), awaited together on
+        the event loop with the async backend. Stage durations are reported.
         """
-        self.elb = boto3.client('elbv2')
         if message:
             self.console(message)
 
-        inventory = client.LoadBalancer.list(self)
-        if inventory and 'LoadBalancers' in inventory and inventory['LoadBalancers']:
-            for elb in inventory['LoadBalancers']:
-                self.lb_arn = elb['LoadBalancerArn']
-
-                # LISTENERS
-                inventory = client.LoadBalancerListener.list(self)
-                if inventory and 'Listeners' in inventory and inventory['Listeners']:
-                    for listener in inventory['Listeners']:
-                        self.lb_listener_arn = listener['ListenerArn']
-                        client.LoadBalancerListener.delete(self)
-
-                # TARGET GROUPS
-                inventory = client.LoadBalancerTargetGroup.list(self)
-                previous_arn = None
-                if inventory and 'TargetGroups' in inventory and inventory['TargetGroups']:
-                    for target in inventory['TargetGroups']:
-                        self.lb_target_group_arn = target['TargetGroupArn']
-                        if self.topic_arn != previous_arn:
-                            client.LoadBalancerTargetGroup.delete(self)
-                            previous_arn = self.lb_target_group_arn
-
-                # ELB
-                client.LoadBalancer.delete(self)
-        else:
+        # DESCRIBE LOAD BALANCERS, TARGET GROUPS AND THEIR TAGS
+        timings = []
+        began = time.monotonic()
+        balancers = list(client.LoadBalancer.iter_all(self))
+        groups = list(client.LoadBalancerTargetGroup.iter_all(self))
+        tags = client.ElasticLoadBalancing.describe_tags(self, [elb['LoadBalancerArn'] for elb in balancers] +
+                                                         [target['TargetGroupArn'] for target in groups])
+        balancers = [elb['LoadBalancerArn'] for elb in balancers if elb['LoadBalancerName'] == self.name or
+                     tags.get(elb['LoadBalancerArn'], {}).get(self.name) == self.tag]
+        targets = [target['TargetGroupArn'] for target in groups
+                   if set(target['LoadBalancerArns']) & set(balancers) or target['TargetGroupName'] == self.name or
+                   tags.get(target['TargetGroupArn'], {}).get(self.name) == self.tag]
+        if not (balancers or targets):
             print('No Elastic Load Balancer found')
+            return
+
+        # DESCRIBE LISTENERS
+        listeners = client.LoadBalancerListener.list_many(self, balancers)
+        timings.append(('describe', time.monotonic() - began))
+
+        # LISTENERS
+        began = time.monotonic()
+        client.LoadBalancerListener.delete_many(self, [arn for arns in listeners.values() for arn in arns])
+        timings.append(('listeners', time.monotonic() - began))
+
+        # ELBS
+        began = time.monotonic()
+        client.LoadBalancer.delete_many(self, balancers)
+        client.LoadBalancer.wait_deleted(self, balancers)
+        timings.append(('load balancers', time.monotonic() - began))
+
+        # TARGET GROUPS
+        began = time.monotonic()
+        client.LoadBalancerTargetGroup.delete_many(self, targets)
+        timings.append(('target groups', time.monotonic() - began))
+        print('Teardown took %s' % ', '.join('%s %.2fs' % timing for timing in timings))
 
 
 class AutoScaling(ScalableCloudService):
@@ -1214,71 +1374,93 @@ class AutoScaling(ScalableCloudService):
         :return: object
         """
         super().__init__(solution)
-        self.autoscale = boto3.client('autoscaling')
         if message:
             self.console(message)
 
-        client.AutoScalingGroup(self)
-        client.AutoScalingGroupTags(self)
-        client.AutoScalingPolicy(self)
-        client.AutoScalingNotification(self)
+        self.asg_name = self.step('autoscaling_group', AutoScaling.create_group)
+        self.step('autoscaling_tags', AutoScaling.create_part, client.AutoScalingGroupTags)
+        self.step('autoscaling_policy', AutoScaling.create_part, client.AutoScalingPolicy)
+        self.step('autoscaling_notification', AutoScaling.create_part, client.AutoScalingNotification)
+
+    @staticmethod
+    def create_group(self):
+        """
+        Create the AutoScaling group. Its create takes no idempotency token, so when resuming a
+        run cut short in this step the group it may have created is adopted instead.
+        :return: group name
+        """
+        groups = None
+        if self.resume and journal.interrupted('autoscaling_group'):
+            groups = client.AutoScalingGroup.list(self)
+        if groups and 'AutoScalingGroups' in groups and groups['AutoScalingGroups']:
+            print('Found AutoScaling group %s' % self.name)
+            client.AutoScalingGroup.attach_target_groups(self)
+        else:
+            client.AutoScalingGroup(self)
+        self.asg_name = self.name
+        return self.asg_name
+
+    @staticmethod
+    def create_part(self, resource):
+        """
+        Create the tags, policy or notifications ('resource') of group self.asg_name; these
+        creates overwrite, so they are safe to run again
+        :return: group name
+        """
+        resource(self)
+        return self.asg_name
+
+    @staticmethod
+    def reconcile(solution, message='Reconcile AutoScaling'):
+        """
+        Adopt the named AutoScaling group, or create it (with its tags, policy and notifications)
+        :return: object
+        """
+        groups = client.AutoScalingGroup.list(solution)
+        if not (groups and 'AutoScalingGroups' in groups and groups['AutoScalingGroups']):
+            return AutoScaling(solution, message)
+        solution.console(message)
+        print('Found AutoScaling group %s' % groups['AutoScalingGroups'][0]['AutoScalingGroupName'])
+        return solution.fork(asg_name=groups['AutoScalingGroups'][0]['AutoScalingGroupName'])
 
     def clean(self, message='Teardown AutoScaling'):
         """
-        Teardown AutoScaling
+        Teardown AutoScaling: force delete every group named or tagged for this solution at once, poll
+        them together until each is gone, then delete the launch configurations. Deleting a group
+        deletes its instances, scaling policies and notifications too. Per-group durations are reported.
         :return: None
         """
-        self.autoscale = boto3.client('autoscaling')
         if message:
             self.console(message)
 
-        inventory = client.AutoScalingGroup.list(self)
-        if inventory and 'AutoScalingGroups' in inventory and inventory['AutoScalingGroups']:
-            for group in inventory['AutoScalingGroups']:
-                self.asg_name = group['AutoScalingGroupName']
-
-                # AUTO SCALING NOTIFICATIONS
-                inventory2 = client.AutoScalingNotification.list(self)
-                if 'NotificationConfigurations' in inventory2 and inventory2['NotificationConfigurations']:
-                    previous_arn = None
-                    for notification in inventory2['NotificationConfigurations']:
-                        self.topic_arn = notification['TopicARN']
-                        if self.topic_arn != previous_arn:
-                            client.AutoScalingNotification.delete(self)
-                            previous_arn = self.topic_arn
-                else:
-                    print('No auto-scaling notifications found')
-
-                # AUTO SCALING POLICIES
-                inventory3 = client.AutoScalingPolicy.list(self)
-                if inventory3 and 'ScalingPolicies' in inventory3 and inventory3['ScalingPolicies']:
-                    for policy in inventory3['ScalingPolicies']:
-                        client.AutoScalingPolicy.delete(self, policy['ResourceId'])
-                else:
-                    print('No auto-scaling policies found')
-
-                # AUTO SCALE GROUPS (FORCE DELETE INSTANCES = TRUE)
-                inventory4 = client.AutoScalingGroup.list(self)
-                if inventory4 and 'AutoScalingGroups' in inventory4 and inventory4['AutoScalingGroups']:
-                    for item in inventory4['AutoScalingGroups']:
-                        self.name = item['AutoScalingGroupName']
-                        client.AutoScalingGroup.delete(self)
-                    print('wait for deletion ...')
-                    while True:
-                        inventory5 = client.AutoScalingGroup.list(self)
-                        if 'AutoScalingGroups' in inventory5 and inventory5['AutoScalingGroups']:
-                            time.sleep(1)
-                        else:
-                            break
+        # AUTO SCALE GROUPS (FORCE DELETE INSTANCES = TRUE)
+        groups = [group['AutoScalingGroupName'] for group in client.AutoScalingGroup.iter_list(self)]
+        groups += sorted(set(client.AutoScalingGroup.iter_tagged(self)) - set(groups))
+        if groups:
+            began = time.monotonic()
+            pending = set(client.AutoScalingGroup.delete_many(self, groups))
+            durations = {}
+
+            def gone():
+                for name in pending - client.AutoScalingGroup.existing(self, pending):
+                    durations[name] = time.monotonic() - began
+                    pending.discard(name)
+                return not pending
+            wait.until(gone, self.wait_deadline)
+            for name in sorted(pending):
+                print('AutoScaling group %s not deleted after %ds' % (name, self.wait_deadline))
+            if durations:
+                print('AutoScaling groups deleted in %s' % ', '.join('%s %.2fs' % (name, durations[name])
+                                                                     for name in groups if name in durations))
         else:
             print('No Auto Scaling Groups found')
 
         # LAUNCH CONFIGURATIONS
-        inventory = client.LaunchConfiguration.list(self)
-        if inventory and 'LaunchConfigurations' in inventory and inventory['LaunchConfigurations']:
-            for configuration in inventory['LaunchConfigurations']:
-                client.LaunchConfiguration.delete(self, configuration['LaunchConfigurationName'])
-        else:
+        found = False
+        for configuration in client.LaunchConfiguration.iter_list(self):
+            client.LaunchConfiguration.delete(self, configuration['LaunchConfigurationName'])
+            found = True
+        if not found:
             print('No Launch Configurations found')
 
 
@@ -1292,12 +1474,29 @@ class SimpleNotificationService(ScalableCloudService):
         Initialise AWS SNS
         """
         super().__init__(solution)
-        self.sns = boto3.client('sns')
         if message:
             self.console(message)
+        self.step('topic', SimpleNotificationService.create)
 
-        self.sns_topic = client.SimpleNotificationServiceTopic(self)
-        self.topic_arn = self.sns_topic.response['TopicArn']
+    @staticmethod
+    def create(self):
+        """
+        Create the SNS topic
+        """
+        self.topic_arn = client.SimpleNotificationServiceTopic(self).response['TopicArn']
+
+    @staticmethod
+    def reconcile(solution, message='Reconcile Simple Notification Service Topic'):
+        """
+        Adopt the named SNS topic, or create it
+        :return: object
+        """
+        for topic in client.SimpleNotificationServiceTopic.iter_list(solution):
+            if topic['TopicArn'].endswith(':' + solution.name):
+                solution.console(message)
+                print('Found SNS topic %s' % topic['TopicArn'])
+                return solution.fork(topic_arn=topic['TopicArn'])
+        return SimpleNotificationService(solution, message)
 
     def clean(self, message='Teardown Simple Notification Service'):
         """
@@ -1306,16 +1505,11 @@ class SimpleNotificationService(ScalableCloudService):
         if message:
             self.console(message)
 
-        self.sns = boto3.client('sns')
-        inventory = client.SimpleNotificationServiceTopic.list(self)
-        if inventory and "Topics" in inventory and inventory['Topics']:
-            found = False
-            for topic in inventory['Topics']:
-                self.topic_arn = topic['TopicArn']
-                if self.name in str(topic['TopicArn']):
-                    client.SimpleNotificationServiceTopic.delete(self)
-                    found = True
-            if not found:
-                print('No Simple Notification Service found')
-        else:
+        found = False
+        for topic in client.SimpleNotificationServiceTopic.iter_list(self):
+            self.topic_arn = topic['TopicArn']
+            if self.name in str(topic['TopicArn']):
+                client.SimpleNotificationServiceTopic.delete(self)
+                found = True
+        if not found:
             print('No Simple Notification Service found')
@@ -0,0 +1,172 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import time
+import threading
+import collections
+
+_LOCK = threading.Lock()
+_BUCKETS = {}
+
+# Retries of throttled and transient errors: exponential backoff with full jitter
+# https://boto3.amazonaws.com/v1/documentation/api/latest/guide/retries.html#standard-retry-mode
+RETRIES = {'mode': 'standard', 'max_attempts': 10}
+
+# Error codes botocore's standard retry mode treats as throttling
+_THROTTLING = ('Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+               'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'TransactionInProgressException',
+               'RequestLimitExceeded', 'BandwidthLimitExceeded', 'LimitExceededException', 'RequestThrottled',
+               'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException')
+
+# Requests per second per (service, region): bounds, growth per second of successes, cut on throttling
+_MIN_RATE = 1.0
+_MAX_RATE = 200.0
+_INCREASE = 2.0
+_DECREASE = 0.5
+
+
+class Bucket:
+    """
+    AIMD TOKEN BUCKET
+    Calls are not limited until the first throttling error, which sets the rate to half the calls
+    made in the last second. From then on attempts take one token each, tokens refill at 'rate' per
+    second up to one second's worth, and the rate grows additively while calls succeed and halves
+    (at most once a second) on throttling.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rate = None
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.cut = 0.0
+        self.sent = collections.deque()
+
+    def take(self):
+        """
+        Take a token if one is ready
+        :return: 0 if taken, else the seconds until the next one
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self.sent.append(now)
+                while self.sent[0] < now - 1.0:
+                    self.sent.popleft()
+                return 0
+            self.tokens = min(self.rate, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """
+        Wait for a token, blocking the calling thread
+        """
+        pause = self.take()
+        while pause:
+            time.sleep(pause)
+            pause = self.take()
+
+    async def acquire_async(self):
+        """
+        Wait for a token without blocking the event loop
+        """
+        import asyncio
+        pause = self.take()
+        while pause:
+            await asyncio.sleep(pause)
+            pause = self.take()
+
+    def succeeded(self):
+        with self.lock:
+            if self.rate:
+                self.rate = min(_MAX_RATE, self.rate + _INCREASE / self.rate)
+
+    def throttled(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.cut >= 1.0:
+                self.cut = now
+                self.rate = max(_MIN_RATE, (self.rate or len(self.sent)) * _DECREASE)
+                self.tokens = min(self.tokens, 0.0)
+                self.stamp = now
+
+
+def bucket(service, region):
+    """
+    Get the bucket shared by every client of 'service' in 'region'
+    """
+    with _LOCK:
+        if (service, region) not in _BUCKETS:
+            _BUCKETS[(service, region)] = Bucket()
+        return _BUCKETS[(service, region)]
+
+
+def install(events, asynchronous=False):
+    """
+    Rate limit every API call made by clients using botocore event emitter 'events'.
+    A token is taken before each attempt is sent, so retries are limited too. Clients
+    of aiobotocore ('asynchronous') wait for tokens on the event loop.
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/events.html
+    """
+    events.register_first('before-call', bind, unique_id='boto3-throttle-bind')
+    events.register_first('before-send', acquire_async if asynchronous else acquire,
+                          unique_id='boto3-throttle-acquire')
+    events.register('needs-retry', attempted, unique_id='boto3-throttle-attempted')
+    events.register('after-call', finished, unique_id='boto3-throttle-finished')
+
+
+def throttling(parsed):
+    return (parsed or {}).get('Error', {}).get('Code') in _THROTTLING
+
+
+def bind(model, context, **kwargs):
+    """
+    Before each call, keep its bucket in the request context for every attempt to take tokens from
+    """
+    context['throttle_bucket'] = bucket(model.service_model.service_name, context.get('client_region'))
+
+
+def acquire(request, **kwargs):
+    """
+    Before each attempt is sent
+    """
+    calls = (getattr(request, 'context', None) or {}).get('throttle_bucket')
+    if calls:
+        calls.acquire()
+
+
+async def acquire_async(request, **kwargs):
+    """
+    Before each attempt of an aiobotocore client is sent
+    """
+    calls = (getattr(request, 'context', None) or {}).get('throttle_bucket')
+    if calls:
+        await calls.acquire_async()
+
+
+def attempted(response, operation, request_dict, **kwargs):
+    """
+    Each attempt, before botocore decides whether to retry it
+    """
+    if response and throttling(response[1]):
+        bucket(operation.service_model.service_name, request_dict['context'].get('client_region')).throttled()
+
+
+def finished(parsed, model, context, **kwargs):
+    calls = bucket(model.service_model.service_name, context.get('client_region'))
+    if throttling(parsed):
+        calls.throttled()
+    elif 'Error' not in parsed:
+        calls.succeeded()
+
+
+def rates():
+    """
+    Current requests per second of every bucket
+    """
+    with _LOCK:
+        return dict((key, each.rate and round(each.rate, 1)) for key, each in _BUCKETS.items())
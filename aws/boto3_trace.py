@@ -0,0 +1,110 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import json
+import time
+import threading
+import collections
+
+_LOCK = threading.Lock()
+_RECORDS = []
+_OUTPUT = None
+
+
+def install(events):
+    """
+    Record every API call made by clients using botocore event emitter 'events'.
+    The timer starts first in before-call, so a short-circuiting handler (e.g. the benchmark's boto3_fake) is timed too.
+    https://boto3.amazonaws.com/v1/documentation/api/latest/guide/events.html
+    """
+    events.register_first('before-call', started, unique_id='boto3-trace-started')
+    events.register('after-call', finished, unique_id='boto3-trace-finished')
+    events.register('after-call-error', failed, unique_id='boto3-trace-failed')
+
+
+def output(path):
+    """
+    Also write each record to JSON-lines file 'path' as soon as its call returns
+    """
+    global _OUTPUT
+    with _LOCK:
+        if _OUTPUT:
+            _OUTPUT.close()
+        _OUTPUT = open(path, 'a', buffering=1) if path else None
+
+
+def started(context, **kwargs):
+    context['trace_started'] = time.monotonic()
+
+
+def finished(http_response, parsed, model, context, **kwargs):
+    metadata = parsed.get('ResponseMetadata', {})
+    add(model, context, metadata.get('HTTPStatusCode', getattr(http_response, 'status_code', None)),
+        metadata.get('RetryAttempts', 0), int(getattr(http_response, 'headers', {}).get('content-length', 0) or 0),
+        parsed.get('Error', {}).get('Code'))
+
+
+def failed(exception, model, context, **kwargs):
+    add(model, context, None, 0, 0, type(exception).__name__)
+
+
+def add(model, context, status, retries, size, error):
+    record = {'service': model.service_model.service_name,
+              'operation': model.name,
+              'region': context.get('client_region'),
+              'latency': round(time.monotonic() - context.get('trace_started', time.monotonic()), 6),
+              'retries': retries,
+              'status': status,
+              'bytes': size,
+              'error': error,
+              'time': time.time()}
+    with _LOCK:
+        _RECORDS.append(record)
+        if _OUTPUT:
+            _OUTPUT.write(json.dumps(record) + '\n')
+
+
+def records():
+    """
+    Every call recorded so far
+    """
+    with _LOCK:
+        return list(_RECORDS)
+
+
+def summary():
+    """
+    Print calls, errors, retries, bytes and latency per (service, operation, region), slowest total first
+    """
+    rows = collections.OrderedDict()
+    for record in records():
+        row = rows.setdefault((record['service'], record['operation'], record['region']),
+                              {'calls': 0, 'errors': 0, 'retries': 0, 'bytes': 0, 'latencies': []})
+        row['calls'] += 1
+        row['errors'] += 1 if record['error'] else 0
+        row['retries'] += record['retries']
+        row['bytes'] += record['bytes']
+        row['latencies'].append(record['latency'])
+    if not rows:
+        return
+
+    print('\n%-14s %-38s %-12s %6s %6s %7s %10s %9s %9s %9s' % ('service', 'operation', 'region', 'calls', 'errors',
+                                                              'retries', 'bytes', 'total s', 'mean ms', 'max ms'))
+    for (service, operation, region), row in sorted(rows.items(), key=lambda item: -sum(item[1]['latencies'])):
+        total = sum(row['latencies'])
+        print('%-14s %-38s %-12s %6d %6d %7d %10d %9.3f %9.1f %9.1f' % (
+            service, operation, region or '', row['calls'], row['errors'], row['retries'], row['bytes'], total,
+            1000 * total / row['calls'], 1000 * max(row['latencies'])))
+    print('%-14s %-38s %-12s %6d %6d %7d %10d %9.3f' % (
+        'total', '', '', sum(row['calls'] for row in rows.values()), sum(row['errors'] for row in rows.values()),
+        sum(row['retries'] for row in rows.values()), sum(row['bytes'] for row in rows.values()),
+        sum(sum(row['latencies']) for row in rows.values())))
+
+
+def clear():
+    """
+    Forget all recorded calls
+    """
+    with _LOCK:
+        _RECORDS.clear()
@@ -0,0 +1,23 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import time
+import random
+
+
+def until(check, deadline=300, delay=1, max_delay=15, factor=1.5):
+    """
+    Poll check() until it returns a truthy value or 'deadline' seconds pass.
+    The pause between polls starts at 'delay' and grows by 'factor' (with jitter)
+    up to 'max_delay', so a ready resource returns on the first poll.
+    :return: last value of check()
+    """
+    expires = time.monotonic() + deadline
+    while True:
+        ready = check()
+        remaining = expires - time.monotonic()
+        if ready or remaining <= 0:
+            return ready
+        time.sleep(min(delay * random.uniform(0.8, 1.2), remaining))
+        delay = min(delay * factor, max_delay)
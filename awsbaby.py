@@ -7,9 +7,11 @@ import sys
 try:
     sys.path.append('./aws')
     import boto3_solutions as cloud
+    import boto3_graph as graph
 except ImportError:
     sys.path.append('../aws')
     import boto3_solutions as cloud
+    import boto3_graph as graph
 
 
 def main(argv):
@@ -20,16 +22,32 @@ def main(argv):
         cloud.AwsSolution.usage()
 
     if 'clean' in solution.choice:
+        teardown = graph.TaskGraph(solution.workers)
         if 'sns' in scope:
-            cloud.SimpleNotificationService.clean(solution)
+            teardown.add('sns', cloud.SimpleNotificationService.clean, solution.fork())
         if 'elb' in scope:
-            cloud.ElasticLoadBalancing.clean(solution)
+            teardown.add('elb', cloud.ElasticLoadBalancing.clean, solution.fork())
         if 'autoscaling' in scope:
-            cloud.AutoScaling.clean(solution)
+            teardown.add('autoscaling', cloud.AutoScaling.clean, solution.fork(), after=('elb',))
         if 'ec2' in scope or 'vpc' in scope:
-            cloud.Ec2.clean(solution)
+            teardown.add('ec2', cloud.Ec2.clean, solution.fork(), after=('elb', 'autoscaling'))
         if 'sec' in scope:
-            cloud.SecurityGroup.clean(solution)
+            teardown.add('sec', cloud.SecurityGroup.clean, solution.fork(), after=('ec2',))
+        teardown.run()
+
+    if 'reconcile' in solution.choice:
+        found = cloud.inventory.Inventory(solution, ('vpcs', 'security_groups', 'internet_gateways', 'route_tables',
+                                                     'subnets', 'network_acls', 'launch_templates', 'instances'))
+        solution = cloud.Vpc.reconcile(solution, found)
+        solution = cloud.SecurityGroup.reconcile(solution, found)
+        if 'sns' in scope:
+            solution = cloud.SimpleNotificationService.reconcile(solution)
+        if 'ec2' in scope or 'vpc' in scope:
+            solution = cloud.Ec2.reconcile(solution, found)
+        if 'elb' in scope:
+            solution = cloud.ElasticLoadBalancing.reconcile(solution)
+        if 'autoscaling' in scope:
+            solution = cloud.AutoScaling.reconcile(solution)
 
     if 'start' in solution.choice:
         solution = cloud.Vpc(solution)
@@ -44,6 +62,7 @@ def main(argv):
             solution = cloud.AutoScaling(solution)
         del solution
 
+    cloud.trace.summary()
     print('\nOk\n')
 
 
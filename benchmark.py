@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import io
+import os
+import sys
+import json
+import time
+import runpy
+import getopt
+import tempfile
+import resource
+import subprocess
+import contextlib
+
+_SCENARIOS = (1, 10, 100)
+_BACKENDS = ('threads', 'async')
+_LATENCY = 0.02
+_WORKERS = 8
+_SCOPE = 'sns-vpc-elb-autoscaling-ec2-sec'
+_NAME = 'boto3-client-sdk'
+
+
+def usage():
+    print("""
+    Benchmark start, reconcile and clean offline, against an in-memory fake of AWS (see boto3_fake.py).
+    Each scenario seeds N tagged VPC stacks, then times one start, a no-op reconcile and one clean,
+    counting requests per operation and the peak memory of a fresh process.
+
+    Usage:
+        [ -s --scenarios   <n,n,..> ]    VPC stacks per scenario     (default: %s)
+        [ -l --latency     <seconds> ]   Delay of each request       (default: %s)
+        [ -j --workers     <value> ]     Concurrent workers          (default: %s)
+        [ -b --backends    <name,..> ]   Backends to run each on     (default: %s)
+        [ -o --output      <file> ]      Write results as JSON
+        [ -c --compare     <file> ]      Fail if any request count exceeds this earlier output
+    The async backend is skipped when aiobotocore is not installed.
+        """ % (','.join(str(n) for n in _SCENARIOS), _LATENCY, _WORKERS, ','.join(_BACKENDS)))
+    sys.exit(2)
+
+
+def awsbaby(*argv):
+    """
+    Run awsbaby.py in this process with its output discarded
+    """
+    sys.argv = ['awsbaby.py'] + list(argv)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            runpy.run_path('awsbaby.py', run_name='__main__')
+        except SystemExit:
+            pass
+
+
+def scenario(vpcs, latency, workers, backend):
+    """
+    Run one scenario against a new fake on 'backend', in this (child) process
+    :return: wall time, requests and peak RSS of each phase
+    """
+    os.environ.update(AWS_ACCESS_KEY_ID='fake', AWS_SECRET_ACCESS_KEY='fake', AWS_DEFAULT_REGION='eu-west-1')
+    sys.path.insert(0, '.')
+    import aws.boto3_pool as pool
+    import aws.boto3_cache as cache
+    import boto3_fake as fake
+
+    aws = fake.Fake(latency)
+    aws.install(pool.session(None))
+    if backend == 'async':
+        import aws.boto3_async as aio
+        aws.install(aio.session(None), asynchronous=True)
+    aws.seed(vpcs - 1, _NAME, _NAME)
+    workdir = tempfile.TemporaryDirectory()
+    journal = os.path.join(workdir.name, 'journal.jsonl')
+
+    results = []
+    for phase in ('start', 'reconcile', 'clean'):
+        cache.clear()
+        aws.calls.clear()
+        began = time.perf_counter()
+        awsbaby('-a', phase, '-w', _SCOPE, '-j', str(workers), '-l', journal, '-b', backend)
+        results.append({'vpcs': vpcs, 'phase': phase, 'backend': backend,
+                        'wall': round(time.perf_counter() - began, 3), 'requests': sum(aws.calls.values()),
+                        'calls': dict(sorted(aws.calls.items())),
+                        'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss})
+    if aws.ec2['Vpc']:
+        print('Warning: %d vpcs left after clean' % len(aws.ec2['Vpc']), file=sys.stderr)
+    workdir.cleanup()
+    return results
+
+
+def regressions(results, baseline):
+    """
+    Operations whose request count rose since 'baseline', as messages
+    """
+    before = dict(((each['vpcs'], each['phase'], each.get('backend', 'threads')), each['calls']) for each in baseline)
+    found = []
+    for each in results:
+        for operation, count in each['calls'].items():
+            previous = before.get((each['vpcs'], each['phase'], each['backend']), {}).get(operation)
+            if previous is not None and count > previous:
+                found.append('%d vpcs %s %s: %s %d -> %d calls' % (each['vpcs'], each['phase'], each['backend'],
+                                                                    operation, previous, count))
+    return found
+
+
+def main(argv):
+    scenarios, latency, workers, backends, output, compare = _SCENARIOS, _LATENCY, _WORKERS, _BACKENDS, None, None
+    try:
+        opts, args = getopt.getopt(argv, "b:c:hj:l:o:s:", ["backends=", "compare=", "help", "workers=", "latency=",
+                                                           "output=", "scenarios=", "child="])
+    except getopt.GetoptError as e:
+        print(e)
+        usage()
+
+    child = None
+    for opt, arg in opts:
+        if opt in ("-b", "--backends"):
+            backends = arg.split(',')
+        elif opt in ("-c", "--compare"):
+            compare = arg
+        elif opt in ("-j", "--workers"):
+            workers = int(arg)
+        elif opt in ("-l", "--latency"):
+            latency = float(arg)
+        elif opt in ("-o", "--output"):
+            output = arg
+        elif opt in ("-s", "--scenarios"):
+            scenarios = [int(n) for n in arg.split(',')]
+        elif opt == "--child":
+            child = int(arg)
+        else:
+            usage()
+
+    if child:
+        print(json.dumps(scenario(child, latency, workers, backends[0])))
+        return
+
+    sys.path.insert(0, '.')
+    import aws.boto3_async as aio
+    if 'async' in backends and not aio.available():
+        print('Skipping the async backend: aiobotocore is not installed')
+        backends = [backend for backend in backends if backend != 'async']
+
+    # One process per scenario and backend so peak RSS is measured from a clean start
+    results = []
+    print('%8s %8s %10s %10s %10s %12s' % ('vpcs', 'backend', 'phase', 'wall (s)', 'requests', 'peak rss kB'))
+    for vpcs in scenarios:
+        for backend in backends:
+            done = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(vpcs), '-l', str(latency),
+                                   '-j', str(workers), '-b', backend], stdout=subprocess.PIPE, universal_newlines=True,
+                                  check=True)
+            for each in json.loads(done.stdout.strip().splitlines()[-1]):
+                print('%8d %8s %10s %10.3f %10d %12d' % (each['vpcs'], each['backend'], each['phase'], each['wall'],
+                                                         each['requests'], each['rss_kb']))
+                results.append(each)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=1)
+    if compare:
+        with open(compare) as f:
+            found = regressions(results, json.load(f))
+        for each in found:
+            print('Regression: %s' % each)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    main(sys.argv[1:])
@@ -0,0 +1,714 @@
+#############################################
+# Copyright 2019 noelmcloughlin
+#############################################
+
+import copy
+import time
+import asyncio
+import itertools
+import threading
+import collections
+from botocore.awsrequest import AWSResponse
+
+# EC2 resource types: (id key, describe key, id prefix)
+_EC2 = {
+    'Address': ('AllocationId', 'Addresses', 'eipalloc'),
+    'Instance': ('InstanceId', 'Instances', 'i'),
+    'InternetGateway': ('InternetGatewayId', 'InternetGateways', 'igw'),
+    'LaunchTemplate': ('LaunchTemplateId', 'LaunchTemplates', 'lt'),
+    'NatGateway': ('NatGatewayId', 'NatGateways', 'nat'),
+    'NetworkAcl': ('NetworkAclId', 'NetworkAcls', 'acl'),
+    'NetworkInterface': ('NetworkInterfaceId', 'NetworkInterfaces', 'eni'),
+    'RouteTable': ('RouteTableId', 'RouteTables', 'rtb'),
+    'SecurityGroup': ('GroupId', 'SecurityGroups', 'sg'),
+    'Subnet': ('SubnetId', 'Subnets', 'subnet'),
+    'Volume': ('VolumeId', 'Volumes', 'vol'),
+    'Vpc': ('VpcId', 'Vpcs', 'vpc'),
+    'VpcEndpoint': ('VpcEndpointId', 'VpcEndpoints', 'vpce'),
+    'VpcPeeringConnection': ('VpcPeeringConnectionId', 'VpcPeeringConnections', 'pcx'),
+}
+_DESCRIBES = dict((describe, noun) for noun, (_, describe, _) in _EC2.items())
+
+
+class FakeError(Exception):
+    """
+    An AWS error response: returned to botocore, which raises it as a ClientError
+    """
+    def __init__(self, code, message=''):
+        super().__init__(code)
+        self.code = code
+        self.message = message or code
+
+
+class Fake:
+    """
+    FAKE AWS
+    In-memory EC2, ELBv2, AutoScaling and SNS answering botocore requests without a network.
+    Every request waits 'latency' seconds, is counted by operation, and changes or reads the
+    fake's state much as AWS would, so start and clean run end to end against it. New load
+    balancers stay 'provisioning' for 'provisioning' seconds.
+    https://botocore.amazonaws.com/v1/documentation/api/latest/topics/events.html
+    """
+    def __init__(self, latency=0.0, provisioning=0.0):
+        self.latency = latency
+        self.provisioning = provisioning
+        self.ready = {}
+        self.lock = threading.RLock()
+        self.calls = collections.Counter()
+        self.ids = itertools.count(1)
+        self.ec2 = collections.defaultdict(dict)
+        self.versions = {}
+        self.elb = collections.defaultdict(dict)
+        self.asg = collections.defaultdict(dict)
+        self.topics = {}
+        self.tokens = {}
+
+    def install(self, session, asynchronous=False):
+        """
+        Answer every request of clients made by boto3, botocore or aiobotocore 'session' from this fake.
+        An aiobotocore session is 'asynchronous': its requests wait on the event loop instead of blocking it.
+        """
+        events = session.events if hasattr(session, 'events') else session.get_component('event_emitter')
+        events.register('before-parameter-build', self.capture, unique_id='boto3-fake-params')
+        events.register('before-call', self.handle_async if asynchronous else self.handle, unique_id='boto3-fake-call')
+
+    def seed(self, count, name, tag, zones=('eu-west-1a', 'eu-west-1b'), cidrs=('10.0.0.0/25', '10.0.0.128/25'),
+             instances=2):
+        """
+        Create 'count' tagged VPC stacks like those start builds, without counting any requests
+        """
+        tags = [{'Key': name, 'Value': tag}]
+        with self.lock:
+            for number in range(count):
+                vpc = self.ec2_create('Vpc', {'CidrBlock': '10.%d.%d.0/24' % divmod(number, 256)})['Vpc']
+                vpc['Tags'] = list(tags)
+                self.add('SecurityGroup', GroupName='%s-%d' % (name, number), VpcId=vpc['VpcId'], Tags=list(tags),
+                         IpPermissions=[{'IpProtocol': 'tcp', 'FromPort': 80, 'ToPort': 80}], IpPermissionsEgress=[])
+                self.add('InternetGateway', Tags=list(tags),
+                         Attachments=[{'VpcId': vpc['VpcId'], 'State': 'available'}])
+                table = self.add('RouteTable', VpcId=vpc['VpcId'], Tags=list(tags), Associations=[],
+                                 Routes=[{'DestinationCidrBlock': '0.0.0.0/0'}])
+                template = self.add('LaunchTemplate', LaunchTemplateName='%s-%d' % (name, number), Tags=list(tags),
+                                    LatestVersionNumber=2, DefaultVersionNumber=1)
+                self.versions[template['LaunchTemplateId']] = [1, 2]
+                for zone, cidr in zip(zones, cidrs):
+                    subnet = self.add('Subnet', VpcId=vpc['VpcId'], AvailabilityZone=zone, CidrBlock=cidr,
+                                      State='available', MapPublicIpOnLaunch=True, Tags=list(tags))
+                    table['Associations'].append({'Main': False, 'SubnetId': subnet['SubnetId'],
+                                                  'RouteTableAssociationId': self.new_id('rtbassoc'),
+                                                  'RouteTableId': table['RouteTableId']})
+                    self.add('NetworkAcl', VpcId=vpc['VpcId'], IsDefault=False, Tags=list(tags), Associations=[],
+                             Entries=[{'RuleNumber': rule, 'Egress': egress, 'CidrBlock': cidr}
+                                      for rule in (101, 102) for egress in (False, True)])
+                    for _ in range(instances):
+                        self.add('Instance', State={'Code': 16, 'Name': 'running'}, SubnetId=subnet['SubnetId'],
+                                 VpcId=vpc['VpcId'], Tags=list(tags), Placement={'AvailabilityZone': zone})
+
+    @staticmethod
+    def capture(params, context, **kwargs):
+        context['fake_params'] = copy.deepcopy(params)
+
+    def handle(self, model, context, **kwargs):
+        """
+        before-call hook: a (response, parsed) pair short-circuits the HTTP request
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        return self.answer(model, context)
+
+    async def handle_async(self, model, context, **kwargs):
+        """
+        before-call hook of aiobotocore clients (see handle)
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.answer(model, context)
+
+    def answer(self, model, context):
+        """
+        Count the request and answer it from the fake's state
+        """
+        service = model.service_model.service_name
+        params = context.get('fake_params', {})
+        with self.lock:
+            self.calls[model.name] += 1
+            try:
+                parsed = self.dispatch(service, model.name, params)
+                status = 200
+            except FakeError as err:
+                parsed = {'Error': {'Code': err.code, 'Message': err.message}}
+                status = 400
+            parsed = copy.deepcopy(parsed or {})
+        parsed.setdefault('ResponseMetadata', {'HTTPStatusCode': status})
+        return AWSResponse('https://fake.amazonaws.com', status, {}, None), parsed
+
+    def dispatch(self, service, operation, params):
+        handler = getattr(self, '%s_%s' % (service, operation), None)
+        if handler:
+            return handler(params)
+        if service == 'ec2':
+            for verb in ('Create', 'Delete', 'Describe'):
+                if operation.startswith(verb):
+                    return getattr(self, 'ec2_' + verb.lower())(operation[len(verb):], params)
+        raise FakeError('InvalidAction', 'The fake does not implement %s.%s' % (service, operation))
+
+    def new_id(self, prefix):
+        return '%s-%017x' % (prefix, next(self.ids))
+
+    @staticmethod
+    def tags(params, key='TagSpecifications'):
+        return [tag for spec in params.get(key, ()) for tag in spec.get('Tags', ())]
+
+    @staticmethod
+    def matches(record, filters):
+        """
+        True if 'record' passes every EC2/AutoScaling filter
+        """
+        for each in filters or ():
+            name, values = each['Name'], [str(value) for value in each['Values']]
+            if name.startswith('tag:'):
+                found = [tag['Value'] for tag in record.get('Tags', ()) if tag['Key'] == name[4:]]
+            elif name == 'key':
+                found = [record.get('Key')]
+            elif name == 'instance-state-name':
+                found = [record['State']['Name']]
+            elif name in ('vpc-id', 'attachment.vpc-id'):
+                found = [record.get('VpcId')] + [item.get('VpcId') for item in record.get('Attachments', ())]
+            else:
+                found = [record.get(''.join(word.capitalize() for word in name.split('-')))]
+            if not set(str(value) for value in found) & set(values):
+                return False
+        return True
+
+    def record(self, noun, record_id):
+        if record_id not in self.ec2[noun]:
+            raise FakeError('Invalid%sID.NotFound' % noun, 'The %s ID %s does not exist' % (noun, record_id))
+        return self.ec2[noun][record_id]
+
+    def add(self, noun, **record):
+        key, _, prefix = _EC2[noun]
+        record.setdefault(key, self.new_id(prefix))
+        record.setdefault('Tags', [])
+        self.ec2[noun][record[key]] = record
+        return record
+
+    ###########
+    # EC2
+    ###########
+
+    def ec2_create(self, noun, params):
+        if noun not in _EC2:
+            raise FakeError('InvalidAction', 'The fake does not implement Create%s' % noun)
+        record = dict((k, v) for k, v in params.items() if k not in ('DryRun', 'ClientToken', 'TagSpecifications'))
+        record = self.add(noun, Tags=self.tags(params), **record)
+        if noun == 'Vpc':
+            record['State'] = 'available'
+            self.add('SecurityGroup', GroupName='default', VpcId=record['VpcId'], IpPermissions=[],
+                     IpPermissionsEgress=[])
+            self.add('RouteTable', VpcId=record['VpcId'], Routes=[],
+                     Associations=[{'Main': True, 'RouteTableAssociationId': self.new_id('rtbassoc')}])
+            self.add('NetworkAcl', VpcId=record['VpcId'], IsDefault=True, Entries=[], Associations=[])
+        elif noun == 'SecurityGroup':
+            record.update(IpPermissions=[], IpPermissionsEgress=[])
+            return {'GroupId': record['GroupId']}
+        elif noun == 'InternetGateway':
+            record['Attachments'] = []
+        elif noun == 'RouteTable':
+            record.update(Associations=[], Routes=[])
+        elif noun == 'NetworkAcl':
+            record.update(IsDefault=False, Entries=[], Associations=[])
+        elif noun == 'LaunchTemplate':
+            record.update(LatestVersionNumber=1, DefaultVersionNumber=1)
+            self.versions[record['LaunchTemplateId']] = [1]
+        elif noun == 'Subnet':
+            record['State'] = 'available'
+        return {noun: record}
+
+    def ec2_delete(self, noun, params):
+        plural = noun.endswith('s') and noun[:-1] in _EC2
+        noun = noun[:-1] if plural else noun
+        if noun not in _EC2:
+            raise FakeError('InvalidAction', 'The fake does not implement Delete%s' % noun)
+        key = _EC2[noun][0]
+        for record_id in (params[key + 's'] if plural else [params[key]]):
+            self.record(noun, record_id)
+            if noun == 'Vpc':
+                self.delete_vpc(record_id)
+            del self.ec2[noun][record_id]
+        return {}
+
+    def delete_vpc(self, vpc_id):
+        """
+        Refuse to delete a VPC with dependencies, like AWS, then drop its default resources
+        """
+        for noun in ('Subnet', 'SecurityGroup', 'RouteTable', 'NetworkAcl', 'NatGateway', 'NetworkInterface'):
+            for record in self.ec2[noun].values():
+                if record.get('VpcId') != vpc_id:
+                    continue
+                default = (record.get('GroupName') == 'default' or record.get('IsDefault') or
+                           any(item.get('Main') for item in record.get('Associations', ())))
+                if not default:
+                    raise FakeError('DependencyViolation', 'The vpc %s has dependencies (%s)' % (vpc_id, noun))
+        for gateway in self.ec2['InternetGateway'].values():
+            if any(item['VpcId'] == vpc_id for item in gateway['Attachments']):
+                raise FakeError('DependencyViolation', 'The vpc %s has an internet gateway attached' % vpc_id)
+        for noun in ('SecurityGroup', 'RouteTable', 'NetworkAcl'):
+            for record_id, record in list(self.ec2[noun].items()):
+                if record.get('VpcId') == vpc_id:
+                    del self.ec2[noun][record_id]
+
+    def ec2_describe(self, describe, params):
+        if describe not in _DESCRIBES:
+            raise FakeError('InvalidAction', 'The fake does not implement Describe%s' % describe)
+        noun = _DESCRIBES[describe]
+        key = _EC2[noun][0]
+        ids = params.get(key + 's')
+        records = [self.record(noun, record_id) for record_id in ids] if ids else list(self.ec2[noun].values())
+        records = [record for record in records if self.matches(record, params.get('Filters'))]
+        if noun == 'Instance':
+            return {'Reservations': [{'ReservationId': self.new_id('r'), 'Instances': records}] if records else []}
+        return {describe: records}
+
+    def ec2_CreateTags(self, params):
+        for record_id in params['Resources']:
+            for records in self.ec2.values():
+                if record_id in records:
+                    keys = set(tag['Key'] for tag in params['Tags'])
+                    records[record_id]['Tags'] = [tag for tag in records[record_id]['Tags'] if tag['Key'] not in keys]
+                    records[record_id]['Tags'] += params['Tags']
+        return {}
+
+    def ec2_DeleteTags(self, params):
+        keys = set(tag['Key'] for tag in params.get('Tags', ()))
+        for record_id in params['Resources']:
+            for records in self.ec2.values():
+                if record_id in records:
+                    records[record_id]['Tags'] = [tag for tag in records[record_id]['Tags'] if tag['Key'] not in keys]
+        return {}
+
+    def ec2_RunInstances(self, params):
+        if params.get('ClientToken') in self.tokens:
+            return self.tokens[params['ClientToken']]
+        subnet = self.record('Subnet', params['SubnetId']) if params.get('SubnetId') else {}
+        instances = [self.add('Instance', State={'Code': 16, 'Name': 'running'}, SubnetId=subnet.get('SubnetId'),
+                              VpcId=subnet.get('VpcId'), Tags=self.tags(params), LaunchTemplate=params.get(
+                                  'LaunchTemplate'), Placement=params.get('Placement', {}))
+                     for _ in range(int(params['MaxCount']))]
+        launched = [dict(instance, State={'Code': 0, 'Name': 'pending'}) for instance in instances]
+        response = {'ReservationId': self.new_id('r'), 'Instances': launched}
+        if params.get('ClientToken'):
+            self.tokens[params['ClientToken']] = response
+        return response
+
+    def ec2_TerminateInstances(self, params):
+        changes = []
+        for instance_id in params['InstanceIds']:
+            instance = self.record('Instance', instance_id)
+            changes.append({'InstanceId': instance_id, 'PreviousState': instance['State'],
+                            'CurrentState': {'Code': 48, 'Name': 'terminated'}})
+            instance['State'] = {'Code': 48, 'Name': 'terminated'}
+        return {'TerminatingInstances': changes}
+
+    def ec2_AllocateAddress(self, params):
+        address = self.add('Address', Domain=params.get('Domain', 'vpc'), PublicIp='198.51.100.%d' % (
+            len(self.ec2['Address']) % 250 + 1), Tags=self.tags(params))
+        return {'AllocationId': address['AllocationId'], 'PublicIp': address['PublicIp'], 'Domain': address['Domain']}
+
+    def ec2_ReleaseAddress(self, params):
+        self.record('Address', params['AllocationId'])
+        del self.ec2['Address'][params['AllocationId']]
+        return {}
+
+    def ec2_AssociateAddress(self, params):
+        address = self.record('Address', params['AllocationId'])
+        address.update(InstanceId=params.get('InstanceId'), AssociationId=self.new_id('eipassoc'))
+        return {'AssociationId': address['AssociationId']}
+
+    def ec2_DisassociateAddress(self, params):
+        for address in self.ec2['Address'].values():
+            if address.get('AssociationId') == params.get('AssociationId'):
+                address.pop('AssociationId')
+                address.pop('InstanceId', None)
+        return {}
+
+    def ec2_AttachInternetGateway(self, params):
+        self.record('InternetGateway', params['InternetGatewayId'])['Attachments'] = [
+            {'VpcId': params['VpcId'], 'State': 'available'}]
+        return {}
+
+    def ec2_DetachInternetGateway(self, params):
+        self.record('InternetGateway', params['InternetGatewayId'])['Attachments'] = []
+        return {}
+
+    def ec2_CreateRoute(self, params):
+        route = dict((k, v) for k, v in params.items() if k not in ('DryRun', 'RouteTableId'))
+        self.record('RouteTable', params['RouteTableId'])['Routes'].append(route)
+        return {'Return': True}
+
+    def ec2_DeleteRoute(self, params):
+        table = self.record('RouteTable', params['RouteTableId'])
+        cidr = params.get('DestinationCidrBlock') or params.get('DestinationIpv6CidrBlock')
+        routes = [route for route in table['Routes'] if cidr not in route.values()]
+        if len(routes) == len(table['Routes']):
+            raise FakeError('InvalidRoute.NotFound', 'No route with destination %s' % cidr)
+        table['Routes'] = routes
+        return {}
+
+    def ec2_AssociateRouteTable(self, params):
+        association = {'Main': False, 'RouteTableAssociationId': self.new_id('rtbassoc'),
+                       'SubnetId': params.get('SubnetId'), 'RouteTableId': params['RouteTableId']}
+        self.record('RouteTable', params['RouteTableId'])['Associations'].append(association)
+        return {'AssociationId': association['RouteTableAssociationId']}
+
+    def ec2_DisassociateRouteTable(self, params):
+        for table in self.ec2['RouteTable'].values():
+            table['Associations'] = [item for item in table['Associations']
+                                     if item['RouteTableAssociationId'] != params['AssociationId']]
+        return {}
+
+    def ec2_CreateNetworkAclEntry(self, params):
+        entry = dict((k, v) for k, v in params.items() if k not in ('DryRun', 'NetworkAclId'))
+        self.record('NetworkAcl', params['NetworkAclId'])['Entries'].append(entry)
+        return {}
+
+    def ec2_DeleteNetworkAclEntry(self, params):
+        acl = self.record('NetworkAcl', params['NetworkAclId'])
+        entries = [entry for entry in acl['Entries']
+                   if (entry['RuleNumber'], entry['Egress']) != (params['RuleNumber'], params['Egress'])]
+        if len(entries) == len(acl['Entries']):
+            raise FakeError('InvalidNetworkAclEntry.NotFound', 'No entry %s' % params['RuleNumber'])
+        acl['Entries'] = entries
+        return {}
+
+    def ec2_ReplaceNetworkAclAssociation(self, params):
+        return {'NewAssociationId': self.new_id('aclassoc')}
+
+    def ec2_ModifySubnetAttribute(self, params):
+        subnet = self.record('Subnet', params['SubnetId'])
+        if 'MapPublicIpOnLaunch' in params:
+            subnet['MapPublicIpOnLaunch'] = params['MapPublicIpOnLaunch']['Value']
+        return {}
+
+    def ec2_AssociateVpcCidrBlock(self, params):
+        self.record('Vpc', params['VpcId'])
+        return {'VpcId': params['VpcId']}
+
+    def security_group_rules(self, params, key):
+        group = self.record('SecurityGroup', params['GroupId'])
+        return group, key, params.get('IpPermissions', ())
+
+    def ec2_AuthorizeSecurityGroupIngress(self, params):
+        group, key, rules = self.security_group_rules(params, 'IpPermissions')
+        group[key] = group[key] + list(rules)
+        return {'Return': True}
+
+    def ec2_AuthorizeSecurityGroupEgress(self, params):
+        group, key, rules = self.security_group_rules(params, 'IpPermissionsEgress')
+        group[key] = group[key] + list(rules)
+        return {'Return': True}
+
+    def ec2_RevokeSecurityGroupIngress(self, params):
+        group, key, rules = self.security_group_rules(params, 'IpPermissions')
+        group[key] = [rule for rule in group[key] if rule not in rules]
+        return {'Return': True}
+
+    def ec2_RevokeSecurityGroupEgress(self, params):
+        group, key, rules = self.security_group_rules(params, 'IpPermissionsEgress')
+        group[key] = [rule for rule in group[key] if rule not in rules]
+        return {'Return': True}
+
+    def ec2_DescribeSecurityGroupReferences(self, params):
+        return {'SecurityGroupReferenceSet': []}
+
+    def ec2_CreateLaunchTemplateVersion(self, params):
+        versions = self.versions[self.record('LaunchTemplate', params['LaunchTemplateId'])['LaunchTemplateId']]
+        versions.append(max(versions or [0]) + 1)
+        self.ec2['LaunchTemplate'][params['LaunchTemplateId']]['LatestVersionNumber'] = versions[-1]
+        return {'LaunchTemplateVersion': {'LaunchTemplateId': params['LaunchTemplateId'],
+                                          'VersionNumber': versions[-1]}}
+
+    def ec2_DescribeLaunchTemplateVersions(self, params):
+        self.record('LaunchTemplate', params['LaunchTemplateId'])
+        return {'LaunchTemplateVersions': [{'LaunchTemplateId': params['LaunchTemplateId'], 'VersionNumber': number}
+                                           for number in self.versions[params['LaunchTemplateId']]]}
+
+    def ec2_DeleteLaunchTemplateVersions(self, params):
+        versions = self.versions[self.record('LaunchTemplate', params['LaunchTemplateId'])['LaunchTemplateId']]
+        deleted = [int(number) for number in params['Versions'] if int(number) in versions]
+        versions[:] = [number for number in versions if number not in deleted]
+        return {'SuccessfullyDeletedLaunchTemplateVersions': [
+            {'LaunchTemplateId': params['LaunchTemplateId'], 'VersionNumber': number} for number in deleted]}
+
+    ###########
+    # ELBv2
+    ###########
+
+    def arn(self, kind, name):
+        return 'arn:aws:elasticloadbalancing:eu-west-1:000000000000:%s/%s/%s' % (kind, name, self.new_id('x')[2:])
+
+    def elb_record(self, kind, arn, code):
+        if arn not in self.elb[kind]:
+            raise FakeError(code, '%s not found' % arn)
+        return self.elb[kind][arn]
+
+    def elbv2_CreateLoadBalancer(self, params):
+        for balancer in self.elb['LoadBalancers'].values():
+            if balancer['LoadBalancerName'] == params['Name']:
+                return {'LoadBalancers': [balancer]}
+        subnets = [self.record('Subnet', subnet_id) for subnet_id in params.get('Subnets', ())]
+        balancer = {'LoadBalancerArn': self.arn('loadbalancer/app', params['Name']),
+                    'LoadBalancerName': params['Name'],
+                    'State': {'Code': 'provisioning' if self.provisioning else 'active'},
+                    'VpcId': subnets[0]['VpcId'] if subnets else None, 'Scheme': params.get('Scheme'),
+                    'Type': params.get('Type', 'application'), 'SecurityGroups': params.get('SecurityGroups', [])}
+        self.elb['LoadBalancers'][balancer['LoadBalancerArn']] = balancer
+        self.elb['Tags'][balancer['LoadBalancerArn']] = list(params.get('Tags', ()))
+        self.ready[balancer['LoadBalancerArn']] = time.monotonic() + self.provisioning
+        return {'LoadBalancers': [balancer]}
+
+    def elbv2_DescribeLoadBalancers(self, params):
+        for arn, balancer in self.elb['LoadBalancers'].items():
+            if self.ready.get(arn, 0) <= time.monotonic():
+                balancer['State'] = {'Code': 'active'}
+        if params.get('LoadBalancerArns'):
+            return {'LoadBalancers': [self.elb_record('LoadBalancers', arn, 'LoadBalancerNotFound')
+                                      for arn in params['LoadBalancerArns']]}
+        balancers = list(self.elb['LoadBalancers'].values())
+        if params.get('Names'):
+            balancers = [balancer for balancer in balancers if balancer['LoadBalancerName'] in params['Names']]
+            if not balancers:
+                raise FakeError('LoadBalancerNotFound', 'Load balancers %s not found' % params['Names'])
+        return {'LoadBalancers': balancers}
+
+    def elbv2_DeleteLoadBalancer(self, params):
+        self.elb['LoadBalancers'].pop(params['LoadBalancerArn'], None)
+        for arn, listener in list(self.elb['Listeners'].items()):
+            if listener['LoadBalancerArn'] == params['LoadBalancerArn']:
+                del self.elb['Listeners'][arn]
+        return {}
+
+    def elbv2_SetSecurityGroups(self, params):
+        balancer = self.elb_record('LoadBalancers', params['LoadBalancerArn'], 'LoadBalancerNotFound')
+        balancer['SecurityGroups'] = params['SecurityGroups']
+        return {'SecurityGroupIds': params['SecurityGroups']}
+
+    def elbv2_CreateTargetGroup(self, params):
+        for group in self.elb['TargetGroups'].values():
+            if group['TargetGroupName'] == params['Name']:
+                return {'TargetGroups': [group]}
+        group = {'TargetGroupArn': self.arn('targetgroup', params['Name']), 'TargetGroupName': params['Name'],
+                 'Protocol': params.get('Protocol'), 'Port': params.get('Port'), 'VpcId': params.get('VpcId'),
+                 'LoadBalancerArns': []}
+        self.elb['TargetGroups'][group['TargetGroupArn']] = group
+        self.elb['Tags'][group['TargetGroupArn']] = list(params.get('Tags', ()))
+        return {'TargetGroups': [group]}
+
+    def elbv2_DescribeTargetGroups(self, params):
+        if params.get('TargetGroupArns'):
+            return {'TargetGroups': [self.elb_record('TargetGroups', arn, 'TargetGroupNotFound')
+                                     for arn in params['TargetGroupArns']]}
+        groups = list(self.elb['TargetGroups'].values())
+        if params.get('LoadBalancerArn'):
+            self.elb_record('LoadBalancers', params['LoadBalancerArn'], 'LoadBalancerNotFound')
+            groups = [group for group in groups if params['LoadBalancerArn'] in group['LoadBalancerArns']]
+        if params.get('Names'):
+            groups = [group for group in groups if group['TargetGroupName'] in params['Names']]
+        return {'TargetGroups': groups}
+
+    def elbv2_DeleteTargetGroup(self, params):
+        group = self.elb['TargetGroups'].get(params['TargetGroupArn'])
+        if group and any(listener['TargetGroupArn'] == group['TargetGroupArn']
+                         for listener in self.elb['Listeners'].values()):
+            raise FakeError('ResourceInUse', 'Target group %s is in use by a listener' % group['TargetGroupArn'])
+        self.elb['TargetGroups'].pop(params['TargetGroupArn'], None)
+        return {}
+
+    def elbv2_RegisterTargets(self, params):
+        group = self.elb_record('TargetGroups', params['TargetGroupArn'], 'TargetGroupNotFound')
+        group.setdefault('Targets', []).extend(params['Targets'])
+        return {}
+
+    def elbv2_CreateListener(self, params):
+        self.elb_record('LoadBalancers', params['LoadBalancerArn'], 'LoadBalancerNotFound')
+        target_group_arn = params['DefaultActions'][0].get('TargetGroupArn')
+        group = self.elb_record('TargetGroups', target_group_arn, 'TargetGroupNotFound')
+        if params['LoadBalancerArn'] not in group['LoadBalancerArns']:
+            group['LoadBalancerArns'].append(params['LoadBalancerArn'])
+        listener = {'ListenerArn': self.arn('listener/app', 'listener'), 'LoadBalancerArn': params['LoadBalancerArn'],
+                    'Protocol': params.get('Protocol'), 'Port': params.get('Port'),
+                    'DefaultActions': params['DefaultActions'], 'TargetGroupArn': target_group_arn}
+        self.elb['Listeners'][listener['ListenerArn']] = listener
+        self.elb['Tags'][listener['ListenerArn']] = list(params.get('Tags', ()))
+        return {'Listeners': [listener]}
+
+    def elbv2_DescribeListeners(self, params):
+        self.elb_record('LoadBalancers', params['LoadBalancerArn'], 'LoadBalancerNotFound')
+        return {'Listeners': [listener for listener in self.elb['Listeners'].values()
+                              if listener['LoadBalancerArn'] == params['LoadBalancerArn']]}
+
+    def elbv2_DeleteListener(self, params):
+        listener = self.elb['Listeners'].pop(params['ListenerArn'], None)
+        if listener and not any(other['TargetGroupArn'] == listener['TargetGroupArn']
+                                for other in self.elb['Listeners'].values()):
+            group = self.elb['TargetGroups'].get(listener['TargetGroupArn'])
+            if group:
+                group['LoadBalancerArns'] = [arn for arn in group['LoadBalancerArns']
+                                             if arn != listener['LoadBalancerArn']]
+        return {}
+
+    def elbv2_AddTags(self, params):
+        for arn in params['ResourceArns']:
+            keys = set(tag['Key'] for tag in params['Tags'])
+            self.elb['Tags'][arn] = [tag for tag in self.elb['Tags'].get(arn, ()) if tag['Key'] not in keys]
+            self.elb['Tags'][arn] += params['Tags']
+        return {}
+
+    def elbv2_RemoveTags(self, params):
+        for arn in params['ResourceArns']:
+            self.elb['Tags'][arn] = [tag for tag in self.elb['Tags'].get(arn, ())
+                                     if tag['Key'] not in params['TagKeys']]
+        return {}
+
+    def elbv2_DescribeTags(self, params):
+        if len(params['ResourceArns']) > 20:
+            raise FakeError('ValidationError', 'At most 20 resource ARNs can be described at a time')
+        return {'TagDescriptions': [{'ResourceArn': arn, 'Tags': self.elb['Tags'].get(arn, [])}
+                                    for arn in params['ResourceArns']]}
+
+    ###############
+    # AUTOSCALING
+    ###############
+
+    def autoscaling_CreateLaunchConfiguration(self, params):
+        name = params['LaunchConfigurationName']
+        if name in self.asg['LaunchConfigurations']:
+            raise FakeError('AlreadyExists', 'Launch configuration %s already exists' % name)
+        self.asg['LaunchConfigurations'][name] = {'LaunchConfigurationName': name, 'ImageId': params.get('ImageId')}
+        return {}
+
+    def autoscaling_DescribeLaunchConfigurations(self, params):
+        names = params.get('LaunchConfigurationNames')
+        return {'LaunchConfigurations': [config for name, config in self.asg['LaunchConfigurations'].items()
+                                         if not names or name in names]}
+
+    def autoscaling_DeleteLaunchConfiguration(self, params):
+        name = params['LaunchConfigurationName']
+        if any(group.get('LaunchConfigurationName') == name for group in self.asg['AutoScalingGroups'].values()):
+            raise FakeError('ResourceInUse', 'Launch configuration %s is in use' % name)
+        self.asg['LaunchConfigurations'].pop(name, None)
+        return {}
+
+    def autoscaling_CreateAutoScalingGroup(self, params):
+        name = params['AutoScalingGroupName']
+        if name in self.asg['AutoScalingGroups']:
+            raise FakeError('AlreadyExists', 'AutoScalingGroup %s already exists' % name)
+        self.asg['AutoScalingGroups'][name] = {
+            'AutoScalingGroupName': name, 'LaunchConfigurationName': params.get('LaunchConfigurationName'),
+            'MinSize': params.get('MinSize'), 'MaxSize': params.get('MaxSize'), 'Instances': [],
+            'TargetGroupARNs': [], 'Tags': [dict(tag, ResourceId=name, ResourceType='auto-scaling-group')
+                                            for tag in params.get('Tags', ())]}
+        return {}
+
+    def autoscaling_DescribeAutoScalingGroups(self, params):
+        names = params.get('AutoScalingGroupNames')
+        return {'AutoScalingGroups': [group for name, group in self.asg['AutoScalingGroups'].items()
+                                      if not names or name in names]}
+
+    def autoscaling_DeleteAutoScalingGroup(self, params):
+        name = params['AutoScalingGroupName']
+        if name not in self.asg['AutoScalingGroups']:
+            raise FakeError('ValidationError', 'AutoScalingGroup name not found - %s' % name)
+        del self.asg['AutoScalingGroups'][name]
+        self.asg['Policies'] = dict((key, policy) for key, policy in self.asg['Policies'].items()
+                                    if policy['AutoScalingGroupName'] != name)
+        self.asg['Notifications'] = dict((key, notice) for key, notice in self.asg['Notifications'].items()
+                                         if notice['AutoScalingGroupName'] != name)
+        return {}
+
+    def autoscaling_DescribeAutoScalingInstances(self, params):
+        return {'AutoScalingInstances': []}
+
+    def autoscaling_AttachLoadBalancerTargetGroups(self, params):
+        group = self.asg['AutoScalingGroups'][params['AutoScalingGroupName']]
+        group['TargetGroupARNs'] = sorted(set(group['TargetGroupARNs']) | set(params['TargetGroupARNs']))
+        return {}
+
+    def autoscaling_DetachLoadBalancerTargetGroups(self, params):
+        group = self.asg['AutoScalingGroups'].get(params['AutoScalingGroupName'], {'TargetGroupARNs': []})
+        group['TargetGroupARNs'] = [arn for arn in group['TargetGroupARNs'] if arn not in params['TargetGroupARNs']]
+        return {}
+
+    def autoscaling_CreateOrUpdateTags(self, params):
+        for tag in params['Tags']:
+            group = self.asg['AutoScalingGroups'].get(tag['ResourceId'])
+            if group:
+                group['Tags'] = [old for old in group['Tags'] if old['Key'] != tag['Key']] + [tag]
+        return {}
+
+    def autoscaling_DeleteTags(self, params):
+        for tag in params['Tags']:
+            group = self.asg['AutoScalingGroups'].get(tag['ResourceId'])
+            if group:
+                group['Tags'] = [old for old in group['Tags'] if old['Key'] != tag['Key']]
+        return {}
+
+    def autoscaling_DescribeTags(self, params):
+        tags = [tag for group in self.asg['AutoScalingGroups'].values() for tag in group['Tags']]
+        return {'Tags': [tag for tag in tags if self.matches(tag, params.get('Filters'))]}
+
+    def autoscaling_PutScalingPolicy(self, params):
+        key = (params['AutoScalingGroupName'], params['PolicyName'])
+        arn = 'arn:aws:autoscaling:eu-west-1:000000000000:scalingPolicy:%s' % self.new_id('p')
+        self.asg['Policies'][key] = dict(params, PolicyARN=arn, PolicyType=params.get('PolicyType', 'SimpleScaling'))
+        return {'PolicyARN': arn}
+
+    def autoscaling_DescribePolicies(self, params):
+        policies = [policy for policy in self.asg['Policies'].values()
+                    if policy['AutoScalingGroupName'] == params.get('AutoScalingGroupName', policy[
+                        'AutoScalingGroupName'])]
+        if params.get('PolicyNames'):
+            policies = [policy for policy in policies if policy['PolicyName'] in params['PolicyNames']]
+        if params.get('PolicyTypes'):
+            policies = [policy for policy in policies if policy['PolicyType'] in params['PolicyTypes']]
+        return {'ScalingPolicies': policies}
+
+    def autoscaling_DeletePolicy(self, params):
+        for key, policy in list(self.asg['Policies'].items()):
+            if params['PolicyName'] in (policy['PolicyName'], policy['PolicyARN']):
+                del self.asg['Policies'][key]
+        return {}
+
+    def autoscaling_PutNotificationConfiguration(self, params):
+        for notice in params['NotificationTypes']:
+            key = (params['AutoScalingGroupName'], params['TopicARN'], notice)
+            self.asg['Notifications'][key] = {'AutoScalingGroupName': params['AutoScalingGroupName'],
+                                              'TopicARN': params['TopicARN'], 'NotificationType': notice}
+        return {}
+
+    def autoscaling_DescribeNotificationConfigurations(self, params):
+        names = params.get('AutoScalingGroupNames')
+        return {'NotificationConfigurations': [notice for notice in self.asg['Notifications'].values()
+                                               if not names or notice['AutoScalingGroupName'] in names]}
+
+    def autoscaling_DeleteNotificationConfiguration(self, params):
+        for key, notice in list(self.asg['Notifications'].items()):
+            if (notice['AutoScalingGroupName'], notice['TopicARN']) == (params['AutoScalingGroupName'],
+                                                                         params['TopicARN']):
+                del self.asg['Notifications'][key]
+        return {}
+
+    ###########
+    # SNS
+    ###########
+
+    def sns_CreateTopic(self, params):
+        arn = 'arn:aws:sns:eu-west-1:000000000000:%s' % params['Name']
+        self.topics[arn] = {'TopicArn': arn}
+        return {'TopicArn': arn}
+
+    def sns_ListTopics(self, params):
+        return {'Topics': list(self.topics.values())}
+
+    def sns_DeleteTopic(self, params):
+        self.topics.pop(params['TopicArn'], None)
+        return {}